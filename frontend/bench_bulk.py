@@ -0,0 +1,102 @@
+"""
+Throughput benchmark of the multi-wallet bulk mode against a local mock 1inch API
+
+Starts the mock_server app, which answers the balance, token and portfolio
+endpoints with deterministic data after a fixed latency, points get_data at it
+through ONEINCH_API_URL and reports wallets/sec and upstream requests.
+
+Usage:
+    python bench_bulk.py [--wallets 1000] [--latency-ms 50] [--mode bulk|naive] [--rate-429 0.0]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from collections import Counter
+from typing import Any, Dict
+
+from aiohttp import web
+
+from mock_server import create_app
+
+
+async def run(n_wallets: int, latency: float, mode: str, rate_429: float = 0.0) -> Dict[str, Any]:
+    counts: Counter = Counter()
+    runner = web.AppRunner(create_app(latency=latency, rate_429=rate_429, retry_after=0.1, counts=counts))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    # get_data reads its configuration at import time
+    workdir = tempfile.mkdtemp(prefix="bench_bulk_")
+    os.environ["ONEINCH_API_URL"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("ONEINCH_RATE_LIMIT", "100000")
+    os.environ["TOKEN_STORE_PATH"] = os.path.join(workdir, "tokens.sqlite3")
+    os.environ["HISTORY_STORE_PATH"] = os.path.join(workdir, "history.sqlite3")
+    import get_data
+
+    rng = random.Random(42)
+    wallets = [f"0x{rng.getrandbits(160):040x}" for _ in range(n_wallets)]
+
+    first_result = None
+    done = 0
+    start = time.perf_counter()
+    try:
+        if mode == "bulk":
+            async for result in get_data.stream_bulk_wallet_data(wallets):
+                done += 1
+                if first_result is None:
+                    first_result = time.perf_counter() - start
+        else:
+            # One get_wallet_data_all_chains-style fetch per wallet
+            session = await get_data.get_http_session()
+            semaphore = asyncio.Semaphore(get_data.BULK_MAX_CONCURRENCY)
+
+            async def one(wallet_address: str):
+                nonlocal done, first_result
+                async with semaphore:
+                    await asyncio.gather(
+                        *(get_data.get_1inch_token_balances(session, wallet_address, chain["id"]) for chain in get_data.CHAINS),
+                        get_data.get_1inch_portfolio_multi(session, [wallet_address], [chain["id"] for chain in get_data.CHAINS])
+                    )
+                done += 1
+                if first_result is None:
+                    first_result = time.perf_counter() - start
+
+            await asyncio.gather(*(one(wallet_address) for wallet_address in wallets))
+        elapsed = time.perf_counter() - start
+    finally:
+        await get_data.close_http_session()
+        await runner.cleanup()
+
+    return {
+        "mode": mode,
+        "wallets": done,
+        "seconds": elapsed,
+        "wallets_per_sec": done / elapsed,
+        "first_result_ms": (first_result or 0) * 1000,
+        "requests": dict(counts),
+        "requests_per_wallet": sum(n for endpoint, n in counts.items() if endpoint != "429") / max(done, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wallets", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--mode", choices=["bulk", "naive"], default="bulk")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of mock responses that are 429s")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run(args.wallets, args.latency_ms / 1000, args.mode, args.rate_429))
+    print(f"{stats['mode']}: {stats['wallets']} wallets in {stats['seconds']:.2f} s "
+          f"= {stats['wallets_per_sec']:.1f} wallets/sec, first result after {stats['first_result_ms']:.0f} ms")
+    print(f"  upstream requests: {stats['requests']} ({stats['requests_per_wallet']:.2f} per wallet)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
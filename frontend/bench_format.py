@@ -0,0 +1,109 @@
+"""
+Microbenchmark of balance conversion and markdown formatting for a large wallet
+
+Compares the per-token float path (float(balance) / 10 ** decimals, float() in
+the sort key) with the columnar path (exact raw balances, scale table, float
+only for display).
+
+Usage:
+    python bench_format.py [tokens] [repeats]
+"""
+import sys
+import time
+import random
+from typing import Any, Callable, Dict, List
+
+from get_data import CHAINS, format_wallet_balances_markdown_multi_chain
+from wallet_table import BalanceTable
+
+
+def make_wallet_data(n_tokens: int, seed: int = 1) -> Dict[str, Any]:
+    """
+    Build wallet data with n_tokens balances spread over all chains
+
+    Args:
+        n_tokens (int): Number of held tokens
+        seed (int): Random seed
+
+    Returns:
+        Dict: Wallet data shaped like get_wallet_data_all_chains, without balance_formatted
+    """
+    rng = random.Random(seed)
+    balances = [{"chain": chain["id"], "chain_name": chain["name"], "tokens": []} for chain in CHAINS]
+    for i in range(n_tokens):
+        chain_data = balances[i % len(balances)]
+        decimals = rng.choice([6, 8, 18, 18, 18])
+        chain_data["tokens"].append({
+            "token_address": f"0x{i:040x}",
+            "symbol": f"TKN{i}",
+            "name": f"Token {i}",
+            "decimals": decimals,
+            "balance": str(rng.randint(1, 10 ** rng.randint(1, 30))),
+            "native_token": i < len(balances),
+        })
+    return {"wallet_address": "0x" + "ab" * 20, "ens_name": None, "balances": balances, "portfolio": {}}
+
+
+def legacy_convert(wallet_data: Dict[str, Any]):
+    for chain_data in wallet_data["balances"]:
+        for token in chain_data["tokens"]:
+            token["balance_formatted"] = float(token["balance"]) / (10 ** token["decimals"])
+
+
+def legacy_format(wallet_data: Dict[str, Any]) -> str:
+    markdown = "## Wallet Balances\n\n"
+    for chain_data in wallet_data["balances"]:
+        tokens = chain_data["tokens"]
+        if not tokens:
+            continue
+        markdown += f"### {chain_data['chain_name']}\n\n"
+        sorted_tokens = sorted(
+            tokens,
+            key=lambda x: (
+                not x.get("native_token", False),
+                -float(x.get("balance_formatted", "0"))
+            )
+        )
+        for token in sorted_tokens:
+            balance = float(token.get("balance_formatted", "0"))
+            if balance < 0.0001 and balance > 0:
+                formatted_balance = f"{balance:.6f}"
+            else:
+                formatted_balance = f"{balance:.4f}"
+            markdown += f"- **{token['symbol']}**: {formatted_balance} ({token['name']})\n"
+        markdown += "\n"
+    return markdown
+
+
+def columnar_format(wallet_data: Dict[str, Any]) -> str:
+    return format_wallet_balances_markdown_multi_chain(wallet_data)
+
+
+def best_of(fn: Callable[[], Any], repeats: int) -> float:
+    """Best wall time of fn in milliseconds"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(n_tokens: int = 10_000, repeats: int = 5):
+    wallet_data = make_wallet_data(n_tokens)
+    table_data = {**wallet_data, "balances_table": BalanceTable.from_balances(wallet_data["balances"])}
+
+    results: List[tuple] = [
+        ("legacy: float(balance) / 10 ** decimals", best_of(lambda: legacy_convert(wallet_data), repeats)),
+        ("legacy: sort + format", best_of(lambda: legacy_format(wallet_data), repeats)),
+        ("columnar: table build + scale table", best_of(lambda: BalanceTable.from_balances(wallet_data["balances"]), repeats)),
+        ("columnar: sort + format", best_of(lambda: columnar_format(table_data), repeats)),
+    ]
+
+    print(f"{n_tokens} tokens, best of {repeats}")
+    for name, ms in results:
+        print(f"  {name:<42} {ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
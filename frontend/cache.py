@@ -0,0 +1,171 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# Returned by TTLCache.get when a key is missing or expired, so None can be cached
+MISSING = object()
+
+
+class TTLCache:
+    """
+    In-memory LRU cache whose entries also expire after a time-to-live
+
+    Args:
+        maxsize (int): Maximum number of entries before the least recently used is evicted
+        ttl (float): Default lifetime of an entry in seconds
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Get a cached value and mark it as recently used
+
+        Args:
+            key (Hashable): Cache key
+            default (Any): Value returned when the key is missing or expired
+
+        Returns:
+            Any: Cached value or default
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value, evicting the least recently used entries when full
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store (None is allowed)
+            ttl (Optional[float]): Lifetime in seconds, defaults to the cache ttl
+        """
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict: Size, hits, misses, hit rate and evictions
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one upstream call
+
+    The first caller for a key starts the call as a task; callers arriving while
+    it runs await the same task. Finished results can be kept in a short-TTL
+    cache so calls right after completion are answered without a request.
+    Cancelling one caller does not cancel the shared call.
+
+    Args:
+        cache (Optional[TTLCache]): Cache for finished results, None to disable
+    """
+
+    def __init__(self, cache: Optional[TTLCache] = None):
+        self.cache = cache
+        self.stats: Dict[str, int] = {
+            "calls": 0,
+            "upstream": 0,
+            "coalesced": 0,
+            "cache_hits": 0,
+        }
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                 should_cache: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key
+
+        Args:
+            key (Hashable): Identity of the call
+            fn (Callable): Coroutine function performing the upstream call
+            should_cache (Optional[Callable]): Decides whether a result may be cached (e.g. not errors)
+
+        Returns:
+            Any: Result of fn, shared by all callers
+        """
+        self.stats["calls"] += 1
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not MISSING:
+                self.stats["cache_hits"] += 1
+                return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["upstream"] += 1
+            task = asyncio.create_task(self._run(key, fn, should_cache))
+            self._inflight[key] = task
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                   should_cache: Optional[Callable[[Any], bool]]) -> Any:
+        try:
+            result = await fn()
+            if self.cache is not None and (should_cache is None or should_cache(result)):
+                self.cache.set(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, key: Hashable):
+        """Drop a cached result so the next call goes upstream"""
+        if self.cache is not None:
+            self.cache.pop(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics
+
+        Returns:
+            Dict: Calls, upstream calls, coalesced calls, cache hits and in-flight count
+        """
+        return {**self.stats, "in_flight": len(self._inflight)}
@@ -1,15 +1,20 @@
 import os
-import requests
-import json
 import asyncio
 import aiohttp
 import time
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 from web3 import Web3
 from web3.exceptions import InvalidAddress
 from eth_utils import is_address
 from dotenv import load_dotenv
 from datetime import datetime
+from token_store import TokenMetadataStore
+from cache import TTLCache, SingleFlight, MISSING
+from history_store import HistoryStore, get_event_id
+from rate_limit import TokenBucket, parse_retry_after
+from http_client import get_http_session, close_http_session, get_http_stats
+from wallet_table import MAX_DECIMALS, BalanceTable, HistoryTable, format_units
+from refresh_scheduler import RefreshScheduler
 
 # Load environment variables
 load_dotenv()
@@ -21,10 +26,29 @@ ETH_PROVIDER_URL = f"https://mainnet.infura.io/v3/{INFURA_API_KEY}"
 w3 = Web3(Web3.HTTPProvider(ETH_PROVIDER_URL))
 
 # API keys
-ONEINCH_API_KEY = os.getenv("ONEINCH_API_KEY", "QatRzkYNrVbp9WvpuacgKL8GK7O9d3CI")  # Use the provided API key
+DEFAULT_ONEINCH_API_KEY = "QatRzkYNrVbp9WvpuacgKL8GK7O9d3CI"  # Use the provided API key
+
+def get_oneinch_api_key() -> str:
+    """1inch API key, read on every call so it can be changed without re-importing this module"""
+    return os.getenv("ONEINCH_API_KEY", DEFAULT_ONEINCH_API_KEY)
+
+def has_oneinch_api_key() -> bool:
+    """Check that a 1inch API key is set and is not the placeholder one"""
+    api_key = get_oneinch_api_key()
+    return bool(api_key) and api_key != "KTcYqWTXV5b9XLypC1Ky4XAX5B5NidHS"
 
 # Check if API key is updated
-print(f"Using 1inch API key: {ONEINCH_API_KEY[:4]}...{ONEINCH_API_KEY[-4:]}")
+print(f"Using 1inch API key: {get_oneinch_api_key()[:4]}...{get_oneinch_api_key()[-4:]}")
+
+# Base URL of the 1inch API, overridable to point the fetchers at a local server (see mock_server.py)
+ONEINCH_API_URL = os.getenv("ONEINCH_API_URL", "https://api.1inch.dev").rstrip("/")
+
+# Requests per second and burst allowed for the 1inch API key. The limiter is
+# shared by every request in the process and backs off on 429 responses.
+ONEINCH_RATE_LIMIT = float(os.getenv("ONEINCH_RATE_LIMIT", "5"))
+ONEINCH_RATE_BURST = float(os.getenv("ONEINCH_RATE_BURST", str(ONEINCH_RATE_LIMIT)))
+ONEINCH_MAX_RETRIES = 3
+oneinch_limiter = TokenBucket(ONEINCH_RATE_LIMIT, ONEINCH_RATE_BURST)
 
 # List of chains to query
 CHAINS = [
@@ -36,6 +60,74 @@ CHAINS = [
     {"id": 8453, "name": "Base", "symbol": "ETH"},
     {"id": 43114, "name": "Avalanche", "symbol": "AVAX"}
 ]
+CHAINS_BY_ID = {chain["id"]: chain for chain in CHAINS}
+CHAIN_SYMBOLS = {chain["id"]: chain["symbol"] for chain in CHAINS}
+
+def chain_name(chain_id: int) -> str:
+    """Get the display name of a chain"""
+    chain = CHAINS_BY_ID.get(chain_id)
+    return chain["name"] if chain else f"Chain {chain_id}"
+
+# Maximum number of concurrent history requests per wallet query
+HISTORY_MAX_IN_FLIGHT = int(os.getenv("HISTORY_MAX_IN_FLIGHT", "4"))
+
+# Events per request when syncing history with the 1inch History API v2
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "100"))
+
+# Watched wallets are kept warm in the background; seconds between refreshes per data type
+REFRESH_BALANCES_INTERVAL = float(os.getenv("REFRESH_BALANCES_INTERVAL", "60"))
+REFRESH_HISTORY_INTERVAL = float(os.getenv("REFRESH_HISTORY_INTERVAL", "300"))
+REFRESH_PORTFOLIO_INTERVAL = float(os.getenv("REFRESH_PORTFOLIO_INTERVAL", "120"))
+REFRESH_MAX_CONCURRENCY = int(os.getenv("REFRESH_MAX_CONCURRENCY", "4"))
+
+# Bulk mode: addresses planned together (one portfolio request pair and one
+# deduplicated metadata lookup per chain) and balance requests in flight
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "50"))
+BULK_MAX_CONCURRENCY = int(os.getenv("BULK_MAX_CONCURRENCY", "16"))
+
+# Token metadata lookups: addresses per multi-address request and concurrent
+# single lookups used when a batch request fails
+TOKEN_METADATA_BATCH_SIZE = 50
+TOKEN_METADATA_CONCURRENCY = 5
+
+# Token metadata shared across chains, wallets and restarts
+token_store = TokenMetadataStore()
+
+# Local copy of wallet history, synced incrementally per (address, chain)
+history_store = HistoryStore()
+_history_backfills: Dict[Tuple[str, int], asyncio.Task] = {}
+
+# Identical in-flight wallet requests, keyed by (wallet_address, chain_id, endpoint),
+# share one upstream call; successful responses are reused for a few seconds
+WALLET_RESPONSE_CACHE_TTL = float(os.getenv("WALLET_RESPONSE_CACHE_TTL", "15"))
+wallet_requests = SingleFlight(TTLCache(maxsize=4096, ttl=WALLET_RESPONSE_CACHE_TTL))
+
+# Cached wallet data with stale-while-revalidate reads, keyed by lowercase address
+wallet_scheduler = RefreshScheduler(
+    {
+        "balances": lambda wallet_address: _fetch_wallet_balances(wallet_address),
+        "history": lambda wallet_address: _fetch_wallet_history(wallet_address),
+        "portfolio": lambda wallet_address: _fetch_wallet_portfolio(wallet_address),
+    },
+    {
+        "balances": REFRESH_BALANCES_INTERVAL,
+        "history": REFRESH_HISTORY_INTERVAL,
+        "portfolio": REFRESH_PORTFOLIO_INTERVAL,
+    },
+    max_concurrency=REFRESH_MAX_CONCURRENCY,
+    is_error=lambda value: _wallet_result_failed(value)
+)
+
+# ENS lookups: address -> name and name -> address. Misses (no ENS name) are
+# cached for ENS_NEGATIVE_CACHE_TTL seconds only.
+ENS_CACHE_SIZE = 10000
+ENS_CACHE_TTL = float(os.getenv("ENS_CACHE_TTL", "3600"))
+ENS_NEGATIVE_CACHE_TTL = float(os.getenv("ENS_NEGATIVE_CACHE_TTL", "600"))
+ens_name_cache = TTLCache(maxsize=ENS_CACHE_SIZE, ttl=ENS_CACHE_TTL)
+ens_address_cache = TTLCache(maxsize=ENS_CACHE_SIZE, ttl=ENS_CACHE_TTL)
+
+# Result of the one-time provider connection check (None until checked)
+_w3_connected: Optional[bool] = None
 
 # Helper functions for address validation
 def is_valid_address(address: str) -> bool:
@@ -53,10 +145,44 @@ def is_valid_address(address: str) -> bool:
     except:
         return False
 
+def is_ens_available() -> bool:
+    """
+    Check the Ethereum provider connection used for ENS
+
+    The check runs once per process; if the provider is unreachable ENS lookups
+    are skipped instead of failing on every request.
+
+    Returns:
+        bool: True if ENS lookups can be made
+    """
+    global _w3_connected
+    if _w3_connected is None:
+        try:
+            _w3_connected = w3.is_connected()
+        except Exception:
+            _w3_connected = False
+        if not _w3_connected:
+            print("Ethereum provider not reachable, ENS resolution disabled")
+    return _w3_connected
+
+def _remember_ens(address: str, ens_name: Optional[str]):
+    # Addresses without an ENS name are cached too, for a shorter time
+    ens_name_cache.set(address.lower(), ens_name, ttl=None if ens_name else ENS_NEGATIVE_CACHE_TTL)
+    if ens_name:
+        ens_address_cache.set(ens_name.lower(), address)
+
+def _remember_ens_address(ens_name: str, address: Optional[str]):
+    ens_address_cache.set(ens_name.lower(), address, ttl=None if address else ENS_NEGATIVE_CACHE_TTL)
+    if address:
+        ens_name_cache.set(address.lower(), ens_name)
+
 def get_ens_name(address: str) -> Optional[str]:
     """
     Get ENS name for an Ethereum address using web3.py
 
+    Blocks on RPC calls when the name is not cached; use get_ens_name_async from
+    async code.
+
     Args:
         address (str): Ethereum address to resolve
 
@@ -66,13 +192,51 @@ def get_ens_name(address: str) -> Optional[str]:
     if not is_valid_address(address):
         return None
 
+    cached = ens_name_cache.get(address.lower())
+    if cached is not MISSING:
+        return cached
+
     try:
         # Check if connected to Ethereum
-        if not w3.is_connected():
+        if not is_ens_available():
             return None
 
         # Get ENS name
         ens_name = w3.ens.name(address)
+        _remember_ens(address, ens_name)
+        return ens_name
+    except Exception as e:
+        print(f"Error resolving ENS name: {str(e)}")
+        return None
+
+async def get_ens_name_async(address: str) -> Optional[str]:
+    """
+    Get ENS name for an Ethereum address without blocking the event loop
+
+    Cached names (and cached misses) are returned immediately, other lookups
+    run the web3.py calls in a worker thread.
+
+    Args:
+        address (str): Ethereum address to resolve
+
+    Returns:
+        Optional[str]: ENS name if available, None otherwise
+    """
+    if not is_valid_address(address):
+        return None
+
+    cached = ens_name_cache.get(address.lower())
+    if cached is not MISSING:
+        return cached
+
+    try:
+        # Check if connected to Ethereum
+        if not (_w3_connected if _w3_connected is not None else await asyncio.to_thread(is_ens_available)):
+            return None
+
+        # Get ENS name
+        ens_name = await asyncio.to_thread(w3.ens.name, address)
+        _remember_ens(address, ens_name)
         return ens_name
     except Exception as e:
         print(f"Error resolving ENS name: {str(e)}")
@@ -82,29 +246,117 @@ def get_address_from_ens(ens_name: str) -> Optional[str]:
     """
     Resolve ENS name to Ethereum address
 
+    Blocks on RPC calls when the name is not cached; use
+    get_address_from_ens_async from async code.
+
     Args:
         ens_name (str): ENS name to resolve (e.g., "vitalik.eth")
 
     Returns:
         Optional[str]: Ethereum address if resolvable, None otherwise
     """
+    cached = ens_address_cache.get(ens_name.lower())
+    if cached is not MISSING:
+        return cached
+
     try:
         # Check if connected to Ethereum
-        if not w3.is_connected():
+        if not is_ens_available():
             return None
 
         # Get address from ENS name
         address = w3.ens.address(ens_name)
+        _remember_ens_address(ens_name, address)
+        return address
+    except Exception as e:
+        print(f"Error resolving ENS address: {str(e)}")
+        return None
+
+async def get_address_from_ens_async(ens_name: str) -> Optional[str]:
+    """
+    Resolve ENS name to Ethereum address without blocking the event loop
+
+    Args:
+        ens_name (str): ENS name to resolve (e.g., "vitalik.eth")
+
+    Returns:
+        Optional[str]: Ethereum address if resolvable, None otherwise
+    """
+    cached = ens_address_cache.get(ens_name.lower())
+    if cached is not MISSING:
+        return cached
+
+    try:
+        # Check if connected to Ethereum
+        if not (_w3_connected if _w3_connected is not None else await asyncio.to_thread(is_ens_available)):
+            return None
+
+        # Get address from ENS name
+        address = await asyncio.to_thread(w3.ens.address, ens_name)
+        _remember_ens_address(ens_name, address)
         return address
     except Exception as e:
         print(f"Error resolving ENS address: {str(e)}")
         return None
 
 # 1inch API functions
+async def oneinch_get(session, url: str, params: Any = None) -> Tuple[int, Any]:
+    """
+    Send a GET request to the 1inch API through the shared rate limiter
+
+    429 responses are retried up to ONEINCH_MAX_RETRIES times after the limiter
+    has backed off (honouring Retry-After).
+
+    Args:
+        session: aiohttp ClientSession
+        url (str): 1inch API URL
+        params: Query parameters
+
+    Returns:
+        Tuple[int, Any]: HTTP status, and the parsed JSON body on 200 or the response text otherwise
+    """
+    headers = {
+        "accept": "application/json",
+        "Authorization": f"Bearer {get_oneinch_api_key()}"
+    }
+
+    for attempt in range(ONEINCH_MAX_RETRIES + 1):
+        await oneinch_limiter.acquire()
+        async with session.get(url, headers=headers, params=params) as response:
+            if response.status == 200:
+                oneinch_limiter.on_success()
+                return response.status, await response.json()
+            if response.status == 429:
+                oneinch_limiter.on_rate_limited(parse_retry_after(response.headers.get("Retry-After")))
+                if attempt < ONEINCH_MAX_RETRIES:
+                    continue
+            return response.status, await response.text()
+
 async def get_1inch_token_balances(session, wallet_address: str, chain_id: int) -> Dict[str, Any]:
     """
     Get token balances for a wallet address using 1inch Balance API
 
+    Concurrent identical requests share one upstream call and successful results
+    are reused for WALLET_RESPONSE_CACHE_TTL seconds.
+
+    Args:
+        session: aiohttp ClientSession
+        wallet_address (str): Wallet address to check balances for
+        chain_id (int): Chain ID to query (e.g., 1 for Ethereum, 137 for Polygon)
+
+    Returns:
+        Dict: Token balances data
+    """
+    return await wallet_requests.do(
+        (wallet_address.lower(), chain_id, "balances"),
+        lambda: _fetch_1inch_token_balances(session, wallet_address, chain_id),
+        should_cache=lambda result: "error" not in result
+    )
+
+async def _fetch_1inch_token_balances(session, wallet_address: str, chain_id: int) -> Dict[str, Any]:
+    """
+    Fetch token balances for a wallet address from the 1inch Balance API
+
     Args:
         session: aiohttp ClientSession
         wallet_address (str): Wallet address to check balances for
@@ -113,104 +365,255 @@ async def get_1inch_token_balances(session, wallet_address: str, chain_id: int)
     Returns:
         Dict: Token balances data
     """
+    result = await _fetch_1inch_raw_balances(session, wallet_address, chain_id)
+    if "error" in result:
+        return result
+
+    held_tokens = result.pop("held")
+    try:
+        # Get token metadata for non-zero balances in batches
+        token_metadata = await get_1inch_token_metadata(session, chain_id, list(held_tokens))
+    except Exception as e:
+        return {**result, "error": str(e), "tokens": []}
+    return {**result, "tokens": build_token_balances(held_tokens, token_metadata)}
+
+async def _fetch_1inch_raw_balances(session, wallet_address: str, chain_id: int) -> Dict[str, Any]:
+    """
+    Fetch the raw non-zero balances of a wallet from the 1inch Balance API, without metadata
+
+    Args:
+        session: aiohttp ClientSession
+        wallet_address (str): Wallet address to check balances for
+        chain_id (int): Chain ID to query
+
+    Returns:
+        Dict: Raw balances by token address under "held", or an error with empty tokens
+    """
     # Check if API key is valid
-    if not ONEINCH_API_KEY or ONEINCH_API_KEY == "KTcYqWTXV5b9XLypC1Ky4XAX5B5NidHS":
+    if not has_oneinch_api_key():
         return {
             "chain": chain_id,
-            "chain_name": next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}"),
+            "chain_name": chain_name(chain_id),
             "error": "Invalid or missing 1inch API key. Get your API key at https://portal.1inch.dev/",
             "tokens": []
         }
 
-    url = f"https://api.1inch.dev/balance/v1.2/{chain_id}/balances/{wallet_address}"
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {ONEINCH_API_KEY}"
-    }
+    url = f"{ONEINCH_API_URL}/balance/v1.2/{chain_id}/balances/{wallet_address}"
 
     try:
         # Get token balances from 1inch
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                raw_balances = await response.json()
-
-                # Convert raw balances to a structured format
-                chain_name = next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}")
-
-                # Get token details for non-zero balances
-                token_details = []
-                for token_address, balance in raw_balances.items():
-                    if balance == "0":
-                        continue
-
-                    # Get token info for tokens with balance
-                    try:
-                        # Needed for token metadata
-                        token_info_url = f"https://api.1inch.dev/token/v1.2/{chain_id}/token?address={token_address}"
-                        async with session.get(token_info_url, headers=headers) as token_response:
-                            if token_response.status == 200:
-                                token_data = await token_response.json()
-
-                                # Format the token balance
-                                decimals = int(token_data.get("decimals", 18))
-                                symbol = token_data.get("symbol", "UNKNOWN")
-                                name = token_data.get("name", "Unknown Token")
-
-                                # Calculate formatted balance
-                                balance_formatted = float(balance) / (10 ** decimals)
-
-                                # Native token check
-                                is_native = token_address.lower() == "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"
-
-                                token_details.append({
-                                    "token_address": token_address,
-                                    "symbol": symbol,
-                                    "name": name,
-                                    "decimals": decimals,
-                                    "balance": balance,
-                                    "balance_formatted": balance_formatted,
-                                    "native_token": is_native
-                                })
-
-                                # Add a small delay to avoid rate limiting
-                                await asyncio.sleep(0.05)
-                    except Exception as token_error:
-                        # If we can't get token info, still add the balance with minimal info
-                        token_details.append({
-                            "token_address": token_address,
-                            "symbol": "UNKNOWN",
-                            "name": "Unknown Token",
-                            "decimals": 18,
-                            "balance": balance,
-                            "balance_formatted": float(balance) / (10 ** 18),
-                            "native_token": token_address.lower() == "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"
-                        })
-
-                return {
-                    "chain": chain_id,
-                    "chain_name": chain_name,
-                    "tokens": token_details
-                }
-            else:
-                error_text = await response.text()
-                return {
-                    "chain": chain_id,
-                    "chain_name": next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}"),
-                    "error": f"HTTP Error {response.status}: {error_text}",
-                    "tokens": []
+        status, raw_balances = await oneinch_get(session, url)
+        if status == 200:
+            return {
+                "chain": chain_id,
+                "chain_name": chain_name(chain_id),
+                "held": {
+                    token_address: balance
+                    for token_address, balance in raw_balances.items()
+                    if balance != "0"
                 }
+            }
+        else:
+            return {
+                "chain": chain_id,
+                "chain_name": chain_name(chain_id),
+                "error": f"HTTP Error {status}: {raw_balances}",
+                "tokens": []
+            }
     except Exception as e:
         return {
             "chain": chain_id,
-            "chain_name": next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}"),
+            "chain_name": chain_name(chain_id),
             "error": str(e),
             "tokens": []
         }
 
+def build_token_balances(held_tokens: Dict[str, str], token_metadata: Dict[str, Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Combine raw balances with token metadata into the tokens list of a balances result
+
+    Args:
+        held_tokens (Dict[str, str]): Raw balance by token address
+        token_metadata (Dict): Metadata from get_1inch_token_metadata
+
+    Returns:
+        List[Dict]: Token details; tokens unknown to 1inch are skipped
+    """
+    token_details = []
+    for token_address, balance in held_tokens.items():
+        # Native token check
+        is_native = token_address.lower() == "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"
+
+        if token_address.lower() not in token_metadata:
+            # Token unknown to 1inch
+            continue
+
+        token_data = token_metadata[token_address.lower()]
+        try:
+            # Balances stay raw; BalanceTable converts them for display
+            decimals = int(token_data.get("decimals", 18))
+            if not 0 <= decimals <= MAX_DECIMALS:
+                raise ValueError(f"decimals out of range: {decimals}")
+            symbol = token_data.get("symbol", "UNKNOWN")
+            name = token_data.get("name", "Unknown Token")
+        except Exception:
+            # If we can't get (or parse) token info, still add the balance with minimal info
+            token_details.append({
+                "token_address": token_address,
+                "symbol": "UNKNOWN",
+                "name": "Unknown Token",
+                "decimals": 18,
+                "balance": balance,
+                "native_token": is_native
+            })
+            continue
+
+        token_details.append({
+            "token_address": token_address,
+            "symbol": symbol,
+            "name": name,
+            "decimals": decimals,
+            "balance": balance,
+            "native_token": is_native
+        })
+    return token_details
+
+async def iter_token_balances_all_chains(session, wallet_address: str, chains: List[Dict] = None):
+    """
+    Fetch token balances for all chains concurrently, yielding each chain as it arrives
+
+    Args:
+        session: aiohttp ClientSession
+        wallet_address (str): Wallet address to check balances for
+        chains (List[Dict]): List of chain objects to query (defaults to CHAINS)
+
+    Yields:
+        Dict: Token balances data of one chain
+    """
+    if chains is None:
+        chains = CHAINS
+
+    tasks = [
+        asyncio.create_task(get_1inch_token_balances(session, wallet_address, chain["id"]))
+        for chain in chains
+    ]
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        # Stop outstanding requests if the consumer goes away early
+        for task in tasks:
+            task.cancel()
+
+async def fetch_1inch_token_list() -> Any:
+    """
+    Get the 1inch multi-chain whitelisted token list
+
+    Returns:
+        Any: Token list response, or None if the request failed
+    """
+    session = await get_http_session()
+    status, data = await oneinch_get(session, f"{ONEINCH_API_URL}/token/v1.2/multi-chain/token-list")
+    if status != 200:
+        print(f"Token list request failed: HTTP Error {status}")
+        return None
+    return data
+
+async def get_1inch_token_metadata(session, chain_id: int, token_addresses: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Get token metadata for many tokens using the 1inch Token API multi-address endpoint
+
+    Cached tokens are served from token_store; only the rest is requested, in
+    batches of TOKEN_METADATA_BATCH_SIZE. If a batch request fails, its tokens are
+    looked up one by one with at most TOKEN_METADATA_CONCURRENCY requests in flight.
+
+    Args:
+        session: aiohttp ClientSession
+        chain_id (int): Chain ID to query (e.g., 1 for Ethereum, 137 for Polygon)
+        token_addresses (List[str]): Token addresses to resolve
+
+    Returns:
+        Dict: Metadata keyed by lowercase token address. Tokens unknown to 1inch are
+        absent, tokens whose lookup failed map to None
+    """
+    token_store.start_background_warm(fetch_1inch_token_list)
+
+    cached, token_addresses = token_store.get_many(chain_id, token_addresses)
+    if not token_addresses:
+        return cached
+
+    metadata: Dict[str, Optional[Dict[str, Any]]] = {}
+    unknown_tokens: Dict[str, None] = {}
+    failed: List[str] = []
+
+    for i in range(0, len(token_addresses), TOKEN_METADATA_BATCH_SIZE):
+        batch = token_addresses[i:i + TOKEN_METADATA_BATCH_SIZE]
+        url = f"{ONEINCH_API_URL}/token/v1.2/{chain_id}/custom"
+        params = [("addresses", token_address) for token_address in batch]
+        try:
+            status, data = await oneinch_get(session, url, params=params)
+            if status == 200:
+                for token_address, token_data in data.items():
+                    metadata[token_address.lower()] = token_data
+                # Remember tokens 1inch doesn't know so they aren't requested again
+                for token_address in batch:
+                    if token_address.lower() not in metadata:
+                        unknown_tokens[token_address.lower()] = None
+            else:
+                print(f"Batch token lookup failed on chain {chain_id}: HTTP Error {status}")
+                failed.extend(batch)
+        except Exception as e:
+            print(f"Batch token lookup failed on chain {chain_id}: {str(e)}")
+            failed.extend(batch)
+
+    if failed:
+        # Fall back to single lookups for tokens whose batch failed
+        semaphore = asyncio.Semaphore(TOKEN_METADATA_CONCURRENCY)
+
+        async def lookup(token_address: str):
+            token_info_url = f"{ONEINCH_API_URL}/token/v1.2/{chain_id}/token?address={token_address}"
+            async with semaphore:
+                try:
+                    status, token_data = await oneinch_get(session, token_info_url)
+                    if status == 200:
+                        metadata[token_address.lower()] = token_data
+                except Exception:
+                    metadata[token_address.lower()] = None
+
+        await asyncio.gather(*(lookup(token_address) for token_address in failed))
+
+    # Failed lookups (None) are retried next time, everything else is stored
+    await token_store.put_many(chain_id, {
+        **unknown_tokens,
+        **{address: token_data for address, token_data in metadata.items() if token_data is not None}
+    })
+    return {**cached, **metadata}
+
 async def get_1inch_portfolio(session, wallet_address: str, chain_id: int) -> Dict[str, Any]:
     """
     Get portfolio data for a wallet address using 1inch Portfolio API
 
+    Concurrent identical requests share one upstream call and successful results
+    are reused for WALLET_RESPONSE_CACHE_TTL seconds.
+
+    Args:
+        session: aiohttp ClientSession
+        wallet_address (str): Wallet address to check portfolio for
+        chain_id (int): Chain ID to query (e.g., 1 for Ethereum, 137 for Polygon)
+
+    Returns:
+        Dict: Portfolio data
+    """
+    return await wallet_requests.do(
+        (wallet_address.lower(), chain_id, "portfolio"),
+        lambda: _fetch_1inch_portfolio(session, wallet_address, chain_id),
+        should_cache=lambda result: "error" not in result
+    )
+
+async def _fetch_1inch_portfolio(session, wallet_address: str, chain_id: int) -> Dict[str, Any]:
+    """
+    Fetch portfolio data for a wallet address from the 1inch Portfolio API
+
     Args:
         session: aiohttp ClientSession
         wallet_address (str): Wallet address to check portfolio for
@@ -220,71 +623,200 @@ async def get_1inch_portfolio(session, wallet_address: str, chain_id: int) -> Di
         Dict: Portfolio data
     """
     # Check if API key is valid
-    if not ONEINCH_API_KEY or ONEINCH_API_KEY == "KTcYqWTXV5b9XLypC1Ky4XAX5B5NidHS":
+    if not has_oneinch_api_key():
         return {
             "chain": chain_id,
-            "chain_name": next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}"),
+            "chain_name": chain_name(chain_id),
             "error": "Invalid or missing 1inch API key. Get your API key at https://portal.1inch.dev/",
             "current_value": None,
             "token_details": None
         }
 
+    result = await _fetch_portfolio_endpoints(session, [("addresses", wallet_address), ("chain_id", str(chain_id))])
+    return {
+        "chain": chain_id,
+        "chain_name": chain_name(chain_id),
+        **result
+    }
+
+async def _fetch_portfolio_endpoints(session, params: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Request the overview and erc20 details endpoints of the 1inch Portfolio API concurrently
+
+    Args:
+        session: aiohttp ClientSession
+        params (List[Tuple[str, str]]): Query parameters; addresses may repeat
+
+    Returns:
+        Dict: current_value and token_details, with an error if a request failed
+    """
     endpoints = [
-        f"https://api.1inch.dev/portfolio/v4/overview?addresses={wallet_address}&chain_id={chain_id}",
-        f"https://api.1inch.dev/portfolio/v4/overview/erc20/details?addresses={wallet_address}&chain_id={chain_id}"
+        f"{ONEINCH_API_URL}/portfolio/v4/overview",
+        f"{ONEINCH_API_URL}/portfolio/v4/overview/erc20/details"
     ]
 
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {ONEINCH_API_KEY}"
+    async def fetch(endpoint: str) -> Dict[str, Any]:
+        try:
+            status, data = await oneinch_get(session, endpoint, params=params)
+        except Exception as e:
+            return {"error": str(e)}
+        if status == 200:
+            return data
+        return {"error": f"HTTP Error {status}: {data}"}
+
+    results = await asyncio.gather(*(fetch(endpoint) for endpoint in endpoints))
+
+    portfolio = {
+        "current_value": results[0] if "error" not in results[0] else None,
+        "token_details": results[1] if "error" not in results[1] else None
     }
+    errors = [result["error"] for result in results if "error" in result]
+    if errors:
+        # If one of the API calls failed, return what we have
+        portfolio["error"] = "; ".join(errors)
+    return portfolio
 
-    try:
-        results = []
-        for endpoint in endpoints:
-            async with session.get(endpoint, headers=headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    results.append(data)
-                else:
-                    error_text = await response.text()
-                    results.append({"error": f"HTTP Error {response.status}: {error_text}"})
-
-                # Add a small delay to avoid rate limiting
-                await asyncio.sleep(0.5)
-
-        chain_name = next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}")
-
-        if len(results) >= 2 and "error" not in results[0] and "error" not in results[1]:
-            return {
-                "chain": chain_id,
-                "chain_name": chain_name,
-                "current_value": results[0],
-                "token_details": results[1]
-            }
-        else:
-            # If one of the API calls failed, return what we have
-            return {
-                "chain": chain_id,
-                "chain_name": chain_name,
-                "error": results[0].get("error", "Unknown error"),
-                "current_value": results[0] if "error" not in results[0] else None,
-                "token_details": results[1] if len(results) > 1 and "error" not in results[1] else None
-            }
-    except Exception as e:
+def get_portfolio_chain_totals(current_value: Optional[Dict[str, Any]]) -> Dict[int, float]:
+    """
+    Get the USD value per chain from a Portfolio API overview response
+
+    Args:
+        current_value (Optional[Dict]): Overview response
+
+    Returns:
+        Dict[int, float]: USD value by chain id, for chains in CHAINS
+    """
+    if not current_value:
+        return {}
+    result = current_value.get("result", current_value)
+    totals: Dict[int, float] = {}
+    for entry in result.get("by_chain", []) if isinstance(result, dict) else []:
+        chain_id = entry.get("id", entry.get("chain_id"))
+        value = entry.get("value_usd", entry.get("valueUsd"))
+        if chain_id is None or value is None or int(chain_id) not in CHAINS_BY_ID:
+            continue
+        totals[int(chain_id)] = totals.get(int(chain_id), 0.0) + float(value)
+    return totals
+
+def get_portfolio_total(current_value: Optional[Dict[str, Any]]) -> Optional[float]:
+    """
+    Get the total USD value from a Portfolio API overview response
+
+    Args:
+        current_value (Optional[Dict]): Overview response
+
+    Returns:
+        Optional[float]: Total USD value, None if the response has none
+    """
+    if not current_value:
+        return None
+    result = current_value.get("result", current_value)
+    if not isinstance(result, dict):
+        return None
+    total = result.get("total", result.get("totalUsd"))
+    return float(total) if total is not None else None
+
+def get_portfolio_address_totals(current_value: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Get the USD value per address from a Portfolio API overview response
+
+    Args:
+        current_value (Optional[Dict]): Overview response for one or more addresses
+
+    Returns:
+        Dict[str, float]: USD value by lowercase address
+    """
+    if not current_value:
+        return {}
+    result = current_value.get("result", current_value)
+    totals: Dict[str, float] = {}
+    for entry in result.get("by_address", []) if isinstance(result, dict) else []:
+        address = entry.get("address")
+        value = entry.get("value_usd", entry.get("valueUsd"))
+        if address is None or value is None:
+            continue
+        totals[address.lower()] = totals.get(address.lower(), 0.0) + float(value)
+    return totals
+
+async def get_1inch_portfolio_multi(session, wallet_addresses: List[str],
+                                    chain_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Get portfolio data for several addresses on several chains with one pair of requests
+
+    The Portfolio API accepts repeated addresses and answers for every chain when
+    no chain_id is given, so a whole set of wallets costs two requests instead of
+    two per address and chain. Coalesced and cached like get_1inch_portfolio.
+
+    Args:
+        session: aiohttp ClientSession
+        wallet_addresses (List[str]): Wallet addresses to check
+        chain_ids (Optional[List[int]]): Chains to report, defaults to every chain in CHAINS
+
+    Returns:
+        Dict: current_value, token_details, total_usd and the USD value by chain id
+    """
+    addresses = sorted({address.lower() for address in wallet_addresses})
+    chains = tuple(sorted(chain_ids)) if chain_ids is not None else None
+    return await wallet_requests.do(
+        (tuple(addresses), chains, "portfolio_multi"),
+        lambda: _fetch_1inch_portfolio_multi(session, addresses, chains),
+        should_cache=lambda result: "error" not in result
+    )
+
+async def _fetch_1inch_portfolio_multi(session, wallet_addresses: List[str],
+                                       chain_ids: Optional[Tuple[int, ...]]) -> Dict[str, Any]:
+    if not has_oneinch_api_key():
         return {
-            "chain": chain_id,
-            "chain_name": next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}"),
-            "error": str(e),
+            "addresses": wallet_addresses,
+            "error": "Invalid or missing 1inch API key. Get your API key at https://portal.1inch.dev/",
             "current_value": None,
-            "token_details": None
+            "token_details": None,
+            "total_usd": None,
+            "by_chain": {}
         }
 
+    params = [("addresses", address) for address in wallet_addresses]
+    if chain_ids is not None and len(chain_ids) == 1:
+        params.append(("chain_id", str(chain_ids[0])))
+    result = await _fetch_portfolio_endpoints(session, params)
+
+    by_chain = get_portfolio_chain_totals(result["current_value"])
+    if chain_ids is not None:
+        by_chain = {chain_id: value for chain_id, value in by_chain.items() if chain_id in chain_ids}
+    return {
+        "addresses": wallet_addresses,
+        **result,
+        "total_usd": get_portfolio_total(result["current_value"]) if chain_ids is None else sum(by_chain.values()),
+        "by_chain": by_chain
+    }
+
 # 1inch History API
 async def get_1inch_transaction_history(session, wallet_address: str, chain_id: int, limit: int = 5) -> Dict[str, Any]:
     """
     Get transaction history for a wallet address using 1inch History API
 
+    Concurrent identical requests share one upstream call and successful results
+    are reused for WALLET_RESPONSE_CACHE_TTL seconds.
+
+    Args:
+        session: aiohttp ClientSession
+        wallet_address (str): Wallet address to get history for
+        chain_id (int): Chain ID to query (e.g., 1 for Ethereum, 137 for Polygon)
+        limit (int): Number of transactions to return
+
+    Returns:
+        Dict: Transaction history data
+    """
+    return await wallet_requests.do(
+        (wallet_address.lower(), chain_id, f"history:{limit}"),
+        lambda: _fetch_1inch_transaction_history(session, wallet_address, chain_id, limit),
+        should_cache=lambda result: "error" not in result
+    )
+
+async def _fetch_1inch_transaction_history(session, wallet_address: str, chain_id: int, limit: int = 5) -> Dict[str, Any]:
+    """
+    Fetch transaction history for a wallet address from the 1inch History API
+
     Args:
         session: aiohttp ClientSession
         wallet_address (str): Wallet address to get history for
@@ -295,21 +827,16 @@ async def get_1inch_transaction_history(session, wallet_address: str, chain_id:
         Dict: Transaction history data
     """
     # Check if API key is valid
-    if not ONEINCH_API_KEY or ONEINCH_API_KEY == "KTcYqWTXV5b9XLypC1Ky4XAX5B5NidHS":
+    if not has_oneinch_api_key():
         return {
             "chain": chain_id,
-            "chain_name": next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}"),
+            "chain_name": chain_name(chain_id),
             "error": "Invalid or missing 1inch API key. Get your API key at https://portal.1inch.dev/",
             "result": []
         }
 
     # Use the working endpoint format
-    url = "https://api.1inch.dev/history/v1.0/history/transactions"
-
-    headers = {
-        "accept": "application/json",
-        "Authorization": f"Bearer {ONEINCH_API_KEY}"
-    }
+    url = f"{ONEINCH_API_URL}/history/v1.0/history/transactions"
 
     params = {
         "addresses": wallet_address,
@@ -319,109 +846,491 @@ async def get_1inch_transaction_history(session, wallet_address: str, chain_id:
     }
 
     try:
-        async with session.get(url, headers=headers, params=params) as response:
-            if response.status == 200:
-                data = await response.json()
-                chain_name = next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}")
-
-                # Handle different response formats
-                transactions = []
-                if isinstance(data, list):
-                    # API returns a list of transactions
-                    transactions = data
-                elif isinstance(data, dict) and "transactions" in data:
-                    # API returns a dict with a 'transactions' key
-                    transactions = data.get("transactions", [])
-
-                # Add chain information to match our expected structure
-                return {
-                    "chain": chain_id,
-                    "chain_name": chain_name,
-                    "result": transactions
-                }
-            elif response.status == 429:
-                # Rate limit exceeded
-                return {
-                    "chain": chain_id,
-                    "chain_name": next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}"),
-                    "error": "Rate limit exceeded. Please try again later.",
-                    "result": []
-                }
-            else:
-                error_text = await response.text()
-                return {
-                    "chain": chain_id,
-                    "chain_name": next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}"),
-                    "error": f"HTTP Error {response.status}: {error_text}",
-                    "result": []
-                }
+        status, data = await oneinch_get(session, url, params=params)
+        if status == 200:
+            # Handle different response formats
+            transactions = []
+            if isinstance(data, list):
+                # API returns a list of transactions
+                transactions = data
+            elif isinstance(data, dict) and "transactions" in data:
+                # API returns a dict with a 'transactions' key
+                transactions = data.get("transactions", [])
+
+            # Add chain information to match our expected structure
+            return {
+                "chain": chain_id,
+                "chain_name": chain_name(chain_id),
+                "result": transactions
+            }
+        elif status == 429:
+            # Rate limit exceeded
+            return {
+                "chain": chain_id,
+                "chain_name": chain_name(chain_id),
+                "error": "Rate limit exceeded. Please try again later.",
+                "result": []
+            }
+        else:
+            return {
+                "chain": chain_id,
+                "chain_name": chain_name(chain_id),
+                "error": f"HTTP Error {status}: {data}",
+                "result": []
+            }
     except Exception as e:
         return {
             "chain": chain_id,
-            "chain_name": next((c["name"] for c in CHAINS if c["id"] == chain_id), f"Chain {chain_id}"),
+            "chain_name": chain_name(chain_id),
             "error": str(e),
             "result": []
         }
 
-#get 1Inch transactions history
-def fetch_transaction_history_another(wallet_address, chainId="1") -> Dict[str] :
-    url = f"https://api.1inch.io/v4.0/1/history?address={wallet_address}"
-    headers = {
-        "accept": "application/json"
+async def get_1inch_transaction_history_limited(session, semaphore: asyncio.Semaphore, wallet_address: str, chain_id: int) -> Dict[str, Any]:
+    """
+    Get transaction history for one chain from the synced history store while holding a slot of semaphore
+
+    Args:
+        session: aiohttp ClientSession
+        semaphore (asyncio.Semaphore): Caps the number of history requests in flight
+        wallet_address (str): Wallet address to get history for
+        chain_id (int): Chain ID to query
+
+    Returns:
+        Dict: Transaction history data
+    """
+    async with semaphore:
+        return await get_synced_transaction_history(wallet_address, chain_id)
+
+async def iter_transaction_history_all_chains(session, wallet_address: str, chains: List[Dict] = None):
+    """
+    Fetch transaction history for all chains concurrently, yielding each chain as it arrives
+
+    At most HISTORY_MAX_IN_FLIGHT requests run at once; chains that answer quickly
+    are yielded without waiting for slow ones.
+
+    Args:
+        session: aiohttp ClientSession
+        wallet_address (str): Wallet address to get history for
+        chains (List[Dict]): List of chain objects to query (defaults to CHAINS)
+
+    Yields:
+        Dict: Transaction history data of one chain
+    """
+    if chains is None:
+        chains = CHAINS
+
+    semaphore = asyncio.Semaphore(HISTORY_MAX_IN_FLIGHT)
+    tasks = [
+        asyncio.create_task(get_1inch_transaction_history_limited(session, semaphore, wallet_address, chain["id"]))
+        for chain in chains
+    ]
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        # Stop outstanding requests if the consumer goes away early
+        for task in tasks:
+            task.cancel()
+
+async def get_1inch_history_events_page(session, wallet_address: str, chain_id: int, limit: int = HISTORY_PAGE_SIZE,
+                                        from_timestamp_ms: Optional[int] = None,
+                                        to_timestamp_ms: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get one page of history events using the 1inch History API v2
+
+    Args:
+        session: aiohttp ClientSession
+        wallet_address (str): Wallet address to get history for
+        chain_id (int): Chain ID to query
+        limit (int): Maximum number of events in the page
+        from_timestamp_ms (Optional[int]): Only events at or after this time
+        to_timestamp_ms (Optional[int]): Only events at or before this time
+
+    Returns:
+        Dict: Events of the page, newest first, under "items", or an "error"
+    """
+    url = f"{ONEINCH_API_URL}/history/v2.0/history/{wallet_address}/events"
+    params = {
+        "chainId": str(chain_id),
+        "limit": str(limit)
     }
-    response = requests.get(url, headers=headers)
-    url = f"https://api.1inch.dev/history/v2.0/history/{wallet_address}/events"
-    headers = {
-        "Authorization": f"Bearer {ONEINCH_API_KEY}",
-        "accept": "application/json"
+    if from_timestamp_ms is not None:
+        params["fromTimestampMs"] = str(from_timestamp_ms)
+    if to_timestamp_ms is not None:
+        params["toTimestampMs"] = str(to_timestamp_ms)
+
+    try:
+        status, data = await oneinch_get(session, url, params=params)
+    except Exception as e:
+        return {"error": str(e), "items": []}
+    if status == 200 and isinstance(data, dict):
+        return {"items": data.get("items", [])}
+    return {"error": f"HTTP Error {status}: {data}", "items": []}
+
+async def sync_transaction_history(wallet_address: str, chain_id: int, backfill: bool = True) -> Dict[str, Any]:
+    """
+    Bring the local history of a wallet up to date, fetching only newer events
+
+    The first sync stores the newest page; later syncs page down from the newest
+    event until they reach the stored cursor. Older history is downloaded by a
+    background backfill.
+
+    Args:
+        wallet_address (str): Wallet address to sync
+        chain_id (int): Chain ID to sync
+        backfill (bool): Start the background backfill of older pages if not finished
+
+    Returns:
+        Dict: Number of new events, stored event count and backfill state
+    """
+    session = await get_http_session()
+    cursor = await asyncio.to_thread(history_store.get_cursor, wallet_address, chain_id)
+    newest = cursor["newest_time_ms"] if cursor else None
+    latest = newest
+    oldest = None
+    backfill_done = None
+    new_events = 0
+    to_timestamp_ms = None
+
+    while True:
+        page = await get_1inch_history_events_page(
+            session, wallet_address, chain_id, from_timestamp_ms=newest, to_timestamp_ms=to_timestamp_ms
+        )
+        if "error" in page:
+            return {
+                "chain": chain_id,
+                "chain_name": chain_name(chain_id),
+                "error": page["error"],
+                "new_events": new_events
+            }
+
+        items = page["items"]
+        added = await asyncio.to_thread(history_store.add_events, wallet_address, chain_id, items)
+        new_events += added
+        if items:
+            times = [int(item.get("timeMs", 0)) for item in items]
+            latest = max(times) if latest is None else max(latest, max(times))
+            to_timestamp_ms = min(times)
+
+        if cursor is None:
+            # First sync: keep the newest page, the backfill fetches the rest
+            oldest = to_timestamp_ms
+            backfill_done = len(items) < HISTORY_PAGE_SIZE
+            break
+        if len(items) < HISTORY_PAGE_SIZE or added == 0:
+            # Reached events that were already stored
+            break
+
+    await asyncio.to_thread(history_store.update_cursor, wallet_address, chain_id, newest_time_ms=latest,
+                            oldest_time_ms=oldest, backfill_done=backfill_done)
+
+    cursor = await asyncio.to_thread(history_store.get_cursor, wallet_address, chain_id)
+    if backfill and not cursor["backfill_done"]:
+        start_history_backfill(wallet_address, chain_id)
+
+    return {
+        "chain": chain_id,
+        "chain_name": chain_name(chain_id),
+        "new_events": new_events,
+        "stored_events": await asyncio.to_thread(history_store.count_events, wallet_address, chain_id),
+        "backfill_done": cursor["backfill_done"]
+    }
+
+async def backfill_transaction_history(wallet_address: str, chain_id: int, max_pages: Optional[int] = None) -> int:
+    """
+    Download older history pages below the stored cursor until the start is reached
+
+    Args:
+        wallet_address (str): Wallet address to backfill
+        chain_id (int): Chain ID to backfill
+        max_pages (Optional[int]): Stop after this many pages, None for no limit
+
+    Returns:
+        int: Number of new events stored
+    """
+    session = await get_http_session()
+    total = 0
+    pages = 0
+    while max_pages is None or pages < max_pages:
+        cursor = await asyncio.to_thread(history_store.get_cursor, wallet_address, chain_id)
+        if cursor is None or cursor["backfill_done"]:
+            break
+
+        page = await get_1inch_history_events_page(
+            session, wallet_address, chain_id, to_timestamp_ms=cursor["oldest_time_ms"]
+        )
+        if "error" in page:
+            print(f"History backfill stopped for {wallet_address} on chain {chain_id}: {page['error']}")
+            break
+
+        items = page["items"]
+        added = await asyncio.to_thread(history_store.add_events, wallet_address, chain_id, items)
+        total += added
+        pages += 1
+        oldest = min((int(item.get("timeMs", 0)) for item in items), default=None)
+        await asyncio.to_thread(
+            history_store.update_cursor,
+            wallet_address, chain_id,
+            oldest_time_ms=oldest,
+            backfill_done=len(items) < HISTORY_PAGE_SIZE or added == 0
+        )
+    return total
+
+def start_history_backfill(wallet_address: str, chain_id: int):
+    """
+    Run backfill_transaction_history in the background, once per (address, chain)
+
+    Args:
+        wallet_address (str): Wallet address to backfill
+        chain_id (int): Chain ID to backfill
+    """
+    key = (wallet_address.lower(), chain_id)
+    task = _history_backfills.get(key)
+    if task is None or task.done():
+        _history_backfills[key] = asyncio.create_task(backfill_transaction_history(wallet_address, chain_id))
+
+async def get_stored_transaction_history(wallet_address: str, chain_id: int, offset: int = 0,
+                                         limit: int = 50) -> Dict[str, Any]:
+    """
+    Browse the locally synced history of a wallet without calling the API
+
+    Args:
+        wallet_address (str): Wallet address
+        chain_id (int): Chain ID
+        offset (int): Number of newest events to skip
+        limit (int): Maximum number of events to return
+
+    Returns:
+        Dict: Events (newest first), stored event count and backfill state
+    """
+    cursor, events, stored_events = await asyncio.gather(
+        asyncio.to_thread(history_store.get_cursor, wallet_address, chain_id),
+        asyncio.to_thread(history_store.get_events, wallet_address, chain_id, offset, limit),
+        asyncio.to_thread(history_store.count_events, wallet_address, chain_id),
+    )
+    return {
+        "chain": chain_id,
+        "chain_name": chain_name(chain_id),
+        "events": events,
+        "stored_events": stored_events,
+        "backfill_done": bool(cursor and cursor["backfill_done"])
     }
-    params={
-        "chainId":chainId
+
+def _history_event_token(event: Dict[str, Any]) -> str:
+    """Lowercase address of the first token moved by a History API v2 event, empty if none"""
+    token_actions = event.get("details", {}).get("tokenActions") or [{}]
+    return (token_actions[0].get("address") or "").lower()
+
+def history_event_to_transaction(event: Dict[str, Any], token_metadata: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Convert a stored History API v2 event into the transaction shape of the History API v1
+
+    Native amounts stay in wei like v1 values. Token amounts are scaled with the
+    token's metadata; without usable metadata the raw amount is shown with an
+    UNKNOWN symbol rather than scaled as the native coin.
+
+    Args:
+        event (Dict): Stored event
+        token_metadata (Dict): Metadata by lowercase token address, from get_1inch_token_metadata
+
+    Returns:
+        Dict: Hash, timestamp, addresses and value of the transaction
+    """
+    details = event.get("details", {})
+    token_action = (details.get("tokenActions") or [{}])[0]
+    transaction = {
+        "hash": details.get("txHash", "Unknown"),
+        "timeStamp": str(int(event.get("timeMs", 0)) // 1000),
+        "from": details.get("fromAddress", "Unknown"),
+        "to": details.get("toAddress", "Unknown"),
+        "value": token_action.get("amount", "0"),
     }
+    token_address = _history_event_token(event)
+    if token_address and token_address != "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee":
+        token_data = token_metadata.get(token_address)
+        try:
+            amount = int(transaction["value"] or 0)
+            transaction["tokenSymbol"] = token_data["symbol"]
+            transaction["tokenValue"] = str(format_units(amount, int(token_data["decimals"])))
+        except (TypeError, KeyError, ValueError):
+            transaction["tokenSymbol"] = "UNKNOWN"
+            transaction["tokenValue"] = str(transaction["value"] or "0")
+    return transaction
+
+async def get_synced_transaction_history(wallet_address: str, chain_id: int, limit: int = 5) -> Dict[str, Any]:
+    """
+    Get the newest transactions of a wallet from the local history store
 
-    markdown = f"## Transactions History\n\n"
+    The store is synced first, fetching only events newer than its cursor (older
+    pages are backfilled in the background). Concurrent syncs of the same wallet
+    and chain share one run, and a successful sync is reused for
+    WALLET_RESPONSE_CACHE_TTL seconds. If the sync fails, the stored events are
+    returned along with the error.
 
-    try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
-
-        if "items" in data:
-            transactions = data["items"]
-            if not transactions:
-                print(f"No transactions found for address {wallet_address} on chain 1.")
-                return
-
-            print(f"Transaction history for address {wallet_address} on chain 1:")
-            for trans in transactions:
-                tx = trans['details']
-
-                tx_hash = tx['txHash']
-                tx_type = tx['type']
-                tx_time = datetime.fromtimestamp(trans['timeMs'] / 1000.0)
-                to_addr = tx['fromAddress']
-                from_addr = tx['toAddress']
-                tx_val = tx['tokenActions'][0]['amount']
-                token_id = tx['tokenActions'][0].get('tokenId', 'NA')
-
-                markdown += f"- **{tx_type} {tx_val} {token_id}**\n"
-                markdown += f"  To/From: {to_addr} {from_addr}\n"
-                markdown += f"  Hash: {tx_hash}\n"
-                markdown += f"  Time: {tx_time}\n\n"
-            return{
-                "history": markdown
-            }
+    Args:
+        wallet_address (str): Wallet address to get history for
+        chain_id (int): Chain ID to query
+        limit (int): Number of transactions to return
 
-        else:
-            print(f"Error: {data.get('message', 'Unknown error')}")
+    Returns:
+        Dict: Transaction history data, shaped like get_1inch_transaction_history
+    """
+    if not has_oneinch_api_key():
+        return {
+            "chain": chain_id,
+            "chain_name": chain_name(chain_id),
+            "error": "Invalid or missing 1inch API key. Get your API key at https://portal.1inch.dev/",
+            "result": []
+        }
+
+    sync = await wallet_requests.do(
+        (wallet_address.lower(), chain_id, "history:sync"),
+        lambda: sync_transaction_history(wallet_address, chain_id),
+        should_cache=lambda result: "error" not in result
+    )
+    stored = await get_stored_transaction_history(wallet_address, chain_id, limit=limit)
+
+    # Resolve the tokens of the page so token amounts are scaled by their own decimals
+    token_addresses = sorted({_history_event_token(event) for event in stored["events"]}
+                             - {"", "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"})
+    token_metadata = {}
+    if token_addresses:
+        try:
+            token_metadata = await get_1inch_token_metadata(await get_http_session(), chain_id, token_addresses)
+        except Exception as e:
+            print(f"Token lookup for history on chain {chain_id} failed: {str(e)}")
+
+    result = {
+        "chain": chain_id,
+        "chain_name": chain_name(chain_id),
+        "result": [history_event_to_transaction(event, token_metadata) for event in stored["events"]]
+    }
+    if "error" in sync:
+        result["error"] = sync["error"]
+    return result
+
+def parse_history_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flatten a 1inch History API v2 event into the fields shown to the user
 
+    Args:
+        event (Dict): Raw event
 
-    except requests.exceptions.RequestException as e:
+    Returns:
+        Dict: Hash, type, status, time, addresses and first token action of the event
+    """
+    details = event.get("details", {})
+    token_actions = details.get("tokenActions") or [{}]
+    return {
+        "id": get_event_id(event),
+        "tx_hash": details.get("txHash", ""),
+        "type": details.get("type", "Unknown"),
+        "status": details.get("status", ""),
+        "time": datetime.fromtimestamp(event.get("timeMs", 0) / 1000.0),
+        "time_ms": event.get("timeMs", 0),
+        "from_address": details.get("fromAddress", ""),
+        "to_address": details.get("toAddress", ""),
+        "amount": token_actions[0].get("amount", "0"),
+        "token_id": token_actions[0].get("tokenId", "NA"),
+    }
+
+async def iter_transaction_history_events(wallet_address: str, chain_id: int = 1,
+                                          page_size: int = HISTORY_PAGE_SIZE,
+                                          max_events: Optional[int] = None):
+    """
+    Stream the transaction history of a wallet page by page, newest first
+
+    Pages are read from the local history store after syncing its newest events.
+    When the reader gets past the stored events, one older page is backfilled
+    before going on, so only the history that is consumed is downloaded, and
+    only once.
+
+    Args:
+        wallet_address (str): Wallet address
+        chain_id (int): Chain ID to query
+        page_size (int): Events per page
+        max_events (Optional[int]): Stop after this many events, None for the whole history
+
+    Yields:
+        List[Dict]: Parsed events of one page (see parse_history_event)
+    """
+    sync = await sync_transaction_history(wallet_address, chain_id, backfill=False)
+    if "error" in sync:
+        raise RuntimeError(f"Error fetching transaction history: {sync['error']}")
+
+    offset = 0
+    remaining = max_events
+    while remaining is None or remaining > 0:
+        limit = page_size if remaining is None else min(page_size, remaining)
+        stored = await get_stored_transaction_history(wallet_address, chain_id, offset, limit)
+        while len(stored["events"]) < limit and not stored["backfill_done"]:
+            if not await backfill_transaction_history(wallet_address, chain_id, max_pages=1):
+                break
+            stored = await get_stored_transaction_history(wallet_address, chain_id, offset, limit)
+
+        events = [parse_history_event(event) for event in stored["events"]]
+        if not events:
+            break
+        offset += len(events)
+        if remaining is not None:
+            remaining -= len(events)
+        yield events
+
+        if len(events) < limit:
+            break
+
+def format_history_event_markdown(event: Dict[str, Any]) -> str:
+    """
+    Format one parsed history event as markdown
+
+    Args:
+        event (Dict): Event from iter_transaction_history_events
+
+    Returns:
+        str: Markdown list item
+    """
+    return (
+        f"- **{event['type']} {event['amount']} {event['token_id']}**\n"
+        f"  From/To: {event['from_address']} {event['to_address']}\n"
+        f"  Hash: {event['tx_hash']}\n"
+        f"  Time: {event['time']}\n\n"
+    )
+
+async def stream_transaction_history_events_markdown(wallet_address: str, chain_id: int = 1,
+                                                     max_events: Optional[int] = None):
+    """
+    Stream the transaction history of a wallet as markdown chunks, one per page
+
+    Args:
+        wallet_address (str): Wallet address
+        chain_id (int): Chain ID to query
+        max_events (Optional[int]): Stop after this many events, None for the whole history
+
+    Yields:
+        str: Markdown for the heading, then for each page of events
+    """
+    yield "## Transactions History\n\n"
+    async for events in iter_transaction_history_events(wallet_address, chain_id, max_events=max_events):
+        yield "".join(format_history_event_markdown(event) for event in events)
+
+#get 1Inch transactions history
+async def fetch_transaction_history_another(wallet_address, chainId="1") -> Optional[Dict[str, str]]:
+    try:
+        chunks = [
+            chunk async for chunk in
+            stream_transaction_history_events_markdown(wallet_address, int(chainId), max_events=HISTORY_PAGE_SIZE)
+        ]
+    except Exception as e:
         print(f"Error fetching transaction history: {e}")
-    except json.JSONDecodeError:
-        print("Error decoding JSON response.")
-    except KeyError as e:
-        print(f"Key error: {e}. Check the API response format.")
+        return None
+
+    if len(chunks) == 1:
+        print(f"No transactions found for address {wallet_address} on chain {chainId}.")
+        return None
+    return {
+        "history": "".join(chunks)
+    }
 
 
 # Main function to get wallet data from all sources and chains
@@ -442,43 +1351,330 @@ async def get_wallet_data_all_chains(wallet_address: str, chains: List[Dict] = N
     if chains is None:
         chains = CHAINS
 
-    # Get ENS name if available (only works on Ethereum mainnet)
-    ens_name = get_ens_name(wallet_address)
+    # Get ENS name if available (only works on Ethereum mainnet), alongside the 1inch calls
+    ens_task = asyncio.create_task(get_ens_name_async(wallet_address))
 
-    async with aiohttp.ClientSession() as session:
-        # Create tasks for parallel execution - 1inch Balance API
-        balance_tasks = [
-            get_1inch_token_balances(session, wallet_address, chain["id"])
-            for chain in chains
-        ]
+    session = await get_http_session()
 
-        # Execute balance tasks in parallel
-        balances_results = await asyncio.gather(*balance_tasks)
+    # Portfolio value for every chain in one batched request, alongside the other calls
+    portfolio_task = asyncio.create_task(
+        get_1inch_portfolio_multi(session, [wallet_address], [chain["id"] for chain in chains])
+    )
 
-        # Execute history tasks sequentially with delay to avoid rate limits
-        history_results = []
-        for chain in chains:
-            # Add delay between requests to avoid rate limiting
-            if len(history_results) > 0:
-                await asyncio.sleep(1)  # Wait 1 second between requests
+    # Create tasks for parallel execution - 1inch Balance API, and History API
+    # capped at HISTORY_MAX_IN_FLIGHT
+    balance_tasks = [
+        get_1inch_token_balances(session, wallet_address, chain["id"])
+        for chain in chains
+    ]
+    semaphore = asyncio.Semaphore(HISTORY_MAX_IN_FLIGHT)
+    history_tasks = [
+        get_1inch_transaction_history_limited(session, semaphore, wallet_address, chain["id"])
+        for chain in chains
+    ]
 
-            result = await get_1inch_transaction_history(session, wallet_address, chain["id"])
-            history_results.append(result)
+    # Execute balance and history tasks together in parallel
+    results = await asyncio.gather(*balance_tasks, *history_tasks)
+    balances_results = list(results[:len(chains)])
+    history_results = list(results[len(chains):])
 
-        # Optional: Get portfolio data from 1inch for Ethereum only
-        try:
-            eth_portfolio = await get_1inch_portfolio(session, wallet_address, 1)  # Ethereum mainnet
-        except Exception as e:
-            eth_portfolio = {"error": str(e)}
+    try:
+        portfolio = await portfolio_task
+    except Exception as e:
+        portfolio = {"error": str(e)}
+
+    ens_name = await ens_task
 
     return {
         "wallet_address": wallet_address,
         "ens_name": ens_name,
         "balances": balances_results,
         "history": history_results,
-        "portfolio": eth_portfolio
+        "balances_table": BalanceTable.from_balances(balances_results),
+        "history_table": HistoryTable.from_history(history_results, wallet_address, CHAIN_SYMBOLS),
+        "portfolio": portfolio
     }
 
+def _wallet_result_failed(value: Any) -> bool:
+    """Whether a scheduled wallet refresh failed as a whole: an error result, or an error on every chain"""
+    if isinstance(value, list):
+        return bool(value) and all("error" in chain_data for chain_data in value)
+    return isinstance(value, dict) and "error" in value
+
+def _keep_previous_chains(wallet_address: str, kind: str, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace chains whose refresh failed with their last good cached result, unless every chain failed"""
+    previous, _ = wallet_scheduler.peek(wallet_address, kind)
+    if previous is MISSING or _wallet_result_failed(results):
+        return results
+    good = {chain_data["chain"]: chain_data for chain_data in previous if "error" not in chain_data}
+    return [
+        good.get(chain_data["chain"], chain_data) if "error" in chain_data else chain_data
+        for chain_data in results
+    ]
+
+async def _fetch_wallet_balances(wallet_address: str) -> List[Dict[str, Any]]:
+    session = await get_http_session()
+    return _keep_previous_chains(wallet_address, "balances", list(await asyncio.gather(*(
+        get_1inch_token_balances(session, wallet_address, chain["id"]) for chain in CHAINS
+    ))))
+
+async def _fetch_wallet_history(wallet_address: str) -> List[Dict[str, Any]]:
+    session = await get_http_session()
+    semaphore = asyncio.Semaphore(HISTORY_MAX_IN_FLIGHT)
+    return _keep_previous_chains(wallet_address, "history", list(await asyncio.gather(*(
+        get_1inch_transaction_history_limited(session, semaphore, wallet_address, chain["id"]) for chain in CHAINS
+    ))))
+
+async def _fetch_wallet_portfolio(wallet_address: str) -> Dict[str, Any]:
+    session = await get_http_session()
+    return await get_1inch_portfolio_multi(session, [wallet_address], [chain["id"] for chain in CHAINS])
+
+async def get_wallet_data_cached(wallet_address: str) -> Dict[str, Any]:
+    """
+    Get wallet data for all chains from the refresh scheduler
+
+    The wallet is watched from now on. Cached balances, history and portfolio are
+    returned right away, even if stale (they are revalidated in the background);
+    only data never fetched before is waited for.
+
+    Args:
+        wallet_address (str): Wallet address to get data for
+
+    Returns:
+        Dict: Wallet data shaped like get_wallet_data_all_chains, plus the age in seconds of each data type
+    """
+    if not is_valid_address(wallet_address):
+        return {"error": "Invalid wallet address"}
+
+    key = wallet_address.lower()
+    wallet_scheduler.watch(key)
+    ens_task = asyncio.create_task(get_ens_name_async(wallet_address))
+
+    kinds = ("balances", "history", "portfolio")
+    balances, history, portfolio = await asyncio.gather(*(wallet_scheduler.get(key, kind) for kind in kinds))
+
+    return {
+        "wallet_address": wallet_address,
+        "ens_name": await ens_task,
+        "balances": balances,
+        "history": history,
+        "balances_table": BalanceTable.from_balances(balances),
+        "history_table": HistoryTable.from_history(history, wallet_address, CHAIN_SYMBOLS),
+        "portfolio": portfolio,
+        "ages": {kind: wallet_scheduler.peek(key, kind)[1] for kind in kinds}
+    }
+
+async def _get_bulk_batch(session, semaphore: asyncio.Semaphore, wallet_addresses: List[str],
+                          chains: List[Dict]) -> List[Dict[str, Any]]:
+    """
+    Fetch balances and portfolio totals for one batch of stream_bulk_wallet_data
+
+    Raw balances of every (wallet, chain) are fetched first, then the token
+    metadata of each chain is resolved once for the union of held tokens.
+
+    Args:
+        session: aiohttp ClientSession
+        semaphore (asyncio.Semaphore): Budget of balance requests in flight for the whole run
+        wallet_addresses (List[str]): Valid wallet addresses of the batch
+        chains (List[Dict]): List of chain objects to query
+
+    Returns:
+        List[Dict]: One result per wallet, in batch order
+    """
+    async def raw_balances(wallet_address: str, chain_id: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await _fetch_1inch_raw_balances(session, wallet_address, chain_id)
+
+    portfolio_task = asyncio.create_task(
+        get_1inch_portfolio_multi(session, wallet_addresses, [chain["id"] for chain in chains])
+    )
+    try:
+        raw = await asyncio.gather(*(
+            raw_balances(wallet_address, chain["id"])
+            for wallet_address in wallet_addresses
+            for chain in chains
+        ))
+
+        # One metadata lookup per chain for all tokens held in the batch
+        async def chain_metadata(c: int, chain_id: int) -> Dict[str, Optional[Dict[str, Any]]]:
+            held = sorted({
+                token_address
+                for result in raw[c::len(chains)] if "held" in result
+                for token_address in result["held"]
+            })
+            if not held:
+                return {}
+            try:
+                return await get_1inch_token_metadata(session, chain_id, held)
+            except Exception as e:
+                print(f"Token metadata lookup failed on chain {chain_id}: {str(e)}")
+                return {token_address.lower(): None for token_address in held}
+
+        metadata = await asyncio.gather(*(chain_metadata(c, chain["id"]) for c, chain in enumerate(chains)))
+        portfolio = await portfolio_task
+    finally:
+        portfolio_task.cancel()
+
+    address_totals = get_portfolio_address_totals(portfolio.get("current_value"))
+    results = []
+    for w, wallet_address in enumerate(wallet_addresses):
+        balances = []
+        for c in range(len(chains)):
+            result = dict(raw[w * len(chains) + c])
+            if "held" in result:
+                result["tokens"] = build_token_balances(result.pop("held"), metadata[c])
+            balances.append(result)
+        results.append({
+            "wallet_address": wallet_address,
+            "balances": balances,
+            "portfolio": {
+                "total_usd": address_totals.get(wallet_address.lower()),
+                **({"error": portfolio["error"]} if "error" in portfolio else {})
+            }
+        })
+    return results
+
+async def stream_bulk_wallet_data(wallet_addresses: List[str], chains: List[Dict] = None,
+                                  batch_size: int = BULK_BATCH_SIZE,
+                                  max_concurrency: int = BULK_MAX_CONCURRENCY):
+    """
+    Get balances and portfolio value for many wallets, yielding each wallet when its batch is ready
+
+    Addresses are deduplicated and planned in batches of batch_size: one batched
+    portfolio request pair per batch, one balance request per (wallet, chain) and
+    one token metadata lookup per chain for all tokens held in the batch. At most
+    max_concurrency balance requests run at once and every request goes through
+    the shared 1inch rate limiter. The next batch is fetched while the current
+    one is consumed.
+
+    Args:
+        wallet_addresses (List[str]): Wallet addresses to get data for
+        chains (List[Dict]): List of chain objects to query (defaults to CHAINS)
+        batch_size (int): Addresses planned together
+        max_concurrency (int): Balance requests in flight for the whole run
+
+    Yields:
+        Dict: Result of one wallet with wallet_address, balances (one entry per chain)
+        and portfolio total_usd, or an error for invalid addresses
+    """
+    if chains is None:
+        chains = CHAINS
+
+    valid: List[str] = []
+    seen = set()
+    for wallet_address in wallet_addresses:
+        if wallet_address.lower() in seen:
+            continue
+        seen.add(wallet_address.lower())
+        if is_valid_address(wallet_address):
+            valid.append(wallet_address)
+        else:
+            yield {"wallet_address": wallet_address, "error": "Invalid wallet address"}
+
+    session = await get_http_session()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    batches = [valid[i:i + batch_size] for i in range(0, len(valid), batch_size)]
+    pending: List[asyncio.Task] = []
+    try:
+        for i in range(len(batches)):
+            # Keep the next batch in flight while this one is consumed
+            while len(pending) < 2 and i + len(pending) < len(batches):
+                pending.append(asyncio.create_task(
+                    _get_bulk_batch(session, semaphore, batches[i + len(pending)], chains)
+                ))
+            for result in await pending.pop(0):
+                yield result
+    finally:
+        for task in pending:
+            task.cancel()
+
+def format_wallet_balances_header_markdown(wallet_address: str, ens_name: Optional[str],
+                                           portfolio: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Format the wallet header of the balances view as Markdown
+
+    Args:
+        wallet_address (str): Wallet the balances belong to
+        ens_name (Optional[str]): ENS name of the wallet, if any
+        portfolio (Optional[Dict]): Portfolio data from get_1inch_portfolio_multi or get_1inch_portfolio, if available
+
+    Returns:
+        str: Formatted markdown
+    """
+    ens_display = f" ({ens_name})" if ens_name else ""
+
+    parts = [
+        "## Wallet Balances\n\n",
+        f"**Address**: {wallet_address[:6]}...{wallet_address[-4:]}{ens_display}\n\n"
+    ]
+
+    # Add portfolio info if available
+    if portfolio:
+        total_usd = portfolio.get("total_usd")
+        if total_usd is None:
+            total_usd = get_portfolio_total(portfolio.get("current_value"))
+        if total_usd is not None:
+            parts.append(f"**Total Value**: ${total_usd:.2f} USD\n\n")
+
+        by_chain = portfolio.get("by_chain")
+        if by_chain:
+            parts.append(" · ".join(
+                f"{chain_name(chain_id)}: ${value:.2f}"
+                for chain_id, value in sorted(by_chain.items(), key=lambda item: -item[1])
+            ) + "\n\n")
+
+    return "".join(parts)
+
+def format_wallet_balances_table_markdown(table: BalanceTable) -> str:
+    """
+    Format the balances of a BalanceTable as Markdown sections, one per chain
+
+    Args:
+        table (BalanceTable): Balances of one or more chains
+
+    Returns:
+        str: Formatted markdown, without sections for chains that have no tokens
+    """
+    # Sort tokens by chain, native token first, then by descending value
+    table = table.sort()
+    balances = table.format_amounts()
+    token_ids = table.token.tolist()
+    symbols, names = table.symbols, table.names
+
+    parts = []
+    for c, start, end in table.chain_slices():
+        chain_name = table.chains.names[c]
+
+        if start == end:
+            if c in table.chains.errors:
+                parts.append(f"### {chain_name}\nError: {table.chains.errors[c]}\n\n")
+            continue  # Skip chains with no tokens
+
+        # Add chain header
+        parts.append(f"### {chain_name}\n\n")
+
+        # List tokens
+        parts.extend([
+            f"- **{symbols[t]}**: {balance} ({names[t]})\n"
+            for t, balance in zip(token_ids[start:end], balances[start:end])
+        ])
+
+        parts.append("\n")
+
+    return "".join(parts)
+
+def format_wallet_balances_chain_markdown(chain_data: Dict[str, Any]) -> str:
+    """
+    Format the balances of a single chain as a Markdown section
+
+    Args:
+        chain_data (Dict): Balances result of one chain from get_1inch_token_balances
+
+    Returns:
+        str: Formatted markdown, empty if the chain has no tokens
+    """
+    return format_wallet_balances_table_markdown(BalanceTable.from_balances([chain_data]))
+
 def format_wallet_balances_markdown_multi_chain(wallet_data: Dict[str, Any]) -> str:
     """
     Format wallet balances for multiple chains as Markdown
@@ -490,80 +1686,111 @@ def format_wallet_balances_markdown_multi_chain(wallet_data: Dict[str, Any]) ->
         str: Formatted markdown
     """
     wallet_address = wallet_data.get("wallet_address", "Unknown")
-    ens_name = wallet_data.get("ens_name")
     balances_data = wallet_data.get("balances", [])
-    portfolio = wallet_data.get("portfolio", {})
-
-    ens_display = f" ({ens_name})" if ens_name else ""
 
     # Start with wallet header
-    markdown = f"## Wallet Balances\n\n"
-    markdown += f"**Address**: {wallet_address[:6]}...{wallet_address[-4:]}{ens_display}\n\n"
-
-    # Add portfolio info if available
-    if portfolio and "current_value" in portfolio and portfolio["current_value"] and "totalUsd" in portfolio["current_value"]:
-        total_usd = portfolio["current_value"]["totalUsd"]
-        markdown += f"**Total Value**: ${total_usd:.2f} USD\n\n"
+    parts = [format_wallet_balances_header_markdown(wallet_address, wallet_data.get("ens_name"), wallet_data.get("portfolio", {}))]
 
     # Check if we have any balance data
     if not balances_data:
-        return markdown + "No balance data available."
+        parts.append("No balance data available.")
+        return "".join(parts)
 
-    # Flag to track if we found any tokens
-    found_tokens = False
+    table = wallet_data.get("balances_table")
+    if table is None:
+        table = BalanceTable.from_balances(balances_data)
 
     # Process each chain
-    for chain_data in balances_data:
-        chain_id = chain_data.get("chain", "unknown")
-        chain_name = chain_data.get("chain_name", f"Chain {chain_id}")
-        tokens = chain_data.get("tokens", [])
-
-        if "error" in chain_data and not tokens:
-            markdown += f"### {chain_name}\n"
-            markdown += f"Error: {chain_data.get('error')}\n\n"
-            continue
+    parts.append(format_wallet_balances_table_markdown(table))
 
-        if not tokens:
-            continue  # Skip chains with no tokens
+    # If we didn't find any tokens on any chain
+    if not len(table):
+        parts.append(format_no_tokens_markdown(table.chains.names))
 
-        # Flag that we found tokens
-        found_tokens = True
+    return "".join(parts)
 
-        # Add chain header
-        markdown += f"### {chain_name}\n\n"
-
-        # Sort tokens by value (native token first, then by descending value)
-        sorted_tokens = sorted(
-            tokens,
-            key=lambda x: (
-                not x.get("native_token", False),  # Native tokens first
-                -float(x.get("balance_formatted", "0"))  # Then by descending value
-            )
-        )
+def format_no_tokens_markdown(chain_names: List[str]) -> str:
+    """Markdown shown when no chain returned any token"""
+    return (
+        "No tokens found across any blockchain. The wallet may be empty or the API may not have data for these chains yet.\n\n"
+        # List the chains we checked
+        "Chains checked: " + ", ".join(chain_names) + "\n\n"
+    )
 
-        # List tokens
-        for token in sorted_tokens:
-            symbol = token.get("symbol", "Unknown")
-            balance = float(token.get("balance_formatted", "0"))
-            token_name = token.get("name", "Unknown Token")
-
-            # Format with 6 decimal places for small values, 4 for larger ones
-            if balance < 0.0001 and balance > 0:
-                formatted_balance = f"{balance:.6f}"
-            else:
-                formatted_balance = f"{balance:.4f}"
+def format_no_transactions_markdown(chain_names: List[str]) -> str:
+    """Markdown shown when no chain returned any transaction"""
+    return (
+        "No transactions found across any blockchain. The wallet may be new or the API may not have data for these chains yet.\n\n"
+        # List the chains we checked
+        "Chains checked: " + ", ".join(chain_names) + "\n\n"
+    )
 
-            markdown += f"- **{symbol}**: {formatted_balance} ({token_name})\n"
+def format_transaction_history_header_markdown(wallet_address: str, ens_name: Optional[str]) -> str:
+    """
+    Format the wallet header of the transaction history view as Markdown
 
-        markdown += "\n"
+    Args:
+        wallet_address (str): Wallet the history belongs to
+        ens_name (Optional[str]): ENS name of the wallet, if any
 
-    # If we didn't find any tokens on any chain
-    if not found_tokens:
-        markdown += "No tokens found across any blockchain. The wallet may be empty or the API may not have data for these chains yet.\n\n"
-        # List the chains we checked
-        markdown += "Chains checked: " + ", ".join([chain_data.get("chain_name", f"Chain {chain_data.get('chain', 'unknown')}") for chain_data in balances_data]) + "\n\n"
+    Returns:
+        str: Formatted markdown
+    """
+    ens_display = f" ({ens_name})" if ens_name else ""
+
+    return f"## Recent Transactions\n\n**Address**: {wallet_address[:6]}...{wallet_address[-4:]}{ens_display}\n\n"
+
+def format_transaction_history_chain_markdown(chain_data: Dict[str, Any], wallet_address: str) -> str:
+    """
+    Format the transaction history of a single chain as a Markdown section
+
+    Args:
+        chain_data (Dict): History result of one chain from get_1inch_transaction_history
+        wallet_address (str): Wallet the history belongs to
+
+    Returns:
+        str: Formatted markdown, empty if the chain has no transactions
+    """
+    table = HistoryTable.from_history([chain_data], wallet_address, CHAIN_SYMBOLS)
+    return format_transaction_history_table_markdown(table)
+
+def format_transaction_history_table_markdown(table: HistoryTable) -> str:
+    """
+    Format the transactions of a HistoryTable as Markdown sections, one per chain
+
+    Args:
+        table (HistoryTable): Transactions grouped by chain
+
+    Returns:
+        str: Formatted markdown, without sections for chains that have no transactions
+    """
+    parts = []
+    for c, start, end in table.chain_slices():
+        chain_name = table.chains.names[c]
+
+        if start == end:
+            if c in table.chains.errors:
+                parts.append(f"### {chain_name}\nError: {table.chains.errors[c]}\n\n")
+            continue  # Skip chains with no transactions
+
+        # Add chain header
+        parts.append(f"### {chain_name}\n\n")
+
+        # List transactions
+        for i in range(start, end):
+            tx_type = "Sent" if table.sent[i] else "Received"
+            tx_partner = table.partner[i]
+            tx_hash = table.tx_hash[i]
+
+            # Format the transaction
+            parts.append(
+                f"- **{tx_type} {table.value[i]:.4f} {table.symbols[table.symbol[i]]}**\n"
+                f"  To/From: {tx_partner[:10]}...{tx_partner[-6:]}\n"
+                f"  Hash: {tx_hash[:10]}...{tx_hash[-6:]}\n"
+                f"  Time: {table.time_text[i]}\n\n"
+            )
 
-    return markdown
+    return "".join(parts)
 
 def format_transaction_history_markdown_multi_chain(wallet_data: Dict[str, Any]) -> str:
     """
@@ -576,122 +1803,209 @@ def format_transaction_history_markdown_multi_chain(wallet_data: Dict[str, Any])
         str: Formatted markdown
     """
     wallet_address = wallet_data.get("wallet_address", "Unknown")
-    ens_name = wallet_data.get("ens_name")
     history_data = wallet_data.get("history", [])
 
-    ens_display = f" ({ens_name})" if ens_name else ""
-
     # Start with wallet header
-    markdown = f"## Recent Transactions\n\n"
-    markdown += f"**Address**: {wallet_address[:6]}...{wallet_address[-4:]}{ens_display}\n\n"
+    parts = [format_transaction_history_header_markdown(wallet_address, wallet_data.get("ens_name"))]
 
     # Check if we have any history data
     if not history_data:
-        return markdown + "No transaction history available."
+        parts.append("No transaction history available.")
+        return "".join(parts)
 
-    # Flag to track if we found any transactions
-    found_transactions = False
+    table = wallet_data.get("history_table")
+    if table is None:
+        table = HistoryTable.from_history(history_data, wallet_address, CHAIN_SYMBOLS)
 
     # Process each chain
-    for chain_data in history_data:
-        chain_id = chain_data.get("chain", "unknown")
-        chain_name = chain_data.get("chain_name", f"Chain {chain_id}")
-        transactions = chain_data.get("result", [])
-
-        if "error" in chain_data and not transactions:
-            markdown += f"### {chain_name}\n"
-            markdown += f"Error: {chain_data.get('error')}\n\n"
-            continue
+    parts.append(format_transaction_history_table_markdown(table))
 
-        if not transactions:
-            continue  # Skip chains with no transactions
+    # If we didn't find any transactions on any chain
+    if not len(table):
+        parts.append(format_no_transactions_markdown(table.chains.names))
 
-        # Flag that we found transactions
-        found_transactions = True
+    return "".join(parts)
 
-        # Add chain header
-        markdown += f"### {chain_name}\n\n"
+def _task_result(task: asyncio.Task) -> Any:
+    """Result of a finished task, None while it runs or if it failed"""
+    if task.done() and not task.cancelled() and task.exception() is None:
+        return task.result()
+    return None
 
-        # Get chain symbol
-        chain_symbol = next((c["symbol"] for c in CHAINS if c["id"] == chain_id), "")
+async def stream_wallet_balances_markdown(wallet_address: str, chains: List[Dict] = None,
+                                         ens_task: Optional[asyncio.Task] = None):
+    """
+    Get wallet balances for all chains as Markdown that grows as chains arrive
 
-        # List transactions
-        for tx in transactions:
-            tx_hash = tx.get("hash", tx.get("txHash", "Unknown"))
-            block_timestamp = tx.get("timestamp", tx.get("timeStamp", "Unknown"))
+    Partial-results mode of format_wallet_balances_markdown_multi_chain: each chain
+    section is rendered as soon as that chain answers. The header is shown right
+    away and gains the ENS name and portfolio total once they are known.
 
-            # Format time if it's a string or number
-            if isinstance(block_timestamp, str):
-                # Convert from ISO string or Unix timestamp
-                try:
-                    if block_timestamp.isdigit():
-                        timestamp = int(block_timestamp)
-                        dt = datetime.fromtimestamp(timestamp)
-                    else:
-                        dt = datetime.fromisoformat(block_timestamp.replace('Z', '+00:00'))
-                    block_timestamp = dt.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    pass
-            elif isinstance(block_timestamp, (int, float)):
-                try:
-                    dt = datetime.fromtimestamp(block_timestamp)
-                    block_timestamp = dt.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    pass
-
-            # Process from/to addresses
-            from_address = tx.get("from", tx.get("fromAddress", "Unknown"))
-            to_address = tx.get("to", tx.get("toAddress", "Unknown"))
-
-            # Determine transaction type and partner
-            if from_address.lower() == wallet_address.lower():
-                tx_type = "Sent"
-                tx_partner = to_address
-            else:
-                tx_type = "Received"
-                tx_partner = from_address
+    Args:
+        wallet_address (str): Wallet address to get balances for
+        chains (List[Dict]): List of chain objects to query (defaults to CHAINS)
+        ens_task (Optional[asyncio.Task]): Running ENS lookup to share, started here if None
+
+    Yields:
+        str: Markdown with every chain received so far
+    """
+    if not is_valid_address(wallet_address):
+        yield "Invalid wallet address provided"
+        return
 
-            # Format partner address
-            partner_display = f"{tx_partner[:10]}...{tx_partner[-6:]}"
+    if chains is None:
+        chains = CHAINS
+    if ens_task is None:
+        ens_task = asyncio.create_task(get_ens_name_async(wallet_address))
 
-            # Get value if available
-            tx_value = 0
-            tx_symbol = chain_symbol
+    session = await get_http_session()
+    portfolio_task = asyncio.create_task(
+        get_1inch_portfolio_multi(session, [wallet_address], [chain["id"] for chain in chains])
+    )
 
-            # Try to get value from different formats
-            if "value" in tx:
-                if isinstance(tx["value"], str) and tx["value"].isdigit():
-                    tx_value = float(tx["value"]) / 10**18  # Assuming 18 decimals for native token
-                elif isinstance(tx["value"], (int, float)):
-                    tx_value = float(tx["value"]) / 10**18
+    def render(sections: List[str]) -> str:
+        header = format_wallet_balances_header_markdown(wallet_address, _task_result(ens_task), _task_result(portfolio_task))
+        return header + "".join(sections)
 
-            # Check for tokenSymbol in 1inch format
-            if "tokenSymbol" in tx:
-                tx_symbol = tx.get("tokenSymbol", chain_symbol)
+    sections: List[str] = []
+    found_tokens = False
+    yield render(sections)
 
-            # If there is a tokenValue, use that instead
-            if "tokenValue" in tx:
-                tx_value = float(tx.get("tokenValue", "0"))
+    try:
+        async for chain_data in iter_token_balances_all_chains(session, wallet_address, chains):
+            section = format_wallet_balances_chain_markdown(chain_data)
+            if chain_data.get("tokens"):
+                found_tokens = True
+            if section:
+                sections.append(section)
+                yield render(sections)
+
+        if not found_tokens:
+            sections.append(format_no_tokens_markdown([chain["name"] for chain in chains]))
+
+        # Final render with the ENS name and portfolio total
+        await asyncio.wait([ens_task, portfolio_task])
+        yield render(sections)
+    finally:
+        portfolio_task.cancel()
+
+async def stream_transaction_history_markdown(wallet_address: str, chains: List[Dict] = None,
+                                             ens_task: Optional[asyncio.Task] = None):
+    """
+    Get transaction history for all chains as Markdown that grows as chains arrive
 
-            # Format the transaction
-            markdown += f"- **{tx_type} {tx_value:.4f} {tx_symbol}**\n"
-            markdown += f"  To/From: {partner_display}\n"
-            markdown += f"  Hash: {tx_hash[:10]}...{tx_hash[-6:]}\n"
-            markdown += f"  Time: {block_timestamp}\n\n"
+    Partial-results mode of format_transaction_history_markdown_multi_chain: each
+    chain section is formatted as soon as that chain answers. The header is shown
+    right away and gains the ENS name once it is known.
+
+    Args:
+        wallet_address (str): Wallet address to get history for
+        chains (List[Dict]): List of chain objects to query (defaults to CHAINS)
+        ens_task (Optional[asyncio.Task]): Running ENS lookup to share, started here if None
+
+    Yields:
+        str: Markdown with every chain received so far
+    """
+    if not is_valid_address(wallet_address):
+        yield "Invalid wallet address provided"
+        return
+
+    if chains is None:
+        chains = CHAINS
+    if ens_task is None:
+        ens_task = asyncio.create_task(get_ens_name_async(wallet_address))
+
+    def render(sections: List[str]) -> str:
+        return format_transaction_history_header_markdown(wallet_address, _task_result(ens_task)) + "".join(sections)
+
+    sections: List[str] = []
+    found_transactions = False
+    yield render(sections)
+
+    session = await get_http_session()
+    async for chain_data in iter_transaction_history_all_chains(session, wallet_address, chains):
+        section = format_transaction_history_chain_markdown(chain_data, wallet_address)
+        if chain_data.get("result"):
+            found_transactions = True
+        if section:
+            sections.append(section)
+            yield render(sections)
 
-    # If we didn't find any transactions on any chain
     if not found_transactions:
-        markdown += "No transactions found across any blockchain. The wallet may be new or the API may not have data for these chains yet.\n\n"
-        # List the chains we checked
-        markdown += "Chains checked: " + ", ".join([chain_data.get("chain_name", f"Chain {chain_data.get('chain', 'unknown')}") for chain_data in history_data]) + "\n\n"
+        sections.append(format_no_transactions_markdown([chain["name"] for chain in chains]))
+
+    # Final render with the ENS name
+    await asyncio.wait([ens_task])
+    yield render(sections)
+
+async def stream_wallet_markdown(wallet_address: str, chains: List[Dict] = None):
+    """
+    Stream the balances and transaction history views together, section by section
+
+    Both views are fetched concurrently and share one ENS lookup; every time
+    either view gains a chain section the pair is yielded again.
+
+    Args:
+        wallet_address (str): Wallet address to get data for
+        chains (List[Dict]): List of chain objects to query (defaults to CHAINS)
+
+    Yields:
+        Tuple[str, str]: Balances markdown and history markdown received so far
+    """
+    if not is_valid_address(wallet_address):
+        yield "Invalid wallet address provided", "Invalid wallet address provided"
+        return
+
+    # Served from the refresh scheduler when the wallet is warm
+    key = wallet_address.lower()
+    if chains is None and all(wallet_scheduler.peek(key, kind)[0] is not MISSING for kind in wallet_scheduler.fetchers):
+        wallet_data = await get_wallet_data_cached(wallet_address)
+        yield format_wallet_balances_markdown_multi_chain(wallet_data), format_transaction_history_markdown_multi_chain(wallet_data)
+        return
+
+    # Cold wallet: stream it live and keep it warm from now on. The scheduler's
+    # first refresh shares the in-flight requests of this stream.
+    if chains is None:
+        wallet_scheduler.watch(key)
+
+    ens_task = asyncio.create_task(get_ens_name_async(wallet_address))
+    latest = ["", ""]
+    updates: asyncio.Queue = asyncio.Queue()
 
-    return markdown
+    async def pump(i: int, stream):
+        try:
+            async for markdown in stream:
+                await updates.put((i, markdown))
+        except Exception as e:
+            await updates.put((i, f"Error fetching wallet data: {str(e)}"))
+        finally:
+            await updates.put((i, None))
+
+    pumps = [
+        asyncio.create_task(pump(0, stream_wallet_balances_markdown(wallet_address, chains, ens_task))),
+        asyncio.create_task(pump(1, stream_transaction_history_markdown(wallet_address, chains, ens_task))),
+    ]
+    try:
+        running = len(pumps)
+        while running:
+            i, markdown = await updates.get()
+            if markdown is None:
+                running -= 1
+                continue
+            latest[i] = markdown
+            yield latest[0], latest[1]
+    finally:
+        for task in pumps:
+            task.cancel()
 
 # Main function to fetch all wallet data
 async def get_all_wallet_data(wallet_address: str) -> Dict[str, str]:
     """
     Get all wallet data and format as Markdown
 
+    Data comes from the refresh scheduler: watched wallets are answered from the
+    cache and refreshed in the background.
+
     Args:
         wallet_address (str): Wallet address to get data for
 
@@ -706,7 +2020,7 @@ async def get_all_wallet_data(wallet_address: str) -> Dict[str, str]:
 
     try:
         # Get data for all chains
-        wallet_data = await get_wallet_data_all_chains(wallet_address)
+        wallet_data = await get_wallet_data_cached(wallet_address)
 
         # Format results
         balances_markdown = format_wallet_balances_markdown_multi_chain(wallet_data)
@@ -731,7 +2045,17 @@ if __name__ == "__main__":
 
     # Run async function
     import asyncio
-    results = asyncio.run(get_all_wallet_data(test_address))
+
+    async def main():
+        try:
+            return await get_all_wallet_data(test_address)
+        finally:
+            print(f"HTTP client: {get_http_stats()}")
+            print(f"Refresh scheduler: {wallet_scheduler.get_stats()}")
+            await wallet_scheduler.stop()
+            await close_http_session()
+
+    results = asyncio.run(main())
 
     # Print results
     print(results["balances"])
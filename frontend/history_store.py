@@ -0,0 +1,162 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+# SQLite file holding synced transaction history between runs
+HISTORY_STORE_PATH = os.getenv("HISTORY_STORE_PATH", "history.sqlite3")
+
+
+def get_event_id(event: Dict[str, Any]) -> str:
+    """
+    Get a stable identifier for a 1inch history event
+
+    Args:
+        event (Dict): Event from the 1inch History API v2
+
+    Returns:
+        str: Event id, or tx hash and position when the API gives no id
+    """
+    if event.get("id") is not None:
+        return str(event["id"])
+    details = event.get("details", {})
+    return f"{details.get('txHash', '')}:{event.get('eventOrderInChain', '')}:{event.get('timeMs', '')}"
+
+
+class HistoryStore:
+    """
+    Local copy of wallet transaction history with a sync cursor per (address, chain)
+
+    The cursor records the newest and oldest event time already stored and
+    whether the backfill reached the start of the history, so only newer events
+    have to be fetched on refresh and older pages are downloaded once.
+    """
+
+    def __init__(self, path: str = HISTORY_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                address TEXT NOT NULL,
+                chain_id INTEGER NOT NULL,
+                event_id TEXT NOT NULL,
+                time_ms INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (address, chain_id, event_id)
+            );
+            CREATE INDEX IF NOT EXISTS events_by_time ON events (address, chain_id, time_ms DESC);
+            CREATE TABLE IF NOT EXISTS cursors (
+                address TEXT NOT NULL,
+                chain_id INTEGER NOT NULL,
+                newest_time_ms INTEGER,
+                oldest_time_ms INTEGER,
+                backfill_done INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (address, chain_id)
+            );
+            """
+        )
+        self._db.commit()
+
+    def get_cursor(self, address: str, chain_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the sync cursor of a wallet on one chain
+
+        Args:
+            address (str): Wallet address
+            chain_id (int): Chain ID
+
+        Returns:
+            Optional[Dict]: newest_time_ms, oldest_time_ms and backfill_done, None if never synced
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT newest_time_ms, oldest_time_ms, backfill_done FROM cursors WHERE address = ? AND chain_id = ?",
+                (address.lower(), chain_id)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "newest_time_ms": row[0],
+            "oldest_time_ms": row[1],
+            "backfill_done": bool(row[2]),
+        }
+
+    def update_cursor(self, address: str, chain_id: int, newest_time_ms: Optional[int] = None,
+                      oldest_time_ms: Optional[int] = None, backfill_done: Optional[bool] = None):
+        """
+        Update the sync cursor of a wallet on one chain, leaving fields passed as None unchanged
+
+        Args:
+            address (str): Wallet address
+            chain_id (int): Chain ID
+            newest_time_ms (Optional[int]): Time of the newest stored event
+            oldest_time_ms (Optional[int]): Time of the oldest stored event
+            backfill_done (Optional[bool]): True once the start of the history is stored
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO cursors (address, chain_id, newest_time_ms, oldest_time_ms, backfill_done) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (address, chain_id) DO UPDATE SET "
+                "newest_time_ms = COALESCE(excluded.newest_time_ms, newest_time_ms), "
+                "oldest_time_ms = COALESCE(excluded.oldest_time_ms, oldest_time_ms), "
+                "backfill_done = CASE WHEN ? IS NULL THEN backfill_done ELSE excluded.backfill_done END",
+                (address.lower(), chain_id, newest_time_ms, oldest_time_ms, int(bool(backfill_done)),
+                 None if backfill_done is None else int(backfill_done))
+            )
+            self._db.commit()
+
+    def add_events(self, address: str, chain_id: int, events: List[Dict[str, Any]]) -> int:
+        """
+        Store history events, ignoring ones already stored
+
+        Args:
+            address (str): Wallet address
+            chain_id (int): Chain ID
+            events (List[Dict]): Events from the 1inch History API v2
+
+        Returns:
+            int: Number of new events stored
+        """
+        rows = [
+            (address.lower(), chain_id, get_event_id(event), int(event.get("timeMs", 0)), json.dumps(event))
+            for event in events
+        ]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO events (address, chain_id, event_id, time_ms, data) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._db.commit()
+            return self._db.total_changes - before
+
+    def get_events(self, address: str, chain_id: int, offset: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get stored events, newest first
+
+        Args:
+            address (str): Wallet address
+            chain_id (int): Chain ID
+            offset (int): Number of newest events to skip
+            limit (int): Maximum number of events to return
+
+        Returns:
+            List[Dict]: Stored events
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM events WHERE address = ? AND chain_id = ? ORDER BY time_ms DESC LIMIT ? OFFSET ?",
+                (address.lower(), chain_id, limit, offset)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count_events(self, address: str, chain_id: int) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM events WHERE address = ? AND chain_id = ?",
+                (address.lower(), chain_id)
+            ).fetchone()[0]
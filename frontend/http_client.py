@@ -0,0 +1,96 @@
+import os
+import asyncio
+import aiohttp
+from typing import Any, Dict, Optional
+
+# Connection pool tuning for the shared HTTP client
+HTTP_CONNECTION_LIMIT = int(os.getenv("HTTP_CONNECTION_LIMIT", "100"))
+HTTP_CONNECTION_LIMIT_PER_HOST = int(os.getenv("HTTP_CONNECTION_LIMIT_PER_HOST", "20"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+_stats: Dict[str, int] = {
+    "requests": 0,
+    "connections_created": 0,
+    "connections_reused": 0,
+    "dns_cache_hits": 0,
+    "dns_cache_misses": 0,
+}
+
+
+def _count(name: str):
+    async def handler(session, trace_config_ctx, params):
+        _stats[name] += 1
+    return handler
+
+
+def _create_trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_count("requests"))
+    trace_config.on_connection_create_end.append(_count("connections_created"))
+    trace_config.on_connection_reuseconn.append(_count("connections_reused"))
+    trace_config.on_dns_cache_hit.append(_count("dns_cache_hits"))
+    trace_config.on_dns_cache_miss.append(_count("dns_cache_misses"))
+    return trace_config
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """
+    Get the process-wide aiohttp session, creating it on first use
+
+    The session keeps connections alive between wallet refreshes, caches DNS
+    lookups and decompresses responses. A new session is created if the old one
+    was closed or belongs to another event loop (e.g. a second asyncio.run).
+
+    Returns:
+        aiohttp.ClientSession: Shared session
+    """
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_CONNECTION_LIMIT,
+            limit_per_host=HTTP_CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            use_dns_cache=True,
+            enable_cleanup_closed=True,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TOTAL_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            auto_decompress=True,
+            headers={"Accept-Encoding": "gzip, deflate"},
+            trace_configs=[_create_trace_config()],
+        )
+        _session_loop = loop
+    return _session
+
+
+async def close_http_session():
+    """Close the shared session and its pooled connections"""
+    global _session, _session_loop
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
+
+def get_http_stats() -> Dict[str, Any]:
+    """
+    Get connection reuse statistics of the shared session
+
+    Returns:
+        Dict: Request, connection and DNS cache counters and the connection reuse rate
+    """
+    connections = _stats["connections_created"] + _stats["connections_reused"]
+    return {
+        **_stats,
+        "connection_reuse_rate": _stats["connections_reused"] / connections if connections else 0.0,
+    }
@@ -4,15 +4,19 @@ import requests
 import json
 import anthropic
 import asyncio
+import time
 from eth_account import Account
 from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters, types
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters
+from mcp_pool import MCPPoolTimeout, MCPSessionPool
+from tool_executor import ToolExecutor
+from tool_results import READ_TOOL_RESULT_TOOL
+from get_data import stream_wallet_markdown
 
 # Load environment variables from .env file
 load_dotenv()
 
-client = anthropic.Anthropic(
+client = anthropic.AsyncAnthropic(
     api_key=os.getenv("ANTHROPIC_API_KEY"),
 )
 
@@ -25,61 +29,63 @@ server_params = StdioServerParameters(
     env=None,  # Optional environment variables
 )
 
+# Warm MCP servers shared by every chat session
+mcp_pool = MCPSessionPool(server_params)
+tool_executor = ToolExecutor(on_transport_error=mcp_pool.discard)
+
 async def getLLMResponse(SYSTEM_PROMPT, messages):
-    async with stdio_client(server_params) as (read, write):
-        # Call Claude API
-        async with ClientSession(
-            read, write
-        ) as session:
-            reqContinue = False
-            await session.initialize()
-            tools = await session.list_tools()
-            available_tools = [{
-                "name": tool.name,
-                "description": tool.description,
-                "input_schema": tool.inputSchema
-            } for tool in tools.tools]
-
-            response = client.messages.create(
-                system=SYSTEM_PROMPT,
-                model=MODEL,
-                max_tokens=1024,
-                messages=messages,
-                tools=available_tools
-            )
-            final_text = []
-            assistant_message_content = []
-            for content in response.content:
-                if content.type == 'text':
-                    final_text.append(content.text)
-                    assistant_message_content.append(content)
-
-                elif content.type == 'tool_use':
-                    reqContinue = True
-                    tool_name = content.name
-                    tool_args = content.input
-
-                    # Execute tool call
-                    result = await session.call_tool(tool_name, tool_args)
-                    final_text.append(f"[Calling tool {tool_name}]\n")
-                    print(result.content)
-                    assistant_message_content.append(content)
-                    messages.append({
-                        "role": "assistant",
-                        "content": assistant_message_content
-                    })
-                    messages.append({
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "tool_result",
-                                "tool_use_id": content.id,
-                                "content": result.content
-                            }
-                        ]
-                    })
-                    
-            return "\n".join(final_text), reqContinue, messages
+    """
+    Stream one LLM turn, yielding text deltas and tool call notices as they arrive
+
+    The assistant message is appended to messages, followed by a user message with
+    the tool results when the model asked for tools.
+    """
+    turn_start = time.monotonic()
+    # readToolResult is answered by the tool executor, not the MCP server
+    available_tools = [*await mcp_pool.get_tools(), READ_TOOL_RESULT_TOOL]
+
+    # Call Claude API
+    async with client.messages.stream(
+        system=SYSTEM_PROMPT,
+        model=MODEL,
+        max_tokens=1024,
+        messages=messages,
+        tools=available_tools
+    ) as stream:
+        async for event in stream:
+            if event.type == "text":
+                yield event.text
+            elif event.type == "content_block_start" and event.content_block.type == "tool_use":
+                yield f"\n[Calling tool {event.content_block.name}]\n"
+        response = await stream.get_final_message()
+
+    messages.append({
+        "role": "assistant",
+        "content": response.content
+    })
+
+    tool_uses = [content for content in response.content if content.type == "tool_use"]
+    if tool_uses:
+        # Only hold an MCP server while the tools run, not while the model streams
+        try:
+            async with mcp_pool.acquire() as session:
+                # Execute all tool calls of this response concurrently
+                tool_results = await tool_executor.run(session, tool_uses)
+        except MCPPoolTimeout as e:
+            # Answer every tool_use so the conversation stays valid
+            yield f"\n[{str(e)}]\n"
+            tool_results = [{
+                "type": "tool_result",
+                "tool_use_id": tool_use.id,
+                "content": str(e),
+                "is_error": True
+            } for tool_use in tool_uses]
+        messages.append({
+            "role": "user",
+            "content": tool_results
+        })
+
+    print(f"LLM turn took {time.monotonic() - turn_start:.2f}s (MCP pool: {mcp_pool.get_stats()}, tools: {tool_executor.get_stats()})")
 
 # Chat function for Gradio
 async def chat_bot(message, history, private_key, public_key):
@@ -96,6 +102,9 @@ async def chat_bot(message, history, private_key, public_key):
     SYSTEM_PROMPT = """
     You are a crypto wallet assistant that can help user to check their portfolios, swap tokens.
     When doing cross-chain swaps, dont check for user's balance, just assume they have enough balance.
+    To find the best amount or destination chain for a swap, call compareSwapQuotes once instead of getSwapQuote repeatedly.
+    To compare gas prices across chains, call getAllGasPrices once instead of getGasPrice per chain.
+    crossChainSwap returns an order hash; call getOrderProgress with it and waitMs=20000 to report each change to the user until the order is done.
     """
     if public_key:
         # Add public key to the system prompt
@@ -107,10 +116,12 @@ async def chat_bot(message, history, private_key, public_key):
     fullResponse = ""
     reqContinue = True
     while reqContinue:
-        response, reqContinue, messages = await getLLMResponse(SYSTEM_PROMPT, messages)
+        async for chunk in getLLMResponse(SYSTEM_PROMPT, messages):
+            fullResponse += chunk
+            yield fullResponse
 
-        fullResponse += response
-        yield fullResponse
+        # Tool results are the last message when the model needs another turn
+        reqContinue = messages[-1]["role"] == "user"
 
 
 def save_settings(private_key):
@@ -120,7 +131,16 @@ def save_settings(private_key):
         return private_key, public_key
     except Exception as e:
         return private_key, f"Error: {str(e)}"
-    
+
+async def load_wallet(wallet_address, public_key):
+    """Stream the balances and history views, updating them chain by chain"""
+    wallet_address = (wallet_address or public_key or "").strip()
+    if not wallet_address:
+        yield "Enter a wallet address or save your private key in Settings.", ""
+        return
+    async for balances_markdown, history_markdown in stream_wallet_markdown(wallet_address):
+        yield balances_markdown, history_markdown
+
 # Create the Gradio interface
 with gr.Blocks(title="WalletPilot") as app:
     privateKeyState = gr.State("")
@@ -150,6 +170,25 @@ with gr.Blocks(title="WalletPilot") as app:
             )
             
             
+        with gr.Tab("👛 Wallet"):
+            gr.Markdown("## Wallet")
+
+            wallet_address = gr.Textbox(
+                label="Wallet Address",
+                placeholder="Leave empty to use your public key"
+            )
+            load_btn = gr.Button("Load Wallet")
+
+            with gr.Row():
+                balances_output = gr.Markdown()
+                history_output = gr.Markdown()
+
+            load_btn.click(
+                fn=load_wallet,
+                inputs=[wallet_address, public_key],
+                outputs=[balances_output, history_output]
+            )
+
         with gr.Tab("💬 Chat"):
             with gr.Row():
                 gr.Markdown("## Chat")
@@ -0,0 +1,392 @@
+import os
+import time
+import anyio
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Any
+from mcp import ClientSession, StdioServerParameters, types
+from mcp.client.stdio import stdio_client
+
+# Number of warm MCP server processes kept alive for all Gradio users
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+
+# Seconds between health checks of idle servers
+MCP_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+
+# Seconds to wait for a ping answer before a server is considered dead
+MCP_PING_TIMEOUT = float(os.getenv("MCP_PING_TIMEOUT", "5"))
+
+# Seconds acquire() waits for a live server before giving up
+MCP_ACQUIRE_TIMEOUT = float(os.getenv("MCP_ACQUIRE_TIMEOUT", "30"))
+
+# Errors of a session whose server process or stdio streams are gone
+MCP_TRANSPORT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+
+
+class MCPPoolTimeout(TimeoutError):
+    """No MCP server became available within MCP_ACQUIRE_TIMEOUT"""
+
+
+class _WatchedReadStream:
+    """
+    Read stream of a server session that reports the end of the server's stdout
+
+    ClientSession stops reading quietly when the server process exits; this
+    wrapper calls on_close at that point so the server is restarted right away
+    instead of at the next health check.
+    """
+
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aenter__(self):
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._stream.__aexit__(*exc_info)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.receive()
+        except (anyio.EndOfStream, anyio.ClosedResourceError):
+            raise StopAsyncIteration
+
+    async def receive(self):
+        try:
+            return await self._stream.receive()
+        except (anyio.EndOfStream, anyio.ClosedResourceError):
+            self._on_close()
+            raise
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def get_server_binary_hash(server_params: StdioServerParameters) -> str:
+    """
+    Hash the MCP server entry point so a rebuilt server gets a new tool catalog
+
+    Args:
+        server_params (StdioServerParameters): Parameters used to spawn the server
+
+    Returns:
+        str: SHA-256 of the server script, or of the command line if no script file exists
+    """
+    digest = hashlib.sha256()
+    digest.update(server_params.command.encode())
+    for arg in server_params.args:
+        digest.update(arg.encode())
+        path = os.path.join(server_params.cwd or "", arg)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ToolCatalog:
+    """
+    Tool schemas of the MCP server in the format expected by the Claude API
+
+    The catalog is keyed by server binary hash and reported server version. It is
+    filled once, refreshed when a (re)started server reports a different key and
+    invalidated by a `notifications/tools/list_changed` from any server.
+    """
+
+    def __init__(self):
+        self.key: Optional[str] = None
+        self.tools: Optional[List[Dict[str, Any]]] = None
+        self.refreshes = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self.tools = None
+
+    async def ensure(self, session: ClientSession, key: str) -> List[Dict[str, Any]]:
+        """
+        Return the cached tool list, fetching it from the server only when stale
+
+        Args:
+            session (ClientSession): Initialized session to fetch the tools with
+            key (str): Binary/version key of the server behind the session
+
+        Returns:
+            List[Dict]: Tools ready to pass to `client.messages.create`
+        """
+        if self.tools is not None and self.key == key:
+            return self.tools
+        async with self._lock:
+            if self.tools is None or self.key != key:
+                tools = await session.list_tools()
+                self.tools = [{
+                    "name": tool.name,
+                    "description": tool.description,
+                    "input_schema": tool.inputSchema
+                } for tool in tools.tools]
+                self.key = key
+                self.refreshes += 1
+                print(f"Loaded {len(self.tools)} MCP tools (catalog key {key[:12]})")
+            return self.tools
+
+
+class PooledServer:
+    """
+    One long-lived MCP server process and its initialized ClientSession
+
+    The stdio transport and the session are entered and exited inside a single
+    background task (anyio requires this), which restarts the server as soon as
+    its stdout ends (the process exited) or it fails a health check.
+    """
+
+    def __init__(self, pool: "MCPSessionPool", index: int):
+        self.pool = pool
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.catalog_key: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+        self.queued = False
+        self._restart = asyncio.Event()
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.session is not None and not self._restart.is_set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def restart(self):
+        """Ask the background task to tear down and respawn the server"""
+        self._restart.set()
+
+    def _stream_closed(self):
+        if not self._closing and not self._restart.is_set():
+            print(f"MCP server #{self.index} exited")
+            self.last_error = "server process exited"
+            self.restart()
+
+    async def close(self):
+        self._closing = True
+        self._restart.set()
+        if self._task:
+            await self._task
+
+    async def ping(self) -> bool:
+        """
+        Check that the server still answers requests
+
+        Returns:
+            bool: True if the server answered within MCP_PING_TIMEOUT
+        """
+        session = self.session
+        if session is None:
+            return False
+        try:
+            await asyncio.wait_for(session.send_ping(), MCP_PING_TIMEOUT)
+            return True
+        except Exception as e:
+            print(f"MCP server #{self.index} failed health check: {str(e)}")
+            return False
+
+    async def _on_message(self, message):
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            print(f"MCP server #{self.index} reported a tool list change")
+            self.pool.catalog.invalidate()
+
+    async def _run(self):
+        backoff = 0.5
+        while not self._closing:
+            self._restart.clear()
+            try:
+                async with stdio_client(self.pool.server_params) as (read, write):
+                    async with ClientSession(
+                        _WatchedReadStream(read, self._stream_closed), write, message_handler=self._on_message
+                    ) as session:
+                        init_result = await session.initialize()
+                        server_info = init_result.serverInfo
+                        binary_hash = get_server_binary_hash(self.pool.server_params)
+                        self.catalog_key = f"{binary_hash}:{server_info.name}:{server_info.version}"
+                        await self.pool.catalog.ensure(session, self.catalog_key)
+                        self.session = session
+                        self.started_at = time.monotonic()
+                        self.last_error = None
+                        backoff = 0.5
+                        self.pool._server_ready(self)
+                        await self._restart.wait()
+            except Exception as e:
+                print(f"MCP server #{self.index} stopped: {str(e)}")
+                self.last_error = str(e) or type(e).__name__
+            finally:
+                self.session = None
+
+            if self._closing:
+                break
+
+            self.restarts += 1
+            self.pool.stats["restarts"] += 1
+            print(f"Restarting MCP server #{self.index} (restart {self.restarts})")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 10)
+
+
+class MCPSessionPool:
+    """
+    Pool of warm MCP server processes shared by every chat session
+
+    Servers are spawned lazily on first use inside the running event loop,
+    health-checked in the background and restarted when they crash. Callers
+    borrow a session for one LLM turn with `async with pool.acquire()`, which
+    raises MCPPoolTimeout if no server is up within MCP_ACQUIRE_TIMEOUT seconds.
+    """
+
+    def __init__(self, server_params: StdioServerParameters, size: int = MCP_POOL_SIZE):
+        self.server_params = server_params
+        self.size = max(1, size)
+        self.servers: List[PooledServer] = []
+        self.catalog = ToolCatalog()
+        self.stats: Dict[str, Any] = {
+            "borrows": 0,
+            "restarts": 0,
+            "wait_time_total": 0.0,
+        }
+        self._idle: Optional[asyncio.Queue] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Spawn the server processes and the health-check task if not running yet"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.servers:
+                return
+            self._idle = asyncio.Queue()
+            self.servers = [PooledServer(self, i) for i in range(self.size)]
+            for server in self.servers:
+                server.start()
+            self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def close(self):
+        """Stop all server processes"""
+        if self._monitor_task:
+            self._monitor_task.cancel()
+        await asyncio.gather(*(server.close() for server in self.servers), return_exceptions=True)
+        self.servers = []
+
+    def _server_ready(self, server: PooledServer):
+        # A server re-queues itself after (re)starting unless a stale entry is still queued
+        if not server.queued:
+            server.queued = True
+            self._idle.put_nowait(server)
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(MCP_HEALTH_CHECK_INTERVAL)
+            for server in self.servers:
+                if server.session is not None and not await server.ping():
+                    server.restart()
+
+    def discard(self, session: ClientSession):
+        """Restart the server behind a session whose call failed with a transport error"""
+        for server in self.servers:
+            if server.session is session:
+                print(f"MCP server #{server.index} lost its connection, restarting")
+                server.restart()
+
+    @asynccontextmanager
+    async def acquire(self, timeout: float = MCP_ACQUIRE_TIMEOUT):
+        """
+        Borrow an initialized ClientSession for the duration of the block
+
+        If the block raises, the server is health-checked (or, after a transport
+        error, restarted straight away) before it goes back to the pool. A
+        session that was discarded or whose server is restarting is not
+        re-queued; the server queues itself again once it is back up.
+
+        Args:
+            timeout (float): Seconds to wait for a live server
+
+        Yields:
+            ClientSession: Initialized MCP client session
+
+        Raises:
+            MCPPoolTimeout: No server became available in time
+        """
+        await self.start()
+
+        wait_start = time.monotonic()
+        while True:
+            remaining = wait_start + timeout - time.monotonic()
+            try:
+                server = await asyncio.wait_for(self._idle.get(), max(0.0, remaining))
+            except asyncio.TimeoutError:
+                errors = sorted({s.last_error for s in self.servers if s.last_error})
+                raise MCPPoolTimeout(
+                    f"No MCP server available after {timeout:.0f}s "
+                    f"({sum(1 for s in self.servers if s.healthy)}/{self.size} live"
+                    f"{'; last error: ' + '; '.join(errors) if errors else ''})"
+                ) from None
+            server.queued = False
+            if server.healthy:
+                break
+            # Dead entry; the server re-queues itself once it is back up
+
+        self.stats["borrows"] += 1
+        self.stats["wait_time_total"] += time.monotonic() - wait_start
+
+        session = server.session
+        broken = False
+        try:
+            yield session
+        except MCP_TRANSPORT_ERRORS:
+            broken = True
+            raise
+        except BaseException:
+            broken = not await server.ping()
+            raise
+        finally:
+            if broken:
+                server.restart()
+            elif server.healthy and server.session is session:
+                self._server_ready(server)
+
+    async def get_tools(self) -> List[Dict[str, Any]]:
+        """
+        Get the cached tool catalog, borrowing a server only when it is stale
+
+        Returns:
+            List[Dict]: Tools ready to pass to `client.messages.create`
+        """
+        if self.catalog.tools is not None:
+            return self.catalog.tools
+        async with self.acquire() as session:
+            server = next((s for s in self.servers if s.session is session), None)
+            key = server.catalog_key if server and server.catalog_key else self.catalog.key
+            return await self.catalog.ensure(session, key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage statistics
+
+        Returns:
+            Dict: Borrow count, restart count, average wait and live server count
+        """
+        borrows = self.stats["borrows"]
+        return {
+            "size": self.size,
+            "live_servers": sum(1 for s in self.servers if s.healthy),
+            "borrows": borrows,
+            "restarts": self.stats["restarts"],
+            "avg_wait_ms": (self.stats["wait_time_total"] / borrows * 1000) if borrows else 0.0,
+            "catalog_refreshes": self.catalog.refreshes,
+        }
@@ -0,0 +1,586 @@
+"""
+Local stand-in for the 1inch, Nodit and Alchemy APIs for offline testing and benchmarks
+
+Answers the balance, token, history, portfolio, gas, swap-quote and JSON-RPC
+requests made by get_data.py and mcp/src/index.ts with deterministic data
+derived from the request (same wallet and chain, same answer). Responses can be
+delayed, rate limited with 429 + Retry-After and scaled up to large payloads.
+
+Point the clients at it with:
+    ONEINCH_API_URL=http://127.0.0.1:8900           (get_data.py and the MCP server)
+    NODIT_API_URL=http://127.0.0.1:8900/nodit       (MCP server)
+    ALCHEMY_RPC_URL=http://127.0.0.1:8900/alchemy   (MCP server)
+
+Usage:
+    python mock_server.py [--port 8900] [--latency-ms 50] [--jitter-ms 0]
+                          [--rate-429 0.0] [--retry-after 1] [--payload-scale 1]
+"""
+import sys
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+NATIVE_TOKEN = "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"
+
+# Tokens known per chain and held per wallet and chain, multiplied by payload_scale
+TOKENS_PER_CHAIN = 300
+MAX_HELD_TOKENS = 15
+
+# History events per wallet and chain, multiplied by payload_scale
+HISTORY_EVENTS = 120
+HISTORY_NEWEST_MS = 1_735_689_600_000
+HISTORY_SPACING_MS = 3_600_000
+
+GAS_PROTOCOLS = ["ethereum", "arbitrum", "optimism", "base"]
+
+_COUNTS = web.AppKey("counts", Counter)
+_SETTINGS = web.AppKey("settings", dict)
+
+
+def token_address(chain_id: int, i: int) -> str:
+    """Address of the i-th mock token of a chain"""
+    return f"0x{chain_id:08x}{i:032x}"
+
+
+def token_info(chain_id: int, address: str) -> Dict[str, Any]:
+    """Token metadata as returned by the 1inch Token API"""
+    address = address.lower()
+    if address == NATIVE_TOKEN:
+        return {"chainId": chain_id, "address": address, "symbol": "ETH", "name": "Ether", "decimals": 18}
+    return {
+        "chainId": chain_id,
+        "address": address,
+        "symbol": f"T{address[-4:]}",
+        "name": f"Token {address[-4:]}",
+        "decimals": 18 if int(address[-1], 16) % 2 else 6,
+    }
+
+
+def token_price_usd(address: str) -> float:
+    return random.Random(f"price:{address.lower()}").uniform(0.01, 100)
+
+
+def tx_hash(*parts: Any) -> str:
+    return "0x" + hashlib.sha256(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def held_balances(wallet_address: str, chain_id: int, scale: int) -> Dict[str, str]:
+    """Raw balances of a wallet on a chain, by token address"""
+    rng = random.Random(f"{wallet_address.lower()}:{chain_id}")
+    held = {NATIVE_TOKEN: str(rng.randint(0, 10 ** 20))}
+    for i in rng.sample(range(TOKENS_PER_CHAIN * scale), rng.randint(0, MAX_HELD_TOKENS * scale)):
+        held[token_address(chain_id, i)] = str(rng.randint(0, 10 ** 24))
+    return held
+
+
+def history_event(wallet_address: str, chain_id: int, i: int) -> Dict[str, Any]:
+    """i-th newest History API v2 event of a wallet; pairs of events share a timestamp"""
+    wallet_address = wallet_address.lower()
+    rng = random.Random(f"event:{wallet_address}:{chain_id}:{i}")
+    counterparty = f"0x{rng.getrandbits(160):040x}"
+    sent = rng.random() < 0.5
+    return {
+        "id": f"{chain_id}-{wallet_address}-{i}",
+        "timeMs": HISTORY_NEWEST_MS - (i // 2) * HISTORY_SPACING_MS,
+        "eventOrderInChain": i % 2,
+        "details": {
+            "txHash": tx_hash(wallet_address, chain_id, i),
+            "chainId": chain_id,
+            "blockNumber": 20_000_000 - i,
+            "type": "Send" if sent else "Receive",
+            "status": "completed",
+            "fromAddress": wallet_address if sent else counterparty,
+            "toAddress": counterparty if sent else wallet_address,
+            "tokenActions": [{
+                "chainId": str(chain_id),
+                "address": NATIVE_TOKEN,
+                "standard": "Native",
+                "fromAddress": wallet_address if sent else counterparty,
+                "toAddress": counterparty if sent else wallet_address,
+                "amount": str(rng.randint(1, 10 ** 19)),
+                "direction": "Out" if sent else "In",
+            }],
+        },
+    }
+
+
+def usd_value(address: str, amount: str) -> float:
+    """USD value of a raw token amount at the mock price"""
+    return int(amount) / 10 ** token_info(1, address)["decimals"] * token_price_usd(address)
+
+
+# Swap cost in the mock quotes: a fixed gas cost plus a fee, so larger swaps get better rates
+QUOTE_GAS_COST_USD = 2.0
+QUOTE_FEE = 0.003
+
+
+def quote_amount(src: str, dst: str, amount: str) -> str:
+    """Destination amount for a swap, from the mock token prices"""
+    usd_out = max(usd_value(src, amount) - QUOTE_GAS_COST_USD, 0.0) * (1 - QUOTE_FEE)
+    return str(int(usd_out / token_price_usd(dst) * 10 ** token_info(1, dst)["decimals"]))
+
+
+# 1inch Balance API
+
+async def balances(request: web.Request) -> web.Response:
+    settings = request.app[_SETTINGS]
+    chain_id = int(request.match_info["chain"])
+    return web.json_response(held_balances(request.match_info["wallet"], chain_id, settings["payload_scale"]))
+
+
+# 1inch Token API
+
+async def token_list(request: web.Request) -> web.Response:
+    settings = request.app[_SETTINGS]
+    count = 20 * settings["payload_scale"]
+    chain_id = int(request.query.get("chain_id", 1))
+    return web.json_response({"tokens": [token_info(chain_id, token_address(chain_id, i)) for i in range(count)]})
+
+
+async def custom_tokens(request: web.Request) -> web.Response:
+    chain_id = int(request.match_info["chain"])
+    return web.json_response({
+        address.lower(): token_info(chain_id, address)
+        for address in request.query.getall("addresses", [])
+        if address
+    })
+
+
+async def token(request: web.Request) -> web.Response:
+    chain_id = int(request.match_info["chain"])
+    address = request.query.get("address", "")
+    return web.json_response(token_info(chain_id, address))
+
+
+async def token_search(request: web.Request) -> web.Response:
+    settings = request.app[_SETTINGS]
+    query = request.query.get("query", "")
+    rng = random.Random(f"search:{query.lower()}")
+    results = []
+    for chain_id in [1, 10, 56, 137, 8453, 42161]:
+        for i in rng.sample(range(TOKENS_PER_CHAIN), 3 * settings["payload_scale"]):
+            info = token_info(chain_id, token_address(chain_id, i))
+            results.append({**info, "symbol": query.upper()[:8] or info["symbol"], "rating": rng.randint(1, 10)})
+    return web.json_response(results)
+
+
+# 1inch History API
+
+async def history_transactions(request: web.Request) -> web.Response:
+    settings = request.app[_SETTINGS]
+    wallet_address = request.query.get("addresses", "")
+    chain_id = int(request.query.get("chain_id", 1))
+    limit = int(request.query.get("limit", 10))
+    transactions = []
+    for i in range(min(limit, HISTORY_EVENTS * settings["payload_scale"])):
+        event = history_event(wallet_address, chain_id, i)
+        details = event["details"]
+        transactions.append({
+            "hash": details["txHash"],
+            "timeStamp": str(event["timeMs"] // 1000),
+            "from": details["fromAddress"],
+            "to": details["toAddress"],
+            "value": details["tokenActions"][0]["amount"],
+        })
+    return web.json_response(transactions)
+
+
+async def history_events(request: web.Request) -> web.Response:
+    settings = request.app[_SETTINGS]
+    wallet_address = request.match_info["wallet"]
+    chain_id = int(request.query.get("chainId", 1))
+    limit = int(request.query.get("limit", 100))
+    from_ms = int(request.query.get("fromTimestampMs", 0))
+    to_ms = int(request.query.get("toTimestampMs", HISTORY_NEWEST_MS))
+
+    # Events are newest first, two per timestamp; both bounds are inclusive like the real API
+    total = HISTORY_EVENTS * settings["payload_scale"]
+    first = max(0, (HISTORY_NEWEST_MS - to_ms + HISTORY_SPACING_MS - 1) // HISTORY_SPACING_MS * 2)
+    items = []
+    for i in range(first, total):
+        event = history_event(wallet_address, chain_id, i)
+        if event["timeMs"] < from_ms or len(items) >= limit:
+            break
+        items.append(event)
+    return web.json_response({"items": items, "cache_counter": 1})
+
+
+# 1inch Portfolio API
+
+def address_value_usd(wallet_address: str) -> float:
+    return random.Random(wallet_address.lower()).uniform(0, 10 ** 6)
+
+
+async def portfolio_overview(request: web.Request) -> web.Response:
+    addresses = request.query.getall("addresses", [])
+    by_address = [{"address": address, "value_usd": address_value_usd(address)} for address in addresses]
+    total = sum(entry["value_usd"] for entry in by_address)
+    chain_ids = [int(chain_id) for chain_id in request.query.getall("chain_id", [])] or [1]
+    by_chain = [
+        {"id": chain_id, "name": f"Chain {chain_id}", "value_usd": total / len(chain_ids)}
+        for chain_id in chain_ids
+    ]
+    return web.json_response({"result": {"total": total, "by_address": by_address, "by_chain": by_chain}})
+
+
+async def portfolio_erc20_details(request: web.Request) -> web.Response:
+    settings = request.app[_SETTINGS]
+    chain_ids = [int(chain_id) for chain_id in request.query.getall("chain_id", [])] or [1]
+    result = []
+    for address in request.query.getall("addresses", []):
+        for chain_id in chain_ids:
+            for token_addr, raw in list(held_balances(address, chain_id, settings["payload_scale"]).items())[:5]:
+                info = token_info(chain_id, token_addr)
+                amount = int(raw) / 10 ** info["decimals"]
+                result.append({
+                    "chain_id": chain_id,
+                    "contract_address": token_addr,
+                    "address": address,
+                    "name": info["name"],
+                    "symbol": info["symbol"],
+                    "amount": amount,
+                    "price_to_usd": token_price_usd(token_addr),
+                    "value_usd": amount * token_price_usd(token_addr),
+                })
+    return web.json_response({"result": result})
+
+
+async def portfolio_protocols(request: web.Request) -> web.Response:
+    addresses = request.query.getall("addresses", [])
+    chain_id = int(request.query.get("chain_id", 1))
+    by_address = [{"address": address, "value_usd": address_value_usd(address) / 10} for address in addresses]
+    return web.json_response({"result": {
+        "total": sum(entry["value_usd"] for entry in by_address),
+        "by_address": by_address,
+        "by_category": [{"category_id": "lending", "category_name": "Lending", "value_usd": 0}],
+        "by_protocol_group": [],
+        "by_chain": [{"chain_id": chain_id, "chain_name": f"Chain {chain_id}",
+                      "value_usd": sum(entry["value_usd"] for entry in by_address)}],
+    }})
+
+
+# 1inch Swap API, Fusion and Fusion+ quoters
+
+async def swap_quote(request: web.Request) -> web.Response:
+    query = request.query
+    src, dst, amount = query.get("src", NATIVE_TOKEN), query.get("dst", NATIVE_TOKEN), query.get("amount", "0")
+    return web.json_response({"dstAmount": quote_amount(src, dst, amount), "gas": 180_000})
+
+
+async def swap_transaction(request: web.Request) -> web.Response:
+    query = request.query
+    src, dst, amount = query.get("src", NATIVE_TOKEN), query.get("dst", NATIVE_TOKEN), query.get("amount", "0")
+    return web.json_response({
+        "dstAmount": quote_amount(src, dst, amount),
+        "tx": {
+            "from": query.get("from", ""),
+            "to": "0x111111125421ca6dc452d289314280a0f8842a65",
+            "data": "0x07ed2379" + "00" * 64,
+            "value": amount if src.lower() == NATIVE_TOKEN else "0",
+            "gas": 180_000,
+            "gasPrice": str(20 * 10 ** 9),
+        },
+    })
+
+
+async def approve_allowance(request: web.Request) -> web.Response:
+    return web.json_response({"allowance": "0"})
+
+
+async def approve_transaction(request: web.Request) -> web.Response:
+    return web.json_response({
+        "data": "0x095ea7b3" + "00" * 64,
+        "gasPrice": str(20 * 10 ** 9),
+        "to": request.query.get("tokenAddress", ""),
+        "value": "0",
+    })
+
+
+def auction_presets(to_amount: int) -> Dict[str, Dict[str, Any]]:
+    def preset(duration: int, bump: int) -> Dict[str, Any]:
+        start_amount = str(to_amount * (10_000_000 + bump) // 10_000_000)
+        return {
+            "auctionDuration": duration,
+            "startAuctionIn": 12,
+            "initialRateBump": bump,
+            "auctionStartAmount": start_amount,
+            "startAmount": start_amount,
+            "auctionEndAmount": str(to_amount),
+            "costInDstToken": "0",
+            "points": [],
+            "allowPartialFills": False,
+            "allowMultipleFills": False,
+            "gasCost": {"gasBumpEstimate": 0, "gasPriceEstimate": "0"},
+            "exclusiveResolver": None,
+        }
+
+    return {"fast": preset(180, 50_000), "medium": preset(360, 100_000), "slow": preset(600, 150_000)}
+
+
+async def fusion_quote(request: web.Request) -> web.Response:
+    query = request.query
+    src = query.get("fromTokenAddress", NATIVE_TOKEN)
+    dst = query.get("toTokenAddress", NATIVE_TOKEN)
+    amount = query.get("amount", "0")
+    to_amount = int(quote_amount(src, dst, amount))
+
+    return web.json_response({
+        "quoteId": tx_hash("quote", src, dst, amount)[:34],
+        "fromTokenAmount": amount,
+        "toTokenAmount": str(to_amount),
+        "feeToken": src,
+        "presets": auction_presets(to_amount),
+        "recommended_preset": "fast",
+        "prices": {"usd": {"fromToken": str(token_price_usd(src)), "toToken": str(token_price_usd(dst))}},
+        "volume": {"usd": {"fromToken": str(usd_value(src, amount)), "toToken": str(usd_value(dst, str(to_amount)))}},
+        "settlementAddress": "0xfb2809a5314473e1165f6b58018e20ed8f07b840",
+        "whitelist": [],
+        "autoK": 0,
+    })
+
+
+async def fusion_plus_quote(request: web.Request) -> web.Response:
+    query = request.query
+    src = query.get("srcTokenAddress", NATIVE_TOKEN)
+    dst = query.get("dstTokenAddress", NATIVE_TOKEN)
+    amount = query.get("amount", "0")
+    to_amount = int(quote_amount(src, dst, amount))
+    presets = auction_presets(to_amount)
+    for preset in presets.values():
+        preset["secretsCount"] = 1
+
+    return web.json_response({
+        "quoteId": tx_hash("fusion-plus", query.get("srcChain"), query.get("dstChain"), src, dst, amount)[:34],
+        "srcTokenAmount": amount,
+        "dstTokenAmount": str(to_amount),
+        "presets": presets,
+        "recommendedPreset": "fast",
+        "srcEscrowFactory": "0xa7bcb4eac8964306f9e3764f67db6a7af6ddf99a",
+        "dstEscrowFactory": "0xa7bcb4eac8964306f9e3764f67db6a7af6ddf99a",
+        "srcSafetyDeposit": "0",
+        "dstSafetyDeposit": "0",
+        "timeLocks": {
+            "srcWithdrawal": 36,
+            "srcPublicWithdrawal": 372,
+            "srcCancellation": 528,
+            "srcPublicCancellation": 648,
+            "dstWithdrawal": 60,
+            "dstPublicWithdrawal": 336,
+            "dstCancellation": 456,
+        },
+        "prices": {"usd": {"srcToken": str(token_price_usd(src)), "dstToken": str(token_price_usd(dst))}},
+        "volume": {"usd": {"srcToken": str(usd_value(src, amount)), "dstToken": str(usd_value(dst, str(to_amount)))}},
+        "whitelist": [],
+    })
+
+
+# Nodit Web3 Data API
+
+async def nodit_gas_price(request: web.Request) -> web.Response:
+    protocol = request.match_info["protocol"]
+    if protocol not in GAS_PROTOCOLS:
+        return web.json_response({"code": "INVALID_PROTOCOL", "message": f"Unknown protocol {protocol}"}, status=400)
+    # Changes once a block (12 s) so repeated reads within a block agree
+    rng = random.Random(f"gas:{protocol}:{int(time.time() // 12)}")
+    base_fee = rng.uniform(0.01, 30)
+    return web.json_response({
+        "high": round(base_fee * 1.3, 4),
+        "average": round(base_fee * 1.1, 4),
+        "low": round(base_fee, 4),
+        "baseFee": round(base_fee, 4),
+        "unit": "gwei",
+    })
+
+
+async def nodit_tokens_owned(request: web.Request) -> web.Response:
+    settings = request.app[_SETTINGS]
+    body = await request.json()
+    wallet_address = body.get("accountAddress", "")
+    items = []
+    for address, raw in held_balances(wallet_address, 1, settings["payload_scale"]).items():
+        if address == NATIVE_TOKEN:
+            continue
+        info = token_info(1, address)
+        items.append({"ownerAddress": wallet_address, "balance": raw, "contract": {**info, "type": "ERC20"}})
+    return web.json_response({"page": 1, "rpp": len(items), "count": len(items), "items": items})
+
+
+async def nodit_transactions_in_block(request: web.Request) -> web.Response:
+    settings = request.app[_SETTINGS]
+    body = await request.json()
+    block = str(body.get("block", "latest"))
+    items = [
+        {"transactionHash": tx_hash("block", block, i), "from": f"0x{i:040x}", "to": NATIVE_TOKEN, "value": "0",
+         "logs": [] if body.get("withLogs", True) else None}
+        for i in range(50 * settings["payload_scale"])
+    ]
+    return web.json_response(items)
+
+
+async def nodit_transaction_by_hash(request: web.Request) -> web.Response:
+    body = await request.json()
+    return web.json_response({
+        "transactionHash": body.get("transactionHash", ""),
+        "blockNumber": 20_000_000,
+        "status": "1",
+        "from": "0x" + "11" * 20,
+        "to": "0x" + "22" * 20,
+        "value": "0",
+        "logs": [] if body.get("withLogs") else None,
+    })
+
+
+# Alchemy JSON-RPC
+
+def rpc_result(chain_id: int, method: str, params: List[Any]) -> Any:
+    if method == "eth_chainId":
+        return hex(chain_id)
+    if method == "net_version":
+        return str(chain_id)
+    if method == "eth_blockNumber":
+        return hex(20_000_000 + int(time.time() // 12) % 100_000)
+    if method in ("eth_gasPrice", "eth_maxPriorityFeePerGas"):
+        return hex(random.Random(f"gas:{chain_id}:{int(time.time() // 12)}").randint(10 ** 8, 3 * 10 ** 10))
+    if method == "eth_getBalance":
+        return hex(int(held_balances(str(params[0]), chain_id, 1)[NATIVE_TOKEN]))
+    if method in ("eth_getTransactionCount", "eth_estimateGas"):
+        return hex(21_000) if method == "eth_estimateGas" else "0x0"
+    if method == "eth_call":
+        # Zero word: no ENS resolver, zero allowance, empty return values
+        return "0x" + "00" * 32
+    if method == "eth_sendRawTransaction":
+        return tx_hash("raw", params[0])
+    if method in ("eth_getTransactionReceipt", "eth_getTransactionByHash"):
+        return None
+    if method == "eth_getBlockByNumber":
+        return {"number": hex(20_000_000), "hash": tx_hash("block", chain_id), "timestamp": hex(int(time.time())),
+                "baseFeePerGas": hex(10 ** 9), "gasLimit": hex(30_000_000), "gasUsed": hex(15_000_000),
+                "transactions": []}
+    raise KeyError(method)
+
+
+async def alchemy_rpc(request: web.Request) -> web.Response:
+    chain_id = int(request.match_info["chain"])
+    body = await request.json()
+
+    def answer(call: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return {"jsonrpc": "2.0", "id": call.get("id"),
+                    "result": rpc_result(chain_id, call.get("method", ""), call.get("params", []))}
+        except KeyError:
+            return {"jsonrpc": "2.0", "id": call.get("id"),
+                    "error": {"code": -32601, "message": f"Method {call.get('method')} not supported by the mock"}}
+
+    if isinstance(body, list):
+        return web.json_response([answer(call) for call in body])
+    return web.json_response(answer(body))
+
+
+def create_app(latency: float = 0.0, jitter: float = 0.0, rate_429: float = 0.0, retry_after: float = 1.0,
+               payload_scale: int = 1, seed: int = 0, counts: Optional[Counter] = None) -> web.Application:
+    """
+    Build the mock API server
+
+    Args:
+        latency (float): Seconds to wait before every response
+        jitter (float): Extra random delay of up to this many seconds
+        rate_429 (float): Fraction of requests answered with 429 Too Many Requests
+        retry_after (float): Retry-After seconds sent with the 429 responses
+        payload_scale (int): Multiplier for held tokens, history events and list sizes
+        seed (int): Seed of the latency jitter and 429 draws
+        counts (Optional[Counter]): Incremented per endpoint on every request, 429s under "429"
+
+    Returns:
+        web.Application: Mock server app; its request counts are also served at /__stats
+    """
+    counts = Counter() if counts is None else counts
+    rng = random.Random(seed)
+    # Handler -> endpoint group the requests are counted under
+    groups: Dict[Any, str] = {}
+
+    @web.middleware
+    async def simulate(request: web.Request, handler):
+        group = groups.get(request.match_info.handler)
+        if group is None:
+            return await handler(request)
+        counts[group] += 1
+        delay = latency + (rng.uniform(0, jitter) if jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if rate_429 and rng.random() < rate_429:
+            counts["429"] += 1
+            return web.json_response(
+                {"statusCode": 429, "message": "Too Many Requests"},
+                status=429, headers={"Retry-After": f"{retry_after:g}"}
+            )
+        return await handler(request)
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(dict(request.app[_COUNTS]))
+
+    app = web.Application(middlewares=[simulate])
+    app[_COUNTS] = counts
+    app[_SETTINGS] = {"payload_scale": max(1, int(payload_scale))}
+
+    routes = [
+        ("GET", "/balance/v1.2/{chain}/balances/{wallet}", balances, "balance"),
+        ("GET", "/token/v1.2/multi-chain/token-list", token_list, "token_list"),
+        ("GET", "/token/v1.2/search", token_search, "token"),
+        ("GET", "/token/v1.2/{chain}/custom", custom_tokens, "token"),
+        ("GET", "/token/v1.2/{chain}/token", token, "token"),
+        ("GET", "/history/v1.0/history/transactions", history_transactions, "history"),
+        ("GET", "/history/v2.0/history/{wallet}/events", history_events, "history"),
+        ("GET", "/portfolio/v4/overview", portfolio_overview, "portfolio"),
+        ("GET", "/portfolio/v4/overview/erc20/details", portfolio_erc20_details, "portfolio"),
+        ("GET", "/portfolio/portfolio/v4/overview/protocols/current_value", portfolio_protocols, "portfolio"),
+        ("GET", "/swap/v6.0/{chain}/quote", swap_quote, "swap_quote"),
+        ("GET", "/swap/v6.0/{chain}/swap", swap_transaction, "swap"),
+        ("GET", "/swap/v6.0/{chain}/approve/allowance", approve_allowance, "swap"),
+        ("GET", "/swap/v6.0/{chain}/approve/transaction-data", approve_transaction, "swap"),
+        ("GET", "/fusion/quoter/v2.0/{chain}/quote/receive", fusion_quote, "swap_quote"),
+        ("GET", "/fusion-plus/quoter/v1.0/quote/receive", fusion_plus_quote, "swap_quote"),
+        ("POST", "/nodit/v1/{protocol}/mainnet/blockchain/getGasPrice", nodit_gas_price, "gas"),
+        ("POST", "/nodit/v1/ethereum/mainnet/token/getTokensOwnedByAccount", nodit_tokens_owned, "nodit"),
+        ("POST", "/nodit/v1/ethereum/mainnet/blockchain/getTransactionsInBlock", nodit_transactions_in_block, "nodit"),
+        ("POST", "/nodit/v1/{protocol}/mainnet/blockchain/getTransactionByHash", nodit_transaction_by_hash, "nodit"),
+        ("POST", "/alchemy/{chain}/{key}", alchemy_rpc, "rpc"),
+        ("POST", "/alchemy/{chain}", alchemy_rpc, "rpc"),
+    ]
+    for method, path, handler, group in routes:
+        app.router.add_route(method, path, handler)
+        groups[handler] = group
+    app.router.add_get("/__stats", stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds of the 429 responses")
+    parser.add_argument("--payload-scale", type=int, default=1, help="Multiplier for tokens, events and list sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        payload_scale=args.payload_scale,
+        seed=args.seed,
+    )
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
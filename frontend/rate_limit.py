@@ -0,0 +1,118 @@
+import time
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by every caller of one API key
+
+    Callers reserve a token and sleep until it is theirs, so concurrent users
+    are spread over the quota instead of bursting into it. The rate adapts to
+    the server: it is halved on every 429 (and paused for Retry-After) and
+    creeps back up towards the configured rate on success. Reservations are
+    made under a thread lock so sync and async callers can share a bucket.
+
+    Args:
+        rate (float): Requests per second allowed by the quota
+        capacity (float): Burst size
+        min_rate (float): Lowest rate the bucket backs off to
+    """
+
+    def __init__(self, rate: float, capacity: float = None, min_rate: float = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.stats: Dict[str, Any] = {
+            "acquired": 0,
+            "rate_limited": 0,
+            "wait_time_total": 0.0,
+        }
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(0.0, self._blocked_until - now) + max(0.0, -self._tokens) / self.rate
+            self.stats["acquired"] += 1
+            self.stats["wait_time_total"] += wait
+            return wait
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self):
+        """Wait until a request may be sent, for synchronous callers"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self):
+        """Additively raise the rate back towards the configured quota"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """
+        Back off after a 429 response
+
+        Args:
+            retry_after (Optional[float]): Seconds from the Retry-After header, if any
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self._blocked_until = max(self._blocked_until, now + pause)
+            self._tokens = min(self._tokens, 0.0)
+            self.stats["rate_limited"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get limiter statistics
+
+        Returns:
+            Dict: Current rate, acquired requests, 429 count and average wait
+        """
+        acquired = self.stats["acquired"]
+        return {
+            "rate": self.rate,
+            "acquired": acquired,
+            "rate_limited": self.stats["rate_limited"],
+            "avg_wait_ms": (self.stats["wait_time_total"] / acquired * 1000) if acquired else 0.0,
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds
+
+    Args:
+        value (Optional[str]): Header value
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if missing or not a number
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,293 @@
+import math
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from cache import MISSING
+
+# Half-life in seconds of the access score that ranks busy wallets
+REFRESH_BUSY_HALF_LIFE = 600.0
+
+# Wallets not viewed for this long are refreshed IDLE_INTERVAL_FACTOR times less often
+REFRESH_IDLE_AFTER = 3600.0
+REFRESH_IDLE_INTERVAL_FACTOR = 4.0
+
+# Seconds before a failed refresh is retried (capped at the data type's interval)
+REFRESH_ERROR_RETRY = 30.0
+
+# Keys not viewed for this long stop being watched and their values are dropped
+REFRESH_UNWATCH_AFTER = 6 * REFRESH_IDLE_AFTER
+
+# Most keys watched at once; the least recently viewed ones are dropped beyond it
+REFRESH_MAX_WATCHED = 10000
+
+
+class RefreshScheduler:
+    """
+    Keep data of watched keys (wallet addresses) warm with stale-while-revalidate reads
+
+    Every key has one cached value per data type (e.g. balances, history,
+    portfolio), each with its own refresh interval. get() answers from the cache
+    straight away, even when the value is stale, and refreshes stale values in
+    the background; only a key that was never fetched waits for the fetch.
+
+    A background loop refreshes due values of watched keys, at most
+    max_concurrency at a time. Keys that are viewed often (decayed access count)
+    are refreshed first, and keys not viewed for a while less often. Keys not
+    viewed for REFRESH_UNWATCH_AFTER seconds, or the least recently viewed ones
+    beyond max_watched, are unwatched. A failed refresh (an exception, or a
+    value is_error accepts) keeps the previous value.
+
+    Args:
+        fetchers (Dict[str, Callable]): Coroutine function per data type, called with the key
+        intervals (Dict[str, float]): Seconds between refreshes per data type
+        max_concurrency (int): Background refreshes in flight
+        tick (float): Seconds between scans for due values
+        is_error (Optional[Callable]): Whether a fetched value reports a failure instead of data
+        max_watched (int): Most keys watched at once
+    """
+
+    def __init__(self, fetchers: Dict[str, Callable[[Hashable], Awaitable[Any]]],
+                 intervals: Dict[str, float], max_concurrency: int = 4, tick: float = 1.0,
+                 is_error: Optional[Callable[[Any], bool]] = None, max_watched: int = REFRESH_MAX_WATCHED):
+        self.fetchers = fetchers
+        self.intervals = intervals
+        self.is_error = is_error
+        self.max_watched = max_watched
+        self.max_concurrency = max_concurrency
+        self.tick = tick
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "errors": 0,
+            "evictions": 0,
+        }
+        self._watched: Set[Hashable] = set()
+        # (key, kind) -> (value, fetched_at)
+        self._values: Dict[Tuple[Hashable, str], Tuple[Any, float]] = {}
+        self._inflight: Dict[Tuple[Hashable, str], asyncio.Task] = {}
+        self._failed_at: Dict[Tuple[Hashable, str], float] = {}
+        # key -> (score, updated_at)
+        self._activity: Dict[Hashable, Tuple[float, float]] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def watch(self, key: Hashable):
+        """Keep a key warm in the background until it goes unviewed for REFRESH_UNWATCH_AFTER seconds"""
+        if key not in self._watched:
+            self._watched.add(key)
+            # Watching counts as the start of the idle period, even before the first view
+            self._activity.setdefault(key, (0.0, time.monotonic()))
+            if len(self._watched) > self.max_watched:
+                oldest = min((watched for watched in self._watched if watched != key),
+                             key=lambda watched: self._activity.get(watched, (0.0, 0.0))[1])
+                self._evict(oldest)
+        self.start()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def unwatch(self, key: Hashable):
+        """Stop refreshing a key; its cached values are dropped"""
+        self._watched.discard(key)
+        self._activity.pop(key, None)
+        for kind in self.fetchers:
+            self._values.pop((key, kind), None)
+            self._failed_at.pop((key, kind), None)
+
+    def _evict(self, key: Hashable):
+        self.unwatch(key)
+        self.stats["evictions"] += 1
+
+    def _evict_idle(self, now: float):
+        """Unwatch keys not viewed for REFRESH_UNWATCH_AFTER seconds"""
+        idle = [key for key in self._watched
+                if now - self._activity.get(key, (0.0, 0.0))[1] > REFRESH_UNWATCH_AFTER]
+        for key in idle:
+            self._evict(key)
+
+    @property
+    def watched(self) -> List[Hashable]:
+        return list(self._watched)
+
+    def touch(self, key: Hashable):
+        """Record a view of a key, raising its refresh priority"""
+        now = time.monotonic()
+        self._activity[key] = (self.busy_score(key, now) + 1.0, now)
+
+    def busy_score(self, key: Hashable, now: Optional[float] = None) -> float:
+        """Access count of a key, halved every REFRESH_BUSY_HALF_LIFE seconds"""
+        score, updated_at = self._activity.get(key, (0.0, 0.0))
+        if not score:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return score * math.pow(0.5, (now - updated_at) / REFRESH_BUSY_HALF_LIFE)
+
+    def peek(self, key: Hashable, kind: str) -> Tuple[Any, Optional[float]]:
+        """
+        Get a cached value without fetching or counting a view
+
+        Args:
+            key (Hashable): Watched key
+            kind (str): Data type
+
+        Returns:
+            Tuple[Any, Optional[float]]: Value and its age in seconds, or (MISSING, None)
+        """
+        entry = self._values.get((key, kind))
+        if entry is None:
+            return MISSING, None
+        value, fetched_at = entry
+        return value, time.monotonic() - fetched_at
+
+    async def get(self, key: Hashable, kind: str) -> Any:
+        """
+        Get a value, serving the cached one immediately and revalidating it if stale
+
+        Args:
+            key (Hashable): Key to get data for
+            kind (str): Data type
+
+        Returns:
+            Any: Cached value, or the fetched value if the key has none yet.
+            Only values of watched keys are cached.
+        """
+        self.touch(key)
+        value, age = self.peek(key, kind)
+        if value is MISSING:
+            self.stats["misses"] += 1
+            return await asyncio.shield(self._refresh(key, kind))
+        if age >= self._interval(key, kind):
+            self.stats["stale_hits"] += 1
+            self._refresh(key, kind)
+        else:
+            self.stats["hits"] += 1
+        return value
+
+    def _interval(self, key: Hashable, kind: str) -> float:
+        interval = self.intervals[kind]
+        _, updated_at = self._activity.get(key, (0.0, 0.0))
+        if time.monotonic() - updated_at > REFRESH_IDLE_AFTER:
+            interval *= REFRESH_IDLE_INTERVAL_FACTOR
+        return interval
+
+    def _refresh(self, key: Hashable, kind: str) -> asyncio.Task:
+        # One refresh per (key, kind) at a time; callers share the running one
+        task = self._inflight.get((key, kind))
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, kind))
+            self._inflight[(key, kind)] = task
+        return task
+
+    async def _fetch(self, key: Hashable, kind: str) -> Any:
+        try:
+            value = await self.fetchers[kind](key)
+        except Exception:
+            if key not in self._watched:
+                raise
+            previous = self._failed(key, kind)
+            if previous is None:
+                raise
+            return previous[0]
+        finally:
+            self._inflight.pop((key, kind), None)
+
+        if key not in self._watched:
+            # Unwatched while fetching: answer the waiting callers but store nothing
+            return value
+        if self.is_error is not None and self.is_error(value):
+            # Keep serving the last good value; without one the error is returned uncached
+            previous = self._failed(key, kind)
+            return value if previous is None else previous[0]
+        self._values[(key, kind)] = (value, time.monotonic())
+        self._failed_at.pop((key, kind), None)
+        self.stats["refreshes"] += 1
+        return value
+
+    def _failed(self, key: Hashable, kind: str) -> Optional[Tuple[Any, float]]:
+        """Record a failed refresh and return the previous entry, if any"""
+        self.stats["errors"] += 1
+        self._failed_at[(key, kind)] = time.monotonic()
+        return self._values.get((key, kind))
+
+    def _due(self) -> List[Tuple[Hashable, str]]:
+        """Due (key, kind) pairs of watched keys, busiest keys and most overdue values first"""
+        now = time.monotonic()
+        self._evict_idle(now)
+        due = []
+        for key in self._watched:
+            score = self.busy_score(key, now)
+            for kind in self.fetchers:
+                if (key, kind) in self._inflight:
+                    continue
+                failed_at = self._failed_at.get((key, kind))
+                if failed_at is not None and now - failed_at < min(REFRESH_ERROR_RETRY, self.intervals[kind]):
+                    continue
+                entry = self._values.get((key, kind))
+                overdue = math.inf if entry is None else now - entry[1] - self._interval(key, kind)
+                if overdue >= 0:
+                    due.append((-score, -overdue, key, kind))
+        due.sort(key=lambda item: (item[0], item[1]))
+        return [(key, kind) for _, _, key, kind in due]
+
+    def start(self):
+        """Start the background refresh loop; needs a running event loop, later calls are no-ops"""
+        if self._loop_task is not None and not self._loop_task.done():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background loop and outstanding refreshes"""
+        tasks = [task for task in [self._loop_task, *self._inflight.values()] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+
+    async def _run(self):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        def release(task: asyncio.Task):
+            semaphore.release()
+            if not task.cancelled() and task.exception() is not None:
+                print(f"Background refresh failed: {str(task.exception())}")
+            self._wakeup.set()
+
+        while True:
+            await semaphore.acquire()
+            # Pick the most important due value each time a slot frees up
+            due = self._due()
+            if due:
+                key, kind = due[0]
+                self._refresh(key, kind).add_done_callback(release)
+                continue
+
+            semaphore.release()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.tick)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics
+
+        Returns:
+            Dict: Watched keys, cached values, in-flight refreshes, hits (fresh and stale), misses, refreshes,
+            errors and evicted keys
+        """
+        reads = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "watched": len(self._watched),
+            "cached": len(self._values),
+            "in_flight": len(self._inflight),
+            "hit_rate": (self.stats["hits"] + self.stats["stale_hits"]) / reads if reads else 0.0,
+        }
@@ -0,0 +1,186 @@
+import os
+import time
+import json
+import sqlite3
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from cache import TTLCache, MISSING
+
+# SQLite file holding token metadata between runs, next to this module unless set
+TOKEN_STORE_PATH = os.getenv(
+    "TOKEN_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "token_metadata.sqlite3")
+)
+
+# Token symbol/name/decimals practically never change
+TOKEN_STORE_TTL = float(os.getenv("TOKEN_STORE_TTL", str(7 * 24 * 3600)))
+
+# Tokens 1inch doesn't know (mostly spam airdrops) are retried sooner
+TOKEN_STORE_UNKNOWN_TTL = float(os.getenv("TOKEN_STORE_UNKNOWN_TTL", str(24 * 3600)))
+
+# Maximum number of tokens kept in memory
+TOKEN_STORE_MAX_ENTRIES = int(os.getenv("TOKEN_STORE_MAX_ENTRIES", "200000"))
+
+# Seconds between background refreshes from the multi-chain token list
+TOKEN_STORE_WARM_INTERVAL = float(os.getenv("TOKEN_STORE_WARM_INTERVAL", str(6 * 3600)))
+
+
+class TokenMetadataStore:
+    """
+    Token metadata keyed by (chain_id, token_address), shared across chains and sessions
+
+    Entries live in an LRU/TTL cache in memory and are persisted to SQLite so a
+    restarted app starts warm. Tokens unknown to 1inch are stored too (as None)
+    so they are not looked up again on every refresh.
+    """
+
+    def __init__(self, path: str = TOKEN_STORE_PATH, ttl: float = TOKEN_STORE_TTL,
+                 max_entries: int = TOKEN_STORE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.cache = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tokens (
+                chain_id INTEGER NOT NULL,
+                address TEXT NOT NULL,
+                data TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (chain_id, address)
+            )
+            """
+        )
+        self._db.commit()
+        self._warm_task: Optional[asyncio.Task] = None
+        self.load()
+
+    def load(self):
+        """Preload all unexpired tokens from disk into memory"""
+        now = time.time()
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT chain_id, address, data, updated_at FROM tokens ORDER BY updated_at"
+            ).fetchall()
+        for chain_id, address, data, updated_at in rows:
+            ttl = self.ttl if data is not None else TOKEN_STORE_UNKNOWN_TTL
+            remaining = updated_at + ttl - now
+            if remaining > 0:
+                self.cache.set((chain_id, address), json.loads(data) if data is not None else None, ttl=remaining)
+        print(f"Loaded {len(self.cache)} cached tokens from {self.path}")
+
+    def get_many(self, chain_id: int, token_addresses: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Look up cached metadata for several tokens of one chain
+
+        Args:
+            chain_id (int): Chain ID of the tokens
+            token_addresses (List[str]): Token addresses to look up
+
+        Returns:
+            Tuple: Metadata keyed by lowercase address for known tokens, and the
+            addresses that are not cached. Cached unknown tokens are in neither.
+        """
+        found = {}
+        missing = []
+        for token_address in token_addresses:
+            address = token_address.lower()
+            token_data = self.cache.get((chain_id, address))
+            if token_data is MISSING:
+                missing.append(token_address)
+            elif token_data is not None:
+                found[address] = token_data
+        return found, missing
+
+    async def put_many(self, chain_id: int, tokens: Dict[str, Optional[Dict[str, Any]]]):
+        """
+        Store metadata for several tokens of one chain in memory and on disk
+
+        The memory cache is updated at once; the SQLite commit runs in a worker
+        thread so it doesn't block the event loop.
+
+        Args:
+            chain_id (int): Chain ID of the tokens
+            tokens (Dict): Metadata keyed by token address, None for tokens unknown to 1inch
+        """
+        rows = self._remember(chain_id, tokens)
+        await asyncio.to_thread(self._write, rows)
+
+    def _remember(self, chain_id: int, tokens: Dict[str, Optional[Dict[str, Any]]]) -> List[tuple]:
+        now = time.time()
+        rows = []
+        for token_address, token_data in tokens.items():
+            address = token_address.lower()
+            ttl = self.ttl if token_data is not None else TOKEN_STORE_UNKNOWN_TTL
+            self.cache.set((chain_id, address), token_data, ttl=ttl)
+            rows.append((chain_id, address, json.dumps(token_data) if token_data is not None else None, now))
+        return rows
+
+    def _write(self, rows: List[tuple]):
+        if not rows:
+            return
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO tokens (chain_id, address, data, updated_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._db.commit()
+
+    def warm(self, token_list_data: Any) -> List[tuple]:
+        """
+        Fill the in-memory cache from the 1inch multi-chain token list
+
+        Args:
+            token_list_data: Response of token/v1.2/multi-chain/token-list
+
+        Returns:
+            List[tuple]: Rows to persist with _write
+        """
+        token_list = token_list_data.get("tokens", []) if isinstance(token_list_data, dict) else token_list_data
+        by_chain: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        for token in token_list:
+            if "chainId" in token and "address" in token:
+                by_chain.setdefault(int(token["chainId"]), {})[token["address"]] = token
+
+        rows = []
+        for chain_id, tokens in by_chain.items():
+            rows.extend(self._remember(chain_id, tokens))
+        return rows
+
+    def start_background_warm(self, fetch_token_list):
+        """
+        Refresh the store from the token list now and every TOKEN_STORE_WARM_INTERVAL
+
+        Must be called from a running event loop; later calls are no-ops.
+
+        Args:
+            fetch_token_list: Coroutine function returning the multi-chain token list, or None on failure
+        """
+        if self._warm_task is not None and not self._warm_task.done():
+            return
+
+        async def run():
+            while True:
+                try:
+                    token_list_data = await fetch_token_list()
+                    if token_list_data is not None:
+                        rows = self.warm(token_list_data)
+                        # SQLite inserts for thousands of tokens shouldn't block the event loop
+                        await asyncio.to_thread(self._write, rows)
+                        print(f"Warmed token metadata store with {len(rows)} tokens")
+                except Exception as e:
+                    print(f"Token list warm-up failed: {str(e)}")
+                await asyncio.sleep(TOKEN_STORE_WARM_INTERVAL)
+
+        self._warm_task = asyncio.create_task(run())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters of the metadata store
+
+        Returns:
+            Dict: Cache size, hits, misses, hit rate and evictions
+        """
+        return self.cache.get_stats()
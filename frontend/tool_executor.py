@@ -0,0 +1,146 @@
+import os
+import asyncio
+from typing import Callable, Dict, List, Any, Optional
+from mcp import ClientSession
+from mcp_pool import MCP_TRANSPORT_ERRORS
+from tool_results import READ_TOOL_RESULT, ToolResultCompactor
+
+# Default number of concurrent calls allowed per tool
+TOOL_CONCURRENCY_DEFAULT = int(os.getenv("TOOL_CONCURRENCY_DEFAULT", "4"))
+
+# Tools that sign and send transactions from the user's wallet share one group,
+# so they run one at a time across tools and their nonces don't collide
+WALLET_TOOL_GROUP = "wallet"
+TOOL_GROUPS = {
+    "swap": WALLET_TOOL_GROUP,
+    "crossChainSwap": WALLET_TOOL_GROUP,
+    "transferErc20Token": WALLET_TOOL_GROUP,
+    "transferNativeToken": WALLET_TOOL_GROUP,
+}
+
+# Concurrent calls allowed per group or per ungrouped tool name
+TOOL_CONCURRENCY_LIMITS = {
+    WALLET_TOOL_GROUP: 1,
+}
+
+
+class ToolExecutor:
+    """
+    Run the tool_use blocks of one assistant response concurrently
+
+    Read-only tools each have their own semaphore so they can fan out, while the
+    wallet-signing tools share one group semaphore and run one at a time across
+    tools. Results come back in the order of the tool_use blocks, ready to be
+    sent as a single user message.
+
+    The MCP server reports in each result's _meta how many warm providers and SDK
+    clients it reused and the setup time that saved, and whether a quote came
+    from its quote cache; the totals are kept in stats.
+
+    Results are compacted to the byte budget of the response before they are
+    returned, and readToolResult calls are answered locally from the store of
+    full results.
+
+    A call that fails because the session's transport is gone is reported to
+    on_transport_error (the pool's discard) so the session is not reused.
+    """
+
+    def __init__(self, limits: Dict[str, int] = None, default_limit: int = TOOL_CONCURRENCY_DEFAULT,
+                 compactor: Optional[ToolResultCompactor] = None, groups: Dict[str, str] = None,
+                 on_transport_error: Optional[Callable[[ClientSession], None]] = None):
+        self.limits = dict(TOOL_CONCURRENCY_LIMITS if limits is None else limits)
+        self.groups = dict(TOOL_GROUPS if groups is None else groups)
+        self.default_limit = default_limit
+        self.compactor = ToolResultCompactor() if compactor is None else compactor
+        self.on_transport_error = on_transport_error
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.stats: Dict[str, float] = {
+            "calls": 0,
+            "client_reuse_hits": 0,
+            "client_reuse_misses": 0,
+            "client_reuse_saved_ms": 0.0,
+            "quote_cache_hits": 0,
+        }
+
+    def _semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        # Grouped tools share the group's semaphore, others get one per name
+        key = self.groups.get(tool_name, tool_name)
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self.limits.get(key, self.default_limit))
+        return self._semaphores[key]
+
+    async def _call(self, session: ClientSession, tool_use, max_bytes: int) -> Dict[str, Any]:
+        if tool_use.name == READ_TOOL_RESULT:
+            found, text = self.compactor.read(tool_use.input, max_bytes)
+            tool_result = {
+                "type": "tool_result",
+                "tool_use_id": tool_use.id,
+                "content": text
+            }
+            if not found:
+                tool_result["is_error"] = True
+            return tool_result
+
+        async with self._semaphore(tool_use.name):
+            try:
+                result = await session.call_tool(tool_use.name, tool_use.input)
+                self._record_meta(tool_use.name, result.meta)
+                tool_result = {
+                    "type": "tool_result",
+                    "tool_use_id": tool_use.id,
+                    "content": self.compactor.compact(tool_use.name, result.content, max_bytes)
+                }
+                if result.isError:
+                    tool_result["is_error"] = True
+                return tool_result
+            except Exception as e:
+                if isinstance(e, MCP_TRANSPORT_ERRORS) and self.on_transport_error is not None:
+                    self.on_transport_error(session)
+                message = str(e) or type(e).__name__
+                print(f"Error calling tool {tool_use.name}: {message}")
+                return {
+                    "type": "tool_result",
+                    "tool_use_id": tool_use.id,
+                    "content": f"Error calling tool {tool_use.name}: {message}",
+                    "is_error": True
+                }
+
+    def _record_meta(self, tool_name: str, meta: Optional[Dict[str, Any]]):
+        self.stats["calls"] += 1
+        meta = meta or {}
+        quote_cache = meta.get("quoteCache")
+        if quote_cache and quote_cache.get("hit"):
+            self.stats["quote_cache_hits"] += 1
+            print(f"{tool_name}: quote served from cache ({quote_cache.get('ageMs', 0)} ms old)")
+        reuse = meta.get("clientReuse")
+        if not reuse:
+            return
+        self.stats["client_reuse_hits"] += reuse.get("hits", 0)
+        self.stats["client_reuse_misses"] += reuse.get("misses", 0)
+        self.stats["client_reuse_saved_ms"] += reuse.get("savedMs", 0.0)
+        print(f"{tool_name}: reused {reuse.get('hits', 0)} warm clients, "
+              f"created {reuse.get('misses', 0)}, saved {reuse.get('savedMs', 0.0):.0f} ms")
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get tool call statistics
+
+        Returns:
+            Dict: Tool calls, warm client reuses and creations, setup time saved in ms,
+                quote cache hits and result compaction
+        """
+        return {**self.stats, "compaction": self.compactor.get_stats()}
+
+    async def run(self, session: ClientSession, tool_uses: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Execute tool calls concurrently and gather their results in order
+
+        Args:
+            session (ClientSession): MCP session to call the tools on
+            tool_uses (List): tool_use content blocks from the assistant response
+
+        Returns:
+            List[Dict]: tool_result blocks in the same order as tool_uses, each within its share of the turn budget
+        """
+        max_bytes = self.compactor.budget(len(tool_uses))
+        return await asyncio.gather(*(self._call(session, tool_use, max_bytes) for tool_use in tool_uses))
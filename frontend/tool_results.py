@@ -0,0 +1,326 @@
+import os
+import json
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache import MISSING, TTLCache
+
+# Bytes of one tool result sent to the model, and of all results of one response
+TOOL_RESULT_MAX_BYTES = int(os.getenv("TOOL_RESULT_MAX_BYTES", "8000"))
+TOOL_RESULTS_TURN_MAX_BYTES = int(os.getenv("TOOL_RESULTS_TURN_MAX_BYTES", "24000"))
+
+# Smallest share of the turn budget a single result gets
+TOOL_RESULT_MIN_BYTES = 1000
+
+# Rough bytes per token of JSON, used to report budgets in tokens
+BYTES_PER_TOKEN = 4
+
+# Full results kept for readToolResult
+TOOL_RESULT_STORE_SIZE = 50
+TOOL_RESULT_STORE_TTL = 3600.0
+
+# Strings longer than this (calldata, logs bloom, ...) are cut when shrinking
+MAX_STRING_CHARS = 200
+
+READ_TOOL_RESULT = "readToolResult"
+
+READ_TOOL_RESULT_TOOL = {
+    "name": READ_TOOL_RESULT,
+    "description": (
+        "Read a page of the full output of an earlier tool call whose result was compacted. "
+        "Use the result id from the compaction note; pages are byte ranges of the raw text."
+    ),
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "resultId": {"type": "string", "description": "Result id from the compaction note"},
+            "offset": {"type": "integer", "description": "Byte offset to start reading at", "default": 0},
+            "length": {"type": "integer", "description": f"Bytes to read, at most {TOOL_RESULT_MAX_BYTES}"},
+        },
+        "required": ["resultId"],
+    },
+}
+
+
+def _pick(item: Any, keys: List[str]) -> Any:
+    if not isinstance(item, dict):
+        return item
+    return {key: item[key] for key in keys if key in item}
+
+
+def _items(data: Any, fn: Callable[[Any], Any]) -> Any:
+    """Apply fn to each item of a list, or of the "items" / "result" list of a response"""
+    if isinstance(data, list):
+        return [fn(item) for item in data]
+    if isinstance(data, dict):
+        for key in ("items", "result"):
+            if isinstance(data.get(key), list):
+                return {**data, key: [fn(item) for item in data[key]]}
+    return data
+
+
+def _without(data: Any, keys: List[str]) -> Any:
+    """Drop keys at any depth"""
+    if isinstance(data, dict):
+        return {key: _without(value, keys) for key, value in data.items() if key not in keys}
+    if isinstance(data, list):
+        return [_without(item, keys) for item in data]
+    return data
+
+
+def _project_transaction(tx: Any) -> Any:
+    if not isinstance(tx, dict):
+        return tx
+    projected = _pick(tx, ["transactionHash", "hash", "blockNumber", "from", "to", "value", "status",
+                           "functionSelector", "gasUsed", "timestamp"])
+    if isinstance(tx.get("logs"), list):
+        projected["logCount"] = len(tx["logs"])
+    return projected
+
+
+def _project_token(token: Any) -> Any:
+    if isinstance(token, dict) and isinstance(token.get("contract"), dict):
+        return {"balance": token.get("balance"),
+                **_pick(token["contract"], ["address", "symbol", "name", "decimals"])}
+    return _pick(token, ["chainId", "address", "symbol", "name", "decimals", "rating"])
+
+
+def _project_portfolio(data: Any) -> Any:
+    if isinstance(data, dict) and isinstance(data.get("result"), dict):
+        return {**data, "result": _pick(data["result"], ["total", "by_address", "by_chain", "by_category"])}
+    return data
+
+
+# Per-tool projections keeping the fields the model uses; they get the parsed
+# JSON of a text block and must not fail on unexpected shapes
+TOOL_PROJECTIONS: Dict[str, Callable[[Any], Any]] = {
+    "getTransactionsInBlock": lambda data: _items(data, _project_transaction),
+    "getTransactionByHash": _project_transaction,
+    "getTokensOwnedByAccount": lambda data: _items(data, _project_token),
+    "getTokenInfo": lambda data: _items(data, _project_token),
+    "getPortfolioData": _project_portfolio,
+    "getSwapQuote": lambda data: _without(data, ["whitelist", "points"]),
+    "getCrosschainSwapQuote": lambda data: _without(data, ["whitelist", "points"]),
+    "transferErc20Token": lambda data: _without(data, ["logs", "logsBloom"]),
+    "transferNativeToken": lambda data: _without(data, ["logs", "logsBloom"]),
+}
+
+
+def _shrink(data: Any, max_items: int, max_chars: int) -> Any:
+    """Cut lists to max_items (noting how many were dropped) and strings to max_chars"""
+    if isinstance(data, dict):
+        return {key: _shrink(value, max_items, max_chars) for key, value in data.items()}
+    if isinstance(data, list):
+        shrunk = [_shrink(item, max_items, max_chars) for item in data[:max_items]]
+        if len(data) > max_items:
+            shrunk.append(f"... {len(data) - max_items} more items")
+        return shrunk
+    if isinstance(data, str) and len(data) > max_chars:
+        return data[:max_chars] + f"... ({len(data)} chars)"
+    return data
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def fit_to_budget(tool_name: str, text: str, max_bytes: int) -> str:
+    """
+    Compact a tool result text to at most max_bytes
+
+    JSON results go through the tool's projection, then lists are halved (down
+    to no items) until the result fits. Anything still too large, or not JSON,
+    is cut and ends with a marker saying so, since a cut JSON text is no longer
+    valid JSON.
+
+    Args:
+        tool_name (str): Name of the tool that produced the text
+        text (str): Result text
+        max_bytes (int): Budget in UTF-8 bytes
+
+    Returns:
+        str: Compacted text
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = MISSING
+
+    if data is not MISSING:
+        projection = TOOL_PROJECTIONS.get(tool_name)
+        if projection is not None:
+            try:
+                data = projection(data)
+            except Exception as e:
+                print(f"Projection of {tool_name} result failed: {str(e)}")
+        compacted = _dumps(data)
+        max_items = 64
+        while len(compacted.encode()) > max_bytes and max_items >= 0:
+            compacted = _dumps(_shrink(data, max_items, MAX_STRING_CHARS))
+            max_items = max_items // 2 if max_items else -1
+        text = compacted
+
+    encoded = text.encode()
+    if len(encoded) > max_bytes:
+        marker = f"... [cut at {max_bytes} of {len(encoded)} bytes]"
+        text = encoded[:max(0, max_bytes - len(marker))].decode(errors="ignore") + marker
+    return text
+
+
+def _char_start(data: bytes, i: int) -> int:
+    """Move a byte index back to the start of the UTF-8 character it falls in"""
+    while 0 < i < len(data) and data[i] & 0xC0 == 0x80:
+        i -= 1
+    return i
+
+
+def _compaction_note(result_id: str, size: int, compacted_size: int) -> str:
+    return (f"[Result compacted from {size} to {compacted_size} bytes "
+            f"(~{compacted_size // BYTES_PER_TOKEN} tokens). Full result id {result_id}: "
+            f"call {READ_TOOL_RESULT} to page through it.]")
+
+
+class ToolResultStore:
+    """
+    Full tool results that were compacted before being sent to the model
+
+    Results are kept in memory for TOOL_RESULT_STORE_TTL seconds (at most
+    TOOL_RESULT_STORE_SIZE of them) and read back in pages with readToolResult.
+    """
+
+    def __init__(self, maxsize: int = TOOL_RESULT_STORE_SIZE, ttl: float = TOOL_RESULT_STORE_TTL):
+        self._results = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._ids = itertools.count(1)
+
+    def put(self, tool_name: str, text: str) -> str:
+        """Store a full result and return its id"""
+        result_id = f"{tool_name}-{next(self._ids)}"
+        self._results.set(result_id, text.encode())
+        return result_id
+
+    def read(self, result_id: str, offset: int = 0, length: int = TOOL_RESULT_MAX_BYTES,
+             max_bytes: int = TOOL_RESULT_MAX_BYTES) -> Tuple[bool, str]:
+        """
+        Read a page of a stored result
+
+        Pages are byte ranges of the UTF-8 text, moved back to character
+        boundaries, so a page plus its position line is at most max_bytes.
+
+        Args:
+            result_id (str): Id returned by put
+            offset (int): Byte offset of the page
+            length (int): Bytes in the page
+            max_bytes (int): Budget of the whole answer, position line included
+
+        Returns:
+            Tuple[bool, str]: Whether the result exists, and the page with its position or an error message
+        """
+        data = self._results.get(result_id)
+        if data is MISSING:
+            return False, f"Unknown or expired result id {result_id}"
+
+        def position(start: int, end: int) -> str:
+            text = f"[{result_id}: bytes {start}-{end} of {len(data)}"
+            return text + (f", next offset {end}]" if end < len(data) else ", end of result]")
+
+        # Room for the longest position line; a page holds at least one character
+        room = min(max_bytes, TOOL_RESULT_MAX_BYTES) - len(position(len(data), len(data) - 1)) - 1
+        length = max(4, min(length, room))
+        offset = _char_start(data, min(max(0, offset), len(data)))
+        end = _char_start(data, min(offset + length, len(data)))
+        if end == offset and end < len(data):
+            end = _char_start(data, min(offset + 4, len(data)))
+        return True, f"{position(offset, end)}\n{data[offset:end].decode()}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._results.get_stats()
+
+
+class ToolResultCompactor:
+    """
+    Keep tool results within a byte budget before they enter the message history
+
+    Every tool result is re-sent as input on each later turn, so large payloads
+    (blocks with logs, token lists, portfolios) are projected to the fields the
+    model needs and truncated. The results of one response share
+    TOOL_RESULTS_TURN_MAX_BYTES, and each one gets at most TOOL_RESULT_MAX_BYTES.
+    The full text of a compacted result stays in the store and the model is told
+    how to page through it with readToolResult.
+
+    Args:
+        store (Optional[ToolResultStore]): Store for full results
+        max_bytes (int): Budget of one result
+        turn_max_bytes (int): Budget of all results of one response
+    """
+
+    def __init__(self, store: Optional[ToolResultStore] = None, max_bytes: int = TOOL_RESULT_MAX_BYTES,
+                 turn_max_bytes: int = TOOL_RESULTS_TURN_MAX_BYTES):
+        self.store = ToolResultStore() if store is None else store
+        self.max_bytes = max_bytes
+        self.turn_max_bytes = turn_max_bytes
+        self.stats: Dict[str, int] = {
+            "results": 0,
+            "compacted": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+        }
+
+    def budget(self, n_results: int) -> int:
+        """Byte budget of each of n_results results of one response"""
+        share = self.turn_max_bytes // max(n_results, 1)
+        return max(TOOL_RESULT_MIN_BYTES, min(self.max_bytes, share))
+
+    def compact(self, tool_name: str, content: List[Any], max_bytes: int) -> List[Dict[str, Any]]:
+        """
+        Compact the content blocks of one tool result
+
+        Args:
+            tool_name (str): Name of the tool
+            content (List): MCP content blocks of the result
+            max_bytes (int): Budget for the text of the result
+
+        Returns:
+            List[Dict]: Content blocks for the tool_result, text blocks compacted
+        """
+        blocks = []
+        texts = []
+        for block in content:
+            if getattr(block, "type", None) == "text":
+                texts.append(block.text)
+            else:
+                blocks.append(block)
+        if not texts:
+            return blocks
+
+        text = "\n".join(texts)
+        size = len(text.encode())
+        self.stats["results"] += 1
+        self.stats["bytes_in"] += size
+        if size > max_bytes:
+            result_id = self.store.put(tool_name, text)
+            # The note is part of the budget; the compacted size in it is at most max_bytes
+            note_bytes = len(_compaction_note(result_id, size, max_bytes).encode()) + 1
+            compacted = fit_to_budget(tool_name, text, max(0, max_bytes - note_bytes))
+            text = f"{compacted}\n{_compaction_note(result_id, size, len(compacted.encode()))}"
+            self.stats["compacted"] += 1
+            print(f"{tool_name}: result compacted from {size} to {len(text.encode())} bytes ({result_id})")
+        self.stats["bytes_out"] += len(text.encode())
+        return [{"type": "text", "text": text}, *blocks]
+
+    def read(self, tool_input: Dict[str, Any], max_bytes: int) -> Tuple[bool, str]:
+        """Answer a readToolResult call from the store within the result's share of the turn budget"""
+        try:
+            offset = int(tool_input.get("offset", 0))
+            length = int(tool_input.get("length", max_bytes))
+        except (TypeError, ValueError):
+            return False, "offset and length must be integers"
+        return self.store.read(str(tool_input.get("resultId", "")), offset, length, max_bytes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get compaction statistics
+
+        Returns:
+            Dict: Results seen, results compacted, bytes before and after, and store statistics
+        """
+        return {**self.stats, "store": self.store.get_stats()}
@@ -0,0 +1,539 @@
+import numpy as np
+from datetime import datetime
+from decimal import Context, Decimal
+from typing import Any, Dict, Hashable, Iterator, List, Optional
+
+# Powers of ten for every possible token decimals value (uint8 in ERC-20), so
+# converting a balance never computes 10 ** decimals per token
+MAX_DECIMALS = 255
+FLOAT_SCALES = np.array([float(10 ** d) if d <= 308 else np.inf for d in range(MAX_DECIMALS + 1)], dtype=np.float64)
+
+# Integers up to here are exact in float64
+FLOAT_EXACT_LIMIT = float(2 ** 53)
+
+# Decimal places shown for a balance (small balances get SMALL_DISPLAY_DECIMALS)
+DISPLAY_DECIMALS = 4
+SMALL_DISPLAY_DECIMALS = 6
+
+# Amounts from here on have more displayed digits than float64 holds and are
+# formatted from the raw balance
+FLOAT_DISPLAY_LIMIT = FLOAT_EXACT_LIMIT / 10 ** DISPLAY_DECIMALS
+
+# Enough digits for any uint256 balance (78 digits), so Decimal results are exact
+_EXACT = Context(prec=100)
+
+
+def format_units(raw: int, decimals: int) -> Decimal:
+    """
+    Convert a raw on-chain balance to token units without losing precision
+
+    Args:
+        raw (int): Raw balance
+        decimals (int): Token decimals
+
+    Returns:
+        Decimal: Exact balance in token units
+    """
+    return Decimal(raw).scaleb(-decimals, _EXACT)
+
+
+def to_float_amounts(raw: np.ndarray, decimals: np.ndarray) -> np.ndarray:
+    """
+    Convert a column of raw balances to token units as float64, for display and sorting
+
+    Args:
+        raw (np.ndarray): Raw balances as Python ints
+        decimals (np.ndarray): Token decimals of every row
+
+    Returns:
+        np.ndarray: Balances in token units
+    """
+    return raw.astype(np.float64) / FLOAT_SCALES[decimals]
+
+
+class InternTable:
+    """
+    Assign a small integer to every distinct value, in first-seen order
+
+    Rows of a table store these integers instead of repeating chain ids,
+    token addresses or symbols.
+    """
+
+    def __init__(self):
+        self.values: List[Hashable] = []
+        self._index: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, i: int) -> Hashable:
+        return self.values[i]
+
+    def intern(self, value: Hashable) -> int:
+        """
+        Get the integer of a value, adding the value if it is new
+
+        Args:
+            value (Hashable): Value to intern
+
+        Returns:
+            int: Index of the value
+        """
+        i = self._index.get(value)
+        if i is None:
+            i = len(self.values)
+            self._index[value] = i
+            self.values.append(value)
+        return i
+
+    def get(self, value: Hashable) -> Optional[int]:
+        return self._index.get(value)
+
+
+class ChainTable:
+    """
+    Chains seen in a wallet query, in query order, with their display info and errors
+    """
+
+    def __init__(self):
+        self.ids = InternTable()
+        self.names: List[str] = []
+        self.errors: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, chain_data: Dict[str, Any]) -> int:
+        """
+        Intern the chain of a per-chain API result and record its error, if any
+
+        Args:
+            chain_data (Dict): Per-chain result with chain, chain_name and optional error
+
+        Returns:
+            int: Index of the chain
+        """
+        chain_id = chain_data.get("chain", "unknown")
+        i = self.ids.intern(chain_id)
+        if i == len(self.names):
+            self.names.append(chain_data.get("chain_name", f"Chain {chain_id}"))
+        if "error" in chain_data:
+            self.errors[i] = chain_data["error"]
+        return i
+
+
+class BalanceTable:
+    """
+    Token balances of a wallet across chains, stored as columns
+
+    Every row is one held token. Chains and tokens are interned, so a row is a
+    handful of numbers: chain index, token index, raw integer balance, decimals,
+    balance in token units and USD price. Sorting, filtering and USD totals run
+    on whole columns with numpy. The raw column is exact; the float amount
+    column is derived from it in one vectorized step and only used for display,
+    sorting and USD estimates.
+
+    Columns:
+        chain (int32): Index into chains
+        token (int32): Index into tokens / symbols / names / addresses
+        raw (object): Raw on-chain balance as a Python int (uint256 does not fit int64)
+        decimals (int16): Token decimals
+        amount (float64): Balance in token units
+        native (bool): True for the native token of the chain
+        price_usd (float64): USD price of one token, NaN if unknown
+    """
+
+    def __init__(self, chains: ChainTable, tokens: InternTable, symbols: List[str], names: List[str],
+                 chain: np.ndarray, token: np.ndarray, raw: np.ndarray, decimals: np.ndarray,
+                 amount: np.ndarray, native: np.ndarray, price_usd: np.ndarray):
+        self.chains = chains
+        self.tokens = tokens
+        self.symbols = symbols
+        self.names = names
+        self.chain = chain
+        self.token = token
+        self.raw = raw
+        self.decimals = decimals
+        self.amount = amount
+        self.native = native
+        self.price_usd = price_usd
+
+    def __len__(self) -> int:
+        return len(self.chain)
+
+    @classmethod
+    def from_balances(cls, balances: List[Dict[str, Any]]) -> "BalanceTable":
+        """
+        Build a table from per-chain results of get_1inch_token_balances
+
+        Args:
+            balances (List[Dict]): One result per chain, each with a tokens list
+
+        Returns:
+            BalanceTable: Balances of all chains
+        """
+        chains = ChainTable()
+        tokens = InternTable()
+        symbols: List[str] = []
+        names: List[str] = []
+        chain_col: List[int] = []
+        token_col: List[int] = []
+        raw_col: List[int] = []
+        decimals_col: List[int] = []
+        native_col: List[bool] = []
+
+        for chain_data in balances:
+            c = chains.add(chain_data)
+            chain_id = chains.ids[c]
+            for token_data in chain_data.get("tokens", []):
+                t = tokens.intern((chain_id, token_data.get("token_address", "").lower()))
+                if t == len(symbols):
+                    symbols.append(token_data.get("symbol", "Unknown"))
+                    names.append(token_data.get("name", "Unknown Token"))
+                chain_col.append(c)
+                token_col.append(t)
+                raw_col.append(int(token_data.get("balance", 0)))
+                decimals_col.append(int(token_data.get("decimals", 18)))
+                native_col.append(bool(token_data.get("native_token", False)))
+
+        raw = np.empty(len(raw_col), dtype=object)
+        raw[:] = raw_col
+        decimals = np.array(decimals_col, dtype=np.int16)
+        return cls(
+            chains, tokens, symbols, names,
+            chain=np.array(chain_col, dtype=np.int32),
+            token=np.array(token_col, dtype=np.int32),
+            raw=raw,
+            decimals=decimals,
+            amount=to_float_amounts(raw, decimals),
+            native=np.array(native_col, dtype=bool),
+            price_usd=np.full(len(chain_col), np.nan, dtype=np.float64),
+        )
+
+    def take(self, indices: np.ndarray) -> "BalanceTable":
+        """
+        Select rows by index or boolean mask, sharing the chain and token tables
+
+        Args:
+            indices (np.ndarray): Row indices or boolean mask
+
+        Returns:
+            BalanceTable: Selected rows
+        """
+        return BalanceTable(
+            self.chains, self.tokens, self.symbols, self.names,
+            chain=self.chain[indices],
+            token=self.token[indices],
+            raw=self.raw[indices],
+            decimals=self.decimals[indices],
+            amount=self.amount[indices],
+            native=self.native[indices],
+            price_usd=self.price_usd[indices],
+        )
+
+    def filter(self, chain_id: Any = None, min_amount: float = None, min_value_usd: float = None) -> "BalanceTable":
+        """
+        Keep rows on one chain and/or above an amount or USD value
+
+        Args:
+            chain_id (Any): Only keep this chain
+            min_amount (float): Only keep balances of at least this many tokens
+            min_value_usd (float): Only keep balances worth at least this much (unpriced rows are dropped)
+
+        Returns:
+            BalanceTable: Matching rows
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if chain_id is not None:
+            c = self.chains.ids.get(chain_id)
+            mask &= self.chain == (-1 if c is None else c)
+        if min_amount is not None:
+            mask &= self.amount >= min_amount
+        if min_value_usd is not None:
+            mask &= self.value_usd >= min_value_usd
+        return self.take(mask)
+
+    def sort(self) -> "BalanceTable":
+        """
+        Sort by chain (query order), native token first, then by descending value
+
+        The value is the USD value when any price is known, the token amount otherwise.
+
+        Returns:
+            BalanceTable: Sorted rows
+        """
+        value = self.value_usd
+        if np.isnan(value).all():
+            value = self.amount
+        order = np.lexsort((-np.nan_to_num(value, nan=-np.inf), ~self.native, self.chain))
+        return self.take(order)
+
+    def set_prices(self, chain_id: Any, prices: Dict[str, float]):
+        """
+        Set USD prices of tokens on one chain
+
+        Args:
+            chain_id (Any): Chain the prices belong to
+            prices (Dict[str, float]): USD price by token address
+        """
+        lookup = np.full(len(self.tokens), np.nan, dtype=np.float64)
+        for address, price in prices.items():
+            t = self.tokens.get((chain_id, address.lower()))
+            if t is not None:
+                lookup[t] = float(price)
+        priced = ~np.isnan(lookup[self.token])
+        self.price_usd[priced] = lookup[self.token][priced]
+
+    @property
+    def value_usd(self) -> np.ndarray:
+        """USD value of every row, NaN when the price is unknown"""
+        return self.amount * self.price_usd
+
+    def format_amounts(self) -> List[str]:
+        """
+        Format the balance of every row for display
+
+        Balances get 6 decimal places below 0.0001 and 4 otherwise. Balances whose
+        displayed digits do not fit in float64 (FLOAT_DISPLAY_LIMIT and up) are
+        formatted from the exact raw balance.
+
+        Returns:
+            List[str]: Formatted balances
+        """
+        small = ((self.amount > 0) & (self.amount < 10.0 ** -DISPLAY_DECIMALS)).tolist()
+        text = [f"{amount:.{SMALL_DISPLAY_DECIMALS}f}" if is_small else f"{amount:.{DISPLAY_DECIMALS}f}"
+                for amount, is_small in zip(self.amount.tolist(), small)]
+        for i in np.flatnonzero(self.amount >= FLOAT_DISPLAY_LIMIT).tolist():
+            text[i] = f"{format_units(self.raw[i], int(self.decimals[i])):.{DISPLAY_DECIMALS}f}"
+        return text
+
+    def exact_amounts(self) -> List[Decimal]:
+        """Balances of every row in token units, exact"""
+        return [format_units(raw, decimals) for raw, decimals in zip(self.raw, self.decimals.tolist())]
+
+    def total_raw(self, chain_id: Any, token_address: str) -> int:
+        """
+        Sum the exact raw balance of one token over all its rows
+
+        Args:
+            chain_id (Any): Chain of the token
+            token_address (str): Token address
+
+        Returns:
+            int: Total raw balance, 0 if the token is not in the table
+        """
+        t = self.tokens.get((chain_id, token_address.lower()))
+        if t is None:
+            return 0
+        return int(self.raw[self.token == t].sum())
+
+    def total_usd(self) -> float:
+        return float(np.nansum(self.value_usd))
+
+    def total_usd_by_chain(self) -> Dict[Any, float]:
+        """
+        Sum the USD value of priced rows per chain
+
+        Returns:
+            Dict: Total USD value by chain id, for every chain in the table
+        """
+        totals = np.bincount(self.chain, weights=np.nan_to_num(self.value_usd), minlength=len(self.chains))
+        return {self.chains.ids[i]: float(total) for i, total in enumerate(totals)}
+
+    def chain_slices(self) -> Iterator[tuple]:
+        """
+        Iterate over chains of a table sorted by chain
+
+        Yields:
+            tuple: (chain index, start row, end row) for every chain, including chains without rows
+        """
+        bounds = np.searchsorted(self.chain, np.arange(len(self.chains) + 1))
+        for c in range(len(self.chains)):
+            yield c, int(bounds[c]), int(bounds[c + 1])
+
+
+class HistoryTable:
+    """
+    Transactions of a wallet across chains, stored as columns
+
+    Columns:
+        chain (int32): Index into chains
+        timestamp (float64): Unix time in seconds, NaN if unknown
+        value (float64): Transferred amount in token units
+        sent (bool): True when the wallet is the sender
+        symbol (int32): Index into symbols
+        tx_hash (object): Transaction hash
+        partner (object): Counterparty address
+        time_text (object): Time as shown to the user
+    """
+
+    def __init__(self, chains: ChainTable, symbols: InternTable, chain: np.ndarray, timestamp: np.ndarray,
+                 value: np.ndarray, sent: np.ndarray, symbol: np.ndarray, tx_hash: np.ndarray,
+                 partner: np.ndarray, time_text: np.ndarray):
+        self.chains = chains
+        self.symbols = symbols
+        self.chain = chain
+        self.timestamp = timestamp
+        self.value = value
+        self.sent = sent
+        self.symbol = symbol
+        self.tx_hash = tx_hash
+        self.partner = partner
+        self.time_text = time_text
+
+    def __len__(self) -> int:
+        return len(self.chain)
+
+    @classmethod
+    def from_history(cls, history: List[Dict[str, Any]], wallet_address: str,
+                     chain_symbols: Dict[Any, str] = None) -> "HistoryTable":
+        """
+        Build a table from per-chain results of get_1inch_transaction_history
+
+        Args:
+            history (List[Dict]): One result per chain, each with a result list
+            wallet_address (str): Wallet the history belongs to
+            chain_symbols (Dict): Native token symbol by chain id, used when a transaction has none
+
+        Returns:
+            HistoryTable: Transactions of all chains
+        """
+        chain_symbols = chain_symbols or {}
+        wallet = wallet_address.lower()
+        chains = ChainTable()
+        symbols = InternTable()
+        rows: Dict[str, List[Any]] = {name: [] for name in
+                                      ("chain", "timestamp", "value", "sent", "symbol", "tx_hash", "partner", "time_text")}
+
+        for chain_data in history:
+            c = chains.add(chain_data)
+            chain_symbol = chain_symbols.get(chains.ids[c], "")
+            for tx in chain_data.get("result", []):
+                timestamp, time_text = _parse_timestamp(tx.get("timestamp", tx.get("timeStamp", "Unknown")))
+                from_address = tx.get("from", tx.get("fromAddress", "Unknown"))
+                to_address = tx.get("to", tx.get("toAddress", "Unknown"))
+                sent = from_address.lower() == wallet
+
+                rows["chain"].append(c)
+                rows["timestamp"].append(timestamp)
+                rows["value"].append(_parse_value(tx))
+                rows["sent"].append(sent)
+                rows["symbol"].append(symbols.intern(tx.get("tokenSymbol", chain_symbol)))
+                rows["tx_hash"].append(tx.get("hash", tx.get("txHash", "Unknown")))
+                rows["partner"].append(to_address if sent else from_address)
+                rows["time_text"].append(time_text)
+
+        def objects(values: List[Any]) -> np.ndarray:
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+            return column
+
+        return cls(
+            chains, symbols,
+            chain=np.array(rows["chain"], dtype=np.int32),
+            timestamp=np.array(rows["timestamp"], dtype=np.float64),
+            value=np.array(rows["value"], dtype=np.float64),
+            sent=np.array(rows["sent"], dtype=bool),
+            symbol=np.array(rows["symbol"], dtype=np.int32),
+            tx_hash=objects(rows["tx_hash"]),
+            partner=objects(rows["partner"]),
+            time_text=objects(rows["time_text"]),
+        )
+
+    def take(self, indices: np.ndarray) -> "HistoryTable":
+        """
+        Select rows by index or boolean mask, sharing the chain and symbol tables
+
+        Args:
+            indices (np.ndarray): Row indices or boolean mask
+
+        Returns:
+            HistoryTable: Selected rows
+        """
+        return HistoryTable(
+            self.chains, self.symbols,
+            chain=self.chain[indices],
+            timestamp=self.timestamp[indices],
+            value=self.value[indices],
+            sent=self.sent[indices],
+            symbol=self.symbol[indices],
+            tx_hash=self.tx_hash[indices],
+            partner=self.partner[indices],
+            time_text=self.time_text[indices],
+        )
+
+    def filter(self, chain_id: Any = None, sent: bool = None, since: float = None) -> "HistoryTable":
+        """
+        Keep transactions on one chain, in one direction and/or after a time
+
+        Args:
+            chain_id (Any): Only keep this chain
+            sent (bool): True for sent, False for received transactions
+            since (float): Only keep transactions at or after this Unix time
+
+        Returns:
+            HistoryTable: Matching rows
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if chain_id is not None:
+            c = self.chains.ids.get(chain_id)
+            mask &= self.chain == (-1 if c is None else c)
+        if sent is not None:
+            mask &= self.sent == sent
+        if since is not None:
+            mask &= self.timestamp >= since
+        return self.take(mask)
+
+    def sort(self, newest_first: bool = True) -> "HistoryTable":
+        """
+        Sort by chain (query order), then by time; transactions without a time go last
+
+        Args:
+            newest_first (bool): Newest transactions first within a chain
+
+        Returns:
+            HistoryTable: Sorted rows
+        """
+        timestamp = -self.timestamp if newest_first else self.timestamp
+        order = np.lexsort((np.nan_to_num(timestamp, nan=np.inf), self.chain))
+        return self.take(order)
+
+    def chain_slices(self) -> Iterator[tuple]:
+        """
+        Iterate over chains of a table sorted by chain
+
+        Yields:
+            tuple: (chain index, start row, end row) for every chain, including chains without rows
+        """
+        bounds = np.searchsorted(self.chain, np.arange(len(self.chains) + 1))
+        for c in range(len(self.chains)):
+            yield c, int(bounds[c]), int(bounds[c + 1])
+
+
+def _parse_timestamp(block_timestamp: Any) -> tuple:
+    # Convert from ISO string or Unix timestamp
+    try:
+        if isinstance(block_timestamp, str):
+            if block_timestamp.isdigit():
+                dt = datetime.fromtimestamp(int(block_timestamp))
+            else:
+                dt = datetime.fromisoformat(block_timestamp.replace('Z', '+00:00'))
+        elif isinstance(block_timestamp, (int, float)):
+            dt = datetime.fromtimestamp(block_timestamp)
+        else:
+            return np.nan, block_timestamp
+    except (ValueError, OverflowError, OSError):
+        return np.nan, block_timestamp
+    return dt.timestamp(), dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _parse_value(tx: Dict[str, Any]) -> float:
+    # If there is a tokenValue, use that instead of the native value
+    if "tokenValue" in tx:
+        return float(tx.get("tokenValue", "0"))
+    value = tx.get("value")
+    if isinstance(value, str) and value.isdigit():
+        return float(value) / 10**18  # Assuming 18 decimals for native token
+    if isinstance(value, (int, float)):
+        return float(value) / 10**18
+    return 0.0
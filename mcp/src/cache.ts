@@ -0,0 +1,83 @@
+// A cached value and whether it came from the cache
+export interface Cached<V> {
+  value: V;
+  hit: boolean;
+  ageMs: number;
+}
+
+interface Entry<V> {
+  value: Promise<V>;
+  createdAt: number;
+  // Infinity while the load is in flight
+  expiresAt: number;
+}
+
+/**
+ * In-memory LRU cache whose entries expire after a time-to-live
+ *
+ * Concurrent lookups of a missing key share one load; failed loads are not
+ * cached.
+ */
+export class TtlCache<V> {
+  private entries = new Map<string, Entry<V>>();
+  readonly stats = { hits: 0, misses: 0, evictions: 0 };
+
+  constructor(private ttlMs: number, private maxEntries = 500) {}
+
+  async get(key: string, load: () => Promise<V>): Promise<Cached<V>> {
+    const now = Date.now();
+    const cached = this.entries.get(key);
+    if (cached && cached.expiresAt > now) {
+      // Re-insert to mark as recently used
+      this.entries.delete(key);
+      this.entries.set(key, cached);
+      this.stats.hits += 1;
+      const value = await cached.value;
+      // A load that was in flight sets createdAt when it finishes, after `now`
+      return { value, hit: true, ageMs: Math.max(0, Date.now() - cached.createdAt) };
+    }
+
+    this.stats.misses += 1;
+    const entry: Entry<V> = { value: load(), createdAt: now, expiresAt: Infinity };
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    this.evict();
+    try {
+      const value = await entry.value;
+      entry.createdAt = Date.now();
+      entry.expiresAt = entry.createdAt + this.ttlMs;
+      return { value, hit: false, ageMs: 0 };
+    } catch (error) {
+      if (this.entries.get(key) === entry) {
+        this.entries.delete(key);
+      }
+      throw error;
+    }
+  }
+
+  private evict() {
+    for (const key of this.entries.keys()) {
+      if (this.entries.size <= this.maxEntries) {
+        break;
+      }
+      this.entries.delete(key);
+      this.stats.evictions += 1;
+    }
+  }
+}
+
+/**
+ * Run tasks with at most `limit` in flight, keeping results in input order
+ */
+export async function mapConcurrent<T, R>(items: T[], limit: number, fn: (item: T) => Promise<R>): Promise<R[]> {
+  const results: R[] = new Array(items.length);
+  let next = 0;
+  const workers = Array.from({ length: Math.min(limit, items.length) }, async () => {
+    while (next < items.length) {
+      const i = next++;
+      results[i] = await fn(items[i]);
+    }
+  });
+  await Promise.all(workers);
+  return results;
+}
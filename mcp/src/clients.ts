@@ -0,0 +1,108 @@
+import { SDK } from "@1inch/cross-chain-sdk";
+import { FusionSDK } from "@1inch/fusion-sdk";
+import { JsonRpcProvider, Network } from "ethers";
+
+// Clients reused during one tool call and the setup time that saved
+export interface ClientReuse {
+  hits: number;
+  misses: number;
+  savedMs: number;
+}
+
+export function newClientReuse(): ClientReuse {
+  return { hits: 0, misses: 0, savedMs: 0 };
+}
+
+export interface ClientRegistryConfig {
+  rpcUrl: (chainid: number) => string;
+  oneinchApiUrl: string;
+  oneinchApiKey: () => string;
+}
+
+interface Entry<T> {
+  client: Promise<T>;
+  // Time it took to create and warm the client, credited to every reuse
+  setupMs: number;
+}
+
+/**
+ * Warm JSON-RPC providers and 1inch SDK clients shared by every tool call
+ *
+ * Providers are created once per chain with a static network, so ethers never
+ * repeats chain detection, and are warmed with a first request that opens the
+ * connection. The quote-only Fusion and Fusion+ SDK clients are kept the same
+ * way. Each reuse is counted with the setup time it avoided.
+ */
+export class ClientRegistry {
+  private providers = new Map<number, Entry<JsonRpcProvider>>();
+  private fusionSdks = new Map<number, Entry<FusionSDK>>();
+  private crossChainSdks = new Map<string, Entry<SDK>>();
+  readonly stats: ClientReuse = newClientReuse();
+
+  constructor(private config: ClientRegistryConfig) {}
+
+  provider(chainid: number, reuse?: ClientReuse): Promise<JsonRpcProvider> {
+    return this.get(this.providers, chainid, reuse, async () => {
+      const network = Network.from(chainid);
+      const provider = new JsonRpcProvider(this.config.rpcUrl(chainid), network, { staticNetwork: network });
+      // Open the connection now; a failed warm-up is not fatal, the provider
+      // retries on its next request
+      await provider.getBlockNumber().catch((error) =>
+        console.error(`Warming up RPC provider for chain ${chainid} failed:`, error)
+      );
+      return provider;
+    });
+  }
+
+  fusionSdk(chainid: number, reuse?: ClientReuse): Promise<FusionSDK> {
+    return this.get(this.fusionSdks, chainid, reuse, async () => new FusionSDK({
+      url: `${this.config.oneinchApiUrl}/fusion`,
+      network: chainid,
+      authKey: this.config.oneinchApiKey(),
+    }));
+  }
+
+  crossChainSdk(reuse?: ClientReuse): Promise<SDK> {
+    return this.get(this.crossChainSdks, "fusion-plus", reuse, async () => new SDK({
+      url: `${this.config.oneinchApiUrl}/fusion-plus`,
+      authKey: this.config.oneinchApiKey(),
+    }));
+  }
+
+  private async get<K, T>(
+    cache: Map<K, Entry<T>>,
+    key: K,
+    reuse: ClientReuse | undefined,
+    create: () => Promise<T>
+  ): Promise<T> {
+    const cached = cache.get(key);
+    if (cached) {
+      this.count(reuse, true, cached.setupMs);
+      return cached.client;
+    }
+
+    const start = performance.now();
+    const entry: Entry<T> = { client: create(), setupMs: 0 };
+    cache.set(key, entry);
+    try {
+      await entry.client;
+    } catch (error) {
+      cache.delete(key);
+      throw error;
+    }
+    entry.setupMs = performance.now() - start;
+    this.count(reuse, false, 0);
+    return entry.client;
+  }
+
+  private count(reuse: ClientReuse | undefined, hit: boolean, savedMs: number) {
+    for (const target of reuse ? [this.stats, reuse] : [this.stats]) {
+      if (hit) {
+        target.hits += 1;
+        target.savedMs += savedMs;
+      } else {
+        target.misses += 1;
+      }
+    }
+  }
+}
@@ -0,0 +1,91 @@
+// Cached prices younger than this are served as is (about a block)
+const GAS_REFRESH_MS = Number(process.env.GAS_REFRESH_MS ?? "12000");
+
+// Cached prices older than this are fetched again before answering; in between
+// they are served while a refresh runs in the background
+const GAS_MAX_AGE_MS = Number(process.env.GAS_MAX_AGE_MS ?? "60000");
+
+export interface GasReading {
+  protocol: string;
+  gasPrice?: unknown;
+  ageMs?: number;
+  // Set when the last refresh failed; gasPrice is then the previous value, if any
+  error?: string;
+}
+
+interface Entry {
+  gasPrice?: unknown;
+  fetchedAt?: number;
+  error?: string;
+}
+
+/**
+ * Cached gas prices of every supported chain, refreshed on demand
+ *
+ * Reads are stale-while-revalidate: a price younger than GAS_REFRESH_MS is
+ * served from the cache, one younger than GAS_MAX_AGE_MS is served while a
+ * refresh of that protocol runs in the background, and anything older waits
+ * for the API. Only protocols that are read are fetched, at most once per
+ * GAS_REFRESH_MS, and nothing runs while nobody reads. A failed refresh keeps
+ * the previous value.
+ */
+export class GasOracle {
+  private entries = new Map<string, Entry>();
+  private inflight = new Map<string, Promise<void>>();
+  readonly stats = { hits: 0, staleHits: 0, misses: 0, refreshes: 0, errors: 0 };
+
+  constructor(readonly protocols: string[], private fetchGasPrice: (protocol: string) => Promise<unknown>) {}
+
+  async get(protocol: string): Promise<GasReading> {
+    const entry = this.entries.get(protocol);
+    const ageMs = entry?.fetchedAt === undefined ? Infinity : Date.now() - entry.fetchedAt;
+    if (ageMs < GAS_REFRESH_MS) {
+      this.stats.hits += 1;
+    } else if (ageMs < GAS_MAX_AGE_MS) {
+      this.stats.staleHits += 1;
+      this.refresh(protocol);
+    } else {
+      this.stats.misses += 1;
+      await this.refresh(protocol);
+    }
+    return this.reading(protocol);
+  }
+
+  getAll(): Promise<GasReading[]> {
+    return Promise.all(this.protocols.map((protocol) => this.get(protocol)));
+  }
+
+  private reading(protocol: string): GasReading {
+    const entry = this.entries.get(protocol) ?? {};
+    return {
+      protocol,
+      gasPrice: entry.gasPrice,
+      ageMs: entry.fetchedAt === undefined ? undefined : Date.now() - entry.fetchedAt,
+      error: entry.error,
+    };
+  }
+
+  // One refresh per protocol at a time; concurrent callers share it
+  private refresh(protocol: string): Promise<void> {
+    let refresh = this.inflight.get(protocol);
+    if (refresh === undefined) {
+      refresh = this.fetch(protocol).finally(() => this.inflight.delete(protocol));
+      this.inflight.set(protocol, refresh);
+    }
+    return refresh;
+  }
+
+  private async fetch(protocol: string) {
+    const entry = this.entries.get(protocol) ?? {};
+    this.entries.set(protocol, entry);
+    try {
+      entry.gasPrice = await this.fetchGasPrice(protocol);
+      entry.fetchedAt = Date.now();
+      entry.error = undefined;
+      this.stats.refreshes += 1;
+    } catch (error) {
+      entry.error = error instanceof Error ? error.message : String(error);
+      this.stats.errors += 1;
+    }
+  }
+}
@@ -2,7 +2,11 @@ import { McpServer } from "@modelcontextprotocol/sdk/server/mcp.js";
 import { SDK, HashLock, PrivateKeyProviderConnector, NetworkEnum } from "@1inch/cross-chain-sdk";
 import { FusionSDK, Web3Like } from "@1inch/fusion-sdk";
 import { ENV } from './env';
-import { ethers, solidityPackedKeccak256, randomBytes, Contract, Wallet, JsonRpcProvider } from 'ethers';
+import { ClientRegistry, ClientReuse, newClientReuse } from './clients';
+import { Cached, TtlCache, mapConcurrent } from './cache';
+import { OrderTracker } from './orderTracker';
+import { GasOracle } from './gasOracle';
+import { ethers, solidityPackedKeccak256, randomBytes, Contract, Wallet } from 'ethers';
 import { StdioServerTransport } from "@modelcontextprotocol/sdk/server/stdio.js";
 import { Web3 } from "web3";
 import { z } from "zod";
@@ -41,12 +45,35 @@ const approveABI = [{
   "type": "function"
 }];
 
+// Base URLs of the upstream APIs, overridable to point the server at a local
+// stand-in such as frontend/mock_server.py
+const ONEINCH_API_URL = (process.env.ONEINCH_API_URL ?? "https://api.1inch.dev").replace(/\/+$/, "");
+const NODIT_API_URL = (process.env.NODIT_API_URL ?? "https://web3.nodit.io").replace(/\/+$/, "");
+// Alchemy has one host per chain; when set, every chain uses `${ALCHEMY_RPC_URL}/${chainid}/<key>`
+const ALCHEMY_RPC_URL = process.env.ALCHEMY_RPC_URL?.replace(/\/+$/, "");
+
+type ApiKeyName = "ALCHEMY_APIKEY" | "ONEINCH_APIKEY" | "NODIT_APIKEY";
+
+// API keys are looked up on every call, environment variables first, so they
+// can be swapped without rebuilding env.ts
+function apiKey(name: ApiKeyName): string {
+  return process.env[name] ?? (ENV as Partial<Record<ApiKeyName, string>>)[name] ?? "";
+}
+
+function errorMessage(error: unknown): string {
+  return error instanceof Error ? error.message : String(error);
+}
+
 function getRandomBytes32() {
   // for some reason the cross-chain-sdk expects a leading 0x and can't handle a 32 byte long hex string
   return '0x' + Buffer.from(randomBytes(32)).toString('hex');
 }
 
 function getNodeRpcUrl(chainid: number) {
+  if (ALCHEMY_RPC_URL) {
+    return `${ALCHEMY_RPC_URL}/${chainid}/` + apiKey("ALCHEMY_APIKEY");
+  }
+
   let nodeRpc = ""
   if (chainid === NetworkEnum.ETHEREUM){
     nodeRpc = "https://eth-mainnet.g.alchemy.com/v2/";
@@ -65,18 +92,25 @@ function getNodeRpcUrl(chainid: number) {
   } else if (chainid === NetworkEnum.GNOSIS){
     nodeRpc = "https://gnosis-mainnet.g.alchemy.com/v2/"
   }
-  return nodeRpc + ENV.ALCHEMY_APIKEY;
+  return nodeRpc + apiKey("ALCHEMY_APIKEY");
 }
 
-async function getEnsAddress(ensDomain: string) {
-  const provider = new ethers.JsonRpcProvider("https://eth-mainnet.g.alchemy.com/v2/" + ENV.ALCHEMY_APIKEY);
+// Warm providers and SDK clients per chain, shared by every tool call
+const clients = new ClientRegistry({
+  rpcUrl: getNodeRpcUrl,
+  oneinchApiUrl: ONEINCH_API_URL,
+  oneinchApiKey: () => apiKey("ONEINCH_APIKEY"),
+});
+
+async function getEnsAddress(ensDomain: string, reuse?: ClientReuse) {
+  const provider = await clients.provider(NetworkEnum.ETHEREUM, reuse);
   const address = await provider.resolveName(ensDomain);
   return address;
 }
 
 // New function #1: Get tokens owned by account
 async function getTokensOwnedByAccount(accountAddress: string, contractAddresses?: string[]) {
-  const url = "https://web3.nodit.io/v1/ethereum/mainnet/token/getTokensOwnedByAccount";
+  const url = `${NODIT_API_URL}/v1/ethereum/mainnet/token/getTokensOwnedByAccount`;
 
   const request: Record<string, any> = {
     accountAddress: accountAddress
@@ -90,7 +124,7 @@ async function getTokensOwnedByAccount(accountAddress: string, contractAddresses
       const response = await axios.post(url, request, {
           headers: {
               "Content-Type": "application/json",
-              "X-API-KEY": ENV.NODIT_APIKEY,
+              "X-API-KEY": apiKey("NODIT_APIKEY"),
           }
       });
       return response.data;
@@ -101,7 +135,7 @@ async function getTokensOwnedByAccount(accountAddress: string, contractAddresses
 
 // New function #2: Get transactions in block
 async function getTransactionsInBlock(block: string, withLogs = true) {
-  const url = "https://web3.nodit.io/v1/ethereum/mainnet/blockchain/getTransactionsInBlock";
+  const url = `${NODIT_API_URL}/v1/ethereum/mainnet/blockchain/getTransactionsInBlock`;
   
   const request = {
       block: block,
@@ -112,7 +146,7 @@ async function getTransactionsInBlock(block: string, withLogs = true) {
       const response = await axios.post(url, request, {
           headers: {
               "Content-Type": "application/json",
-              "X-API-KEY": ENV.NODIT_APIKEY,
+              "X-API-KEY": apiKey("NODIT_APIKEY"),
           }
       });
       return response.data;
@@ -122,30 +156,35 @@ async function getTransactionsInBlock(block: string, withLogs = true) {
 }
 
 // New function #3: Get gas price for various protocols
+const GAS_PROTOCOLS = ["ethereum", "arbitrum", "optimism", "base"] as const;
+
+// Throws on failure so the gas oracle keeps its previous value
+async function fetchGasPrice(protocol: string) {
+  const url = `${NODIT_API_URL}/v1/${protocol}/mainnet/blockchain/getGasPrice`;
+  
+  const response = await axios.post(url, {}, {
+      headers: {
+          "accept": "application/json",
+          "Content-Type": "application/json",
+          "X-API-KEY": apiKey("NODIT_APIKEY"),
+      }
+  });
+  return response.data;
+}
+
+// Gas prices of all protocols, refreshed in the background while they are read
+const gasOracle = new GasOracle([...GAS_PROTOCOLS], fetchGasPrice);
+
 async function getGasPrice(protocol: string) {
   // Validate protocol
-  const validProtocols = ["ethereum", "arbitrum", "optimism", "base"];
-  if (!validProtocols.includes(protocol)) {
+  if (!gasOracle.protocols.includes(protocol)) {
       return {
           error: true,
-          message: `Invalid protocol: ${protocol}. Must be one of: ${validProtocols.join(", ")}`
+          message: `Invalid protocol: ${protocol}. Must be one of: ${gasOracle.protocols.join(", ")}`
       };
   }
   
-  const url = `https://web3.nodit.io/v1/${protocol}/mainnet/blockchain/getGasPrice`;
-  
-  try {
-      const response = await axios.post(url, {}, {
-          headers: {
-              "accept": "application/json",
-              "Content-Type": "application/json",
-              "X-API-KEY": ENV.NODIT_APIKEY,
-          }
-      });
-      return response.data;
-  } catch (error) {
-      return error;
-  }
+  return gasOracle.get(protocol);
 }
 
 async function getTransactionByHash(
@@ -163,7 +202,7 @@ async function getTransactionByHash(
     };
   }
   
-  const url = `https://web3.nodit.io/v1/${protocol}/mainnet/blockchain/getTransactionByHash`;
+  const url = `${NODIT_API_URL}/v1/${protocol}/mainnet/blockchain/getTransactionByHash`;
   
   // Define request object interface
   interface TransactionRequest {
@@ -184,7 +223,7 @@ async function getTransactionByHash(
       headers: {
         "accept": "application/json",
         "Content-Type": "application/json",
-        "X-API-KEY": ENV.NODIT_APIKEY,
+        "X-API-KEY": apiKey("NODIT_APIKEY"),
       }
     });
     return response.data;
@@ -194,11 +233,11 @@ async function getTransactionByHash(
 }
 
 async function getPortfolioData(addresses: string[], chainid: number) {
-  const url = "https://api.1inch.dev/portfolio/portfolio/v4/overview/protocols/current_value";
+  const url = `${ONEINCH_API_URL}/portfolio/portfolio/v4/overview/protocols/current_value`;
 
   const config = {
     headers: {
-      "Authorization": "Bearer " + ENV.ONEINCH_APIKEY
+      "Authorization": "Bearer " + apiKey("ONEINCH_APIKEY")
     },
     params: {
       "addresses": addresses,
@@ -220,11 +259,11 @@ async function getPortfolioData(addresses: string[], chainid: number) {
 }
 
 async function getWhitelistedTokenList() {
-  const url = "https://api.1inch.dev/token/v1.2/multi-chain/token-list";
+  const url = `${ONEINCH_API_URL}/token/v1.2/multi-chain/token-list`;
 
   const config = {
     headers: {
-      "Authorization": "Bearer " + ENV.ONEINCH_APIKEY
+      "Authorization": "Bearer " + apiKey("ONEINCH_APIKEY")
     }
   };
 
@@ -237,11 +276,11 @@ async function getWhitelistedTokenList() {
 }
 
 async function getTokenInfo(tokenName: string) {
-  const url = "https://api.1inch.dev/token/v1.2/search";
+  const url = `${ONEINCH_API_URL}/token/v1.2/search`;
 
   const config = {
     headers: {
-      "Authorization": "Bearer " + ENV.ONEINCH_APIKEY
+      "Authorization": "Bearer " + apiKey("ONEINCH_APIKEY")
     },
     params: {
       "query": tokenName,
@@ -262,10 +301,10 @@ async function getTokenAllowance(
   walletAddress: string, 
   chainid: number
 ) {
-  const url = `https://api.1inch.dev/swap/v6.0/${chainid}/approve/allowance`;
+  const url = `${ONEINCH_API_URL}/swap/v6.0/${chainid}/approve/allowance`;
   const config = {
     headers: {
-      "Authorization": "Bearer " + ENV.ONEINCH_APIKEY
+      "Authorization": "Bearer " + apiKey("ONEINCH_APIKEY")
     },
     params: {
       "tokenAddress": tokenAddress,
@@ -287,13 +326,13 @@ async function genApproveTokenTxData(
   amount: number | null,
   decimal: number,
 ) {
-  const url = `https://api.1inch.dev/swap/v6.0/${chainid}/approve/transaction-data`;
+  const url = `${ONEINCH_API_URL}/swap/v6.0/${chainid}/approve/transaction-data`;
   const config: {
     headers: { Authorization: string },
     params: { tokenAddress: string, amount?: string }
   } = {
     headers: {
-      "Authorization": "Bearer " + ENV.ONEINCH_APIKEY
+      "Authorization": "Bearer " + apiKey("ONEINCH_APIKEY")
     },
     params: {
       "tokenAddress": tokenAddress,
@@ -320,10 +359,10 @@ async function genSwapTxData(
   amount: number,
   decimal: number,
 ) {
-  const url = `https://api.1inch.dev/swap/v6.0/${chainid}/swap`;
+  const url = `${ONEINCH_API_URL}/swap/v6.0/${chainid}/swap`;
   const config = {
     headers: {
-      "Authorization": "Bearer " + ENV.ONEINCH_APIKEY
+      "Authorization": "Bearer " + apiKey("ONEINCH_APIKEY")
     },
     params: {
       "src": fromTokenAddress,
@@ -344,27 +383,38 @@ async function genSwapTxData(
 }
 
 
+// Quotes are reused for identical requests within this many milliseconds
+const QUOTE_CACHE_TTL_MS = Number(process.env.QUOTE_CACHE_TTL_MS ?? "5000");
+
+// Quote requests in flight at once, and quotes compared per tool call
+const QUOTE_CONCURRENCY = Number(process.env.QUOTE_CONCURRENCY ?? "4");
+const QUOTE_COMPARE_MAX = 12;
+
+type SwapQuote = Awaited<ReturnType<FusionSDK["getQuote"]>>;
+type CrosschainSwapQuote = Awaited<ReturnType<SDK["getQuote"]>>;
+
+const swapQuotes = new TtlCache<SwapQuote>(QUOTE_CACHE_TTL_MS);
+const crosschainSwapQuotes = new TtlCache<CrosschainSwapQuote>(QUOTE_CACHE_TTL_MS);
+
 async function getSwapQuote(
   fromTokenAddress: string, 
   toTokenAddress: string, 
   chainid: number,
   amount: number,
-  decimal: number
-) {
-  const sdk = new FusionSDK({
-    url: "https://api.1inch.dev/fusion",
-    network: chainid,
-    authKey: ENV.ONEINCH_APIKEY
-  });
-
+  decimal: number,
+  reuse?: ClientReuse
+): Promise<Cached<SwapQuote>> {
   const params = {
     fromTokenAddress,
     toTokenAddress,
     amount: (amount * 10 ** decimal).toString(),
   }
 
-  const quote = await sdk.getQuote(params);
-  return quote;
+  const key = [chainid, fromTokenAddress.toLowerCase(), toTokenAddress.toLowerCase(), params.amount].join(":");
+  return swapQuotes.get(key, async () => {
+    const sdk = await clients.fusionSdk(chainid, reuse);
+    return sdk.getQuote(params);
+  });
 }
 
 
@@ -374,13 +424,9 @@ async function getCrosschainSwapQuote(
   fromTokenAddress: string, 
   toTokenAddress: string, 
   amount: number,
-  decimal: number
-) {
-  const sdk = new SDK({
-    url: "https://api.1inch.dev/fusion-plus",
-    authKey: ENV.ONEINCH_APIKEY
-  });
-
+  decimal: number,
+  reuse?: ClientReuse
+): Promise<Cached<CrosschainSwapQuote>> {
   const params = {
     srcChainId: fromChainId,
     dstChainId: toChainId,
@@ -389,8 +435,89 @@ async function getCrosschainSwapQuote(
     amount: (amount * 10 ** decimal).toString(),
   }
 
-  const quote = await sdk.getQuote(params);
-  return quote;
+  const key = [
+    fromChainId, toChainId, fromTokenAddress.toLowerCase(), toTokenAddress.toLowerCase(), params.amount
+  ].join(":");
+  return crosschainSwapQuotes.get(key, async () => {
+    const sdk = await clients.crossChainSdk(reuse);
+    return sdk.getQuote(params);
+  });
+}
+
+interface QuoteDestination {
+  chainId: number;
+  tokenAddress: string;
+}
+
+interface RankedQuote {
+  rank?: number;
+  toChainId: number;
+  toTokenAddress: string;
+  amount: number;
+  dstAmount?: string;
+  usdIn?: number;
+  usdOut?: number;
+  // USD received per USD sent, the ranking key
+  efficiency?: number;
+  cached?: boolean;
+  error?: string;
+}
+
+// USD value of one side of a quote, from its `volume.usd` field
+function usdVolume(quote: unknown, side: string): number | undefined {
+  const volume = (quote as { volume?: { usd?: Record<string, unknown> } }).volume;
+  const value = Number(volume?.usd?.[side]);
+  return Number.isFinite(value) && value > 0 ? value : undefined;
+}
+
+// Fetch quotes for every amount and destination concurrently and rank them,
+// best USD out per USD in first; failed quotes are listed last with their error
+async function compareSwapQuotes(
+  fromChainId: number,
+  fromTokenAddress: string,
+  decimal: number,
+  amounts: number[],
+  destinations: QuoteDestination[],
+  reuse?: ClientReuse
+): Promise<RankedQuote[]> {
+  const requests = amounts.flatMap((amount) => destinations.map((destination) => ({ amount, destination })));
+
+  const quotes = await mapConcurrent(requests.slice(0, QUOTE_COMPARE_MAX), QUOTE_CONCURRENCY, async ({ amount, destination }) => {
+    const entry: RankedQuote = { toChainId: destination.chainId, toTokenAddress: destination.tokenAddress, amount };
+    try {
+      if (destination.chainId === fromChainId) {
+        const quote = await getSwapQuote(fromTokenAddress, destination.tokenAddress, fromChainId, amount, decimal, reuse);
+        entry.dstAmount = quote.value.toTokenAmount.toString();
+        entry.usdIn = usdVolume(quote.value, "fromToken");
+        entry.usdOut = usdVolume(quote.value, "toToken");
+        entry.cached = quote.hit;
+      } else {
+        const quote = await getCrosschainSwapQuote(
+          fromChainId, destination.chainId, fromTokenAddress, destination.tokenAddress, amount, decimal, reuse
+        );
+        entry.dstAmount = quote.value.dstTokenAmount.toString();
+        entry.usdIn = usdVolume(quote.value, "srcToken");
+        entry.usdOut = usdVolume(quote.value, "dstToken");
+        entry.cached = quote.hit;
+      }
+      if (entry.usdIn !== undefined && entry.usdOut !== undefined) {
+        entry.efficiency = entry.usdOut / entry.usdIn;
+      }
+    } catch (error) {
+      entry.error = errorMessage(error);
+    }
+    return entry;
+  });
+
+  const score = (quote: RankedQuote) =>
+    quote.error !== undefined ? -Infinity : quote.efficiency ?? quote.usdOut ?? 0;
+  quotes.sort((a, b) => score(b) - score(a));
+  quotes.forEach((quote, i) => {
+    if (quote.error === undefined) {
+      quote.rank = i + 1;
+    }
+  });
+  return quotes;
 }
 
 async function swap(
@@ -402,8 +529,7 @@ async function swap(
   walletAddress: string,
   privateKey: string,
 ) {
-  const nodeRpc = getNodeRpcUrl(chainid);
-  const ethersRpcProvider = new JsonRpcProvider(nodeRpc);
+  const ethersRpcProvider = await clients.provider(chainid);
 
   const ethersProviderConnector: Web3Like = {
       eth: {
@@ -425,9 +551,9 @@ async function swap(
   );
 
   const sdk = new FusionSDK({
-    url: "https://api.1inch.dev/fusion",
+    url: `${ONEINCH_API_URL}/fusion`,
     network: chainid,
-    authKey: ENV.ONEINCH_APIKEY,
+    authKey: apiKey("ONEINCH_APIKEY"),
     blockchainProvider
   });
 
@@ -442,6 +568,9 @@ async function swap(
 }
 
 
+// Follows placed Fusion+ orders and submits their secrets
+const orderTracker = new OrderTracker();
+
 async function crossChainSwap(
   fromChainId: number,
   toChainId: number,
@@ -451,11 +580,9 @@ async function crossChainSwap(
   decimal: number,
   walletAddress: string,
   privateKey: string,
-) {
-  let rtMsg = "";
-  
-  const nodeRpc = getNodeRpcUrl(fromChainId);
-  const ethersRpcProvider = new JsonRpcProvider(nodeRpc);
+  reuse?: ClientReuse,
+): Promise<{ orderHash?: string; message: string }> {
+  const ethersRpcProvider = await clients.provider(fromChainId, reuse);
 
   const ethersProviderConnector: Web3Like = {
       eth: {
@@ -468,8 +595,8 @@ async function crossChainSwap(
   
   const blockchainProvider = new PrivateKeyProviderConnector(privateKey, ethersProviderConnector);
   const sdk = new SDK({
-    url: "https://api.1inch.dev/fusion-plus",
-    authKey: ENV.ONEINCH_APIKEY,
+    url: `${ONEINCH_API_URL}/fusion-plus`,
+    authKey: apiKey("ONEINCH_APIKEY"),
     blockchainProvider
   });
 
@@ -491,93 +618,47 @@ async function crossChainSwap(
     enableEstimate: true,
   }
 
-  sdk.getQuote(params).then(quote => {
-    const secretsCount = quote.getPreset().secretsCount;
-
-    const secrets = Array.from({ length: secretsCount }).map(() => getRandomBytes32());
-    const secretHashes = secrets.map(x => HashLock.hashSecret(x));
-
-    const hashLock =
-      secretsCount === 1
-        ? HashLock.forSingleFill(secrets[0])
-        : HashLock.forMultipleFills(
-            secretHashes.map((secretHash, i) =>
-              solidityPackedKeccak256(["uint64", "bytes32"], [i, secretHash.toString()])
-            ) as (string & {
-              _tag: "MerkleLeaf";
-            })[]
-          );
-
-
-    console.log("Received Fusion+ quote from 1inch API");
-
-    sdk.placeOrder(quote, {
-        walletAddress: walletAddress,
-        hashLock,
-        secretHashes
-    }).then(quoteResponse => {
-
-        const orderHash = quoteResponse.orderHash;
-
-        console.log(`Order successfully placed`);
-
-        const intervalId = setInterval(() => {
-            console.log(`Polling for fills until order status is set to "executed"...`);
-            sdk.getOrderStatus(orderHash).then(order => {
-                    if (order.status === 'executed') {
-                        console.log(`Order is complete. Exiting.`);
-                        clearInterval(intervalId);
-                        rtMsg = "Order is complete";
-                    }
-                }
-            ).catch(error =>
-                console.error(`Error: ${JSON.stringify(error, null, 2)}`)
-            );
-
-            sdk.getReadyToAcceptSecretFills(orderHash)
-                .then((fillsObject) => {
-                    if (fillsObject.fills.length > 0) {
-                        fillsObject.fills.forEach(fill => {
-                            sdk.submitSecret(orderHash, secrets[fill.idx])
-                                .then(() => {
-                                    console.log(`Fill order found! Secret submitted: ${JSON.stringify(secretHashes[fill.idx], null, 2)}`);
-                                })
-                                .catch((error) => {
-                                    console.error(`Error submitting secret: ${JSON.stringify(error, null, 2)}`);
-                                });
-                        });
-                    }
-                })
-                .catch((error) => {
-                    if (error.response) {
-                        // The request was made and the server responded with a status code
-                        // that falls out of the range of 2xx
-                        console.error('Error getting ready to accept secret fills:', {
-                            status: error.response.status,
-                            statusText: error.response.statusText,
-                            data: error.response.data
-                        });
-                        rtMsg = 'Error getting ready to accept secret fills'
-                    } else if (error.request) {
-                        // The request was made but no response was received
-                        console.error('No response received:', error.request);
-                        rtMsg = 'No response received when submitting secret'
-                    } else {
-                        // Something happened in setting up the request that triggered an Error
-                        console.error('Error', error.message);
-                        rtMsg =  'Error when submitting secret'
-                    }
-                });
-        }, 5000);
-      }).catch((error) => {
-          console.dir(error, { depth: null });
-          rtMsg = "Error placing order"
-      });
-  }).catch((error) => {
-      console.dir(error, { depth: null });
-      rtMsg = "Error getting quote"
-  });
-  return rtMsg;
+  let quote: CrosschainSwapQuote;
+  try {
+    quote = await sdk.getQuote(params);
+  } catch (error) {
+    console.error("Error getting quote:", error);
+    return { message: `Error getting quote: ${errorMessage(error)}` };
+  }
+  console.error("Received Fusion+ quote from 1inch API");
+
+  const secretsCount = quote.getPreset().secretsCount;
+
+  const secrets = Array.from({ length: secretsCount }).map(() => getRandomBytes32());
+  const secretHashes = secrets.map(x => HashLock.hashSecret(x));
+
+  const hashLock =
+    secretsCount === 1
+      ? HashLock.forSingleFill(secrets[0])
+      : HashLock.forMultipleFills(
+          secretHashes.map((secretHash, i) =>
+            solidityPackedKeccak256(["uint64", "bytes32"], [i, secretHash.toString()])
+          ) as (string & {
+            _tag: "MerkleLeaf";
+          })[]
+        );
+
+  let orderHash: string;
+  try {
+    ({ orderHash } = await sdk.placeOrder(quote, {
+      walletAddress: walletAddress,
+      hashLock,
+      secretHashes
+    }));
+  } catch (error) {
+    console.error("Error placing order:", error);
+    return { message: `Error placing order: ${errorMessage(error)}` };
+  }
+  console.error(`Order successfully placed`);
+
+  // The tracker submits the secrets as fills become ready
+  orderTracker.track(orderHash, sdk, secrets);
+  return { orderHash, message: "Order placed. Use getOrderProgress to follow it until it is executed." };
 }
 
 async function transferNativeToken(
@@ -585,10 +666,10 @@ async function transferNativeToken(
   amount: number,
   privateKey: string,
   chainId: number,
+  reuse?: ClientReuse,
 ) {
   try {
-    const nodeRpc = getNodeRpcUrl(chainId);
-    const provider = new JsonRpcProvider(nodeRpc);
+    const provider = await clients.provider(chainId, reuse);
     const wallet = new Wallet(privateKey, provider);
 
     // Convert the amount to Wei (the smallest unit)
@@ -621,10 +702,10 @@ async function transferERC20Token(
   decimal: number,
   privateKey: string,
   chainId: number,
+  reuse?: ClientReuse,
 ) {
   try {
-    const nodeRpc = getNodeRpcUrl(chainId);
-    const provider = new JsonRpcProvider(nodeRpc);
+    const provider = await clients.provider(chainId, reuse);
     const wallet = new Wallet(privateKey, provider);
     const tokenContract = new Contract(tokenAddress, transferABI, wallet);
 
@@ -658,7 +739,8 @@ server.tool(
     ensDomain: z.string().describe("ENS domain to resolve"),
   },
   async ({ ensDomain }) => {
-    const address = await getEnsAddress(ensDomain);
+    const reuse = newClientReuse();
+    const address = await getEnsAddress(ensDomain, reuse);
 
     return {
       content: [
@@ -667,6 +749,7 @@ server.tool(
           text: address || "Address not found",
         },
       ],
+      _meta: { clientReuse: reuse },
     };
   }
 )
@@ -732,9 +815,10 @@ server.tool(
     decimal: z.number().describe("The decimal of the source token"),
   },
   async ({ fromTokenAddress, toTokenAddress, chainid, amount, decimal }) => {
-    const quote = await getSwapQuote(fromTokenAddress, toTokenAddress, chainid, amount, decimal);
+    const reuse = newClientReuse();
+    const quote = await getSwapQuote(fromTokenAddress, toTokenAddress, chainid, amount, decimal, reuse);
     
-    const json = JSON.stringify(quote, (_key, value) =>
+    const json = JSON.stringify(quote.value, (_key, value) =>
       typeof value === "bigint" ? value.toString() : value
     );
 
@@ -745,6 +829,7 @@ server.tool(
           text: json || "Cannot fetch swap quote",
         },
       ],
+      _meta: { clientReuse: reuse, quoteCache: { hit: quote.hit, ageMs: quote.ageMs } },
     };
   }
 )
@@ -761,9 +846,10 @@ server.tool(
     decimal: z.number().describe("The decimal of the source token"),
   },
   async ({ fromChainId, toChainId, fromTokenAddress, toTokenAddress, amount, decimal }) => {
-    const quote = await getCrosschainSwapQuote(fromChainId, toChainId, fromTokenAddress, toTokenAddress, amount, decimal);
+    const reuse = newClientReuse();
+    const quote = await getCrosschainSwapQuote(fromChainId, toChainId, fromTokenAddress, toTokenAddress, amount, decimal, reuse);
 
-    const json = JSON.stringify(quote, (_key, value) =>
+    const json = JSON.stringify(quote.value, (_key, value) =>
       typeof value === "bigint" ? value.toString() : value
     );
 
@@ -774,6 +860,37 @@ server.tool(
           text: json || "Cannot fetch swap quote",
         },
       ],
+      _meta: { clientReuse: reuse, quoteCache: { hit: quote.hit, ageMs: quote.ageMs } },
+    };
+  }
+)
+
+server.tool(
+  "compareSwapQuotes",
+  "Compare swap quotes for several amounts and/or destination chains in one call. Quotes are fetched concurrently and ranked by USD received per USD sent; destinations on the source chain use a same-chain swap, others a crosschain swap.",
+  {
+    fromChainId: z.number().describe("Source chain ID"),
+    fromTokenAddress: z.string().describe("Source token address"),
+    decimal: z.number().describe("The decimal of the source token"),
+    amounts: z.array(z.number()).min(1).describe("Amounts of the source token to quote"),
+    destinations: z.array(z.object({
+      chainId: z.number().describe("Destination chain ID"),
+      tokenAddress: z.string().describe("Destination token address on that chain"),
+    })).min(1).describe("Destination chains and tokens to quote"),
+  },
+  async ({ fromChainId, fromTokenAddress, decimal, amounts, destinations }) => {
+    const reuse = newClientReuse();
+    const quotes = await compareSwapQuotes(fromChainId, fromTokenAddress, decimal, amounts, destinations, reuse);
+    const skipped = amounts.length * destinations.length - quotes.length;
+
+    return {
+      content: [
+        {
+          type: "text",
+          text: JSON.stringify({ quotes, ...(skipped > 0 ? { skipped } : {}) }),
+        },
+      ],
+      _meta: { clientReuse: reuse },
     };
   }
 )
@@ -792,19 +909,49 @@ server.tool(
     privateKey: z.string().describe("Private key"),
   },
   async ({ fromChainId, toChainId, fromTokenAddress, toTokenAddress, amount, decimal, walletAddress, privateKey }) => {
-    let response = await crossChainSwap(fromChainId, toChainId, fromTokenAddress, toTokenAddress, amount, decimal, walletAddress, privateKey);
+    const reuse = newClientReuse();
+    const response = await crossChainSwap(fromChainId, toChainId, fromTokenAddress, toTokenAddress, amount, decimal, walletAddress, privateKey, reuse);
 
     return {
       content: [
         {
           type: "text",
-          text: response,
+          text: JSON.stringify(response),
         },
       ],
+      isError: response.orderHash === undefined,
+      _meta: { clientReuse: reuse },
     };
   } 
 )
 
+server.tool(
+  "getOrderProgress",
+  "Get the progress of crosschain swap orders placed with crossChainSwap (status, submitted secrets, recent events). With waitMs it waits for the next change of the order before answering.",
+  {
+    orderHash: z.string().optional().describe("Order hash returned by crossChainSwap; all tracked orders when omitted"),
+    waitMs: z.number().optional().default(0).describe("Wait up to this many milliseconds (at most 30000) for the order to change"),
+  },
+  async ({ orderHash, waitMs }) => {
+    if (orderHash !== undefined && waitMs > 0) {
+      await orderTracker.waitForChange(orderHash, Math.min(waitMs, 30000));
+    }
+    const progress = orderTracker.progress(orderHash);
+
+    return {
+      content: [
+        {
+          type: "text",
+          text: progress.length > 0
+            ? JSON.stringify(orderHash === undefined ? progress : progress[0])
+            : orderHash === undefined ? "No tracked orders" : `Order ${orderHash} is not tracked`,
+        },
+      ],
+      _meta: { orderTracker: orderTracker.stats },
+    };
+  }
+)
+
 server.tool(
   "transferErc20Token",
   "Transfer ERC20 Token",
@@ -817,7 +964,8 @@ server.tool(
     chainId: z.number().describe("Chain ID"),
   },
   async ({ tokenAddress, toAddress, amount, decimal, privateKey, chainId }) => {
-    const receipt = await transferERC20Token(tokenAddress, toAddress, amount, decimal, privateKey, chainId);
+    const reuse = newClientReuse();
+    const receipt = await transferERC20Token(tokenAddress, toAddress, amount, decimal, privateKey, chainId, reuse);
     return {
       content: [
         {
@@ -825,6 +973,7 @@ server.tool(
           text: JSON.stringify(receipt) || "Cannot transfer token",
         },
       ],
+      _meta: { clientReuse: reuse },
     };
   }
 )
@@ -839,7 +988,8 @@ server.tool(
     chainId: z.number().describe("Chain ID of the blockchain network"),
   },
   async ({ toAddress, amount, privateKey, chainId }) => {
-    const receipt = await transferNativeToken(toAddress, amount, privateKey, chainId);
+    const reuse = newClientReuse();
+    const receipt = await transferNativeToken(toAddress, amount, privateKey, chainId, reuse);
     return {
       content: [
         {
@@ -847,6 +997,7 @@ server.tool(
           text: JSON.stringify(receipt) || "Cannot transfer native token",
         },
       ],
+      _meta: { clientReuse: reuse },
     };
   }
 );
@@ -889,8 +1040,8 @@ server.tool("getTransactionsInBlock", "Get all transactions from a specific Ethe
 });
 
 // Add new tool #3: getGasPrice
-server.tool("getGasPrice", "Get current gas price for a specific blockchain protocol", {
-  protocol: z.enum(["ethereum", "arbitrum", "optimism", "base"]).describe("Blockchain protocol (ethereum, arbitrum, optimism, or base)"),
+server.tool("getGasPrice", "Get current gas price for a specific blockchain protocol; ageMs tells how old the cached price is", {
+  protocol: z.enum(GAS_PROTOCOLS).describe("Blockchain protocol (ethereum, arbitrum, optimism, or base)"),
 }, async ({ protocol }) => {
   const gasData = await getGasPrice(protocol);
   return {
@@ -900,6 +1051,21 @@ server.tool("getGasPrice", "Get current gas price for a specific blockchain prot
               text: JSON.stringify(gasData) || "Cannot fetch gas price data",
           },
       ],
+      _meta: { gasOracle: gasOracle.stats },
+  };
+});
+
+server.tool("getAllGasPrices", "Get current gas prices of all supported protocols (ethereum, arbitrum, optimism, base) in one call; ageMs tells how old each cached price is", {
+}, async () => {
+  const gasData = await gasOracle.getAll();
+  return {
+      content: [
+          {
+              type: "text",
+              text: JSON.stringify(gasData),
+          },
+      ],
+      _meta: { gasOracle: gasOracle.stats },
   };
 });
 
@@ -0,0 +1,293 @@
+// Bounds of the per-order poll interval; it grows by ORDER_POLL_BACKOFF while an
+// order shows no progress and drops back to the minimum when it does
+const ORDER_POLL_MIN_MS = Number(process.env.ORDER_POLL_MIN_MS ?? "2000");
+const ORDER_POLL_MAX_MS = Number(process.env.ORDER_POLL_MAX_MS ?? "30000");
+const ORDER_POLL_BACKOFF = 1.5;
+
+// API calls allowed per poll round across all orders, secret submissions
+// included; orders and secrets over the budget wait for the next round, which
+// starts at least ORDER_POLL_MIN_MS after the previous one
+const ORDER_POLL_MAX_CALLS = Number(process.env.ORDER_POLL_MAX_CALLS ?? "10");
+
+// Orders are dropped after this many consecutive failed polls or this long
+const ORDER_MAX_FAILURES = 5;
+const ORDER_MAX_AGE_MS = 2 * 60 * 60 * 1000;
+
+// Finished orders kept for getOrderProgress
+const ORDER_HISTORY_SIZE = 100;
+const ORDER_EVENTS_SIZE = 20;
+
+const TERMINAL_STATUSES = new Set(["executed", "expired", "refunded", "cancelled"]);
+
+// The part of the Fusion+ SDK the tracker needs
+export interface OrderApi {
+  getOrderStatus(orderHash: string): Promise<{ status: string }>;
+  getReadyToAcceptSecretFills(orderHash: string): Promise<{ fills: { idx: number }[] }>;
+  submitSecret(orderHash: string, secret: string): Promise<void>;
+}
+
+export interface OrderProgress {
+  orderHash: string;
+  status: string;
+  done: boolean;
+  secretsSubmitted: number;
+  secretsTotal: number;
+  polls: number;
+  ageMs: number;
+  lastCheckedMsAgo?: number;
+  nextCheckInMs?: number;
+  error?: string;
+  events: { atMsAgo: number; message: string }[];
+}
+
+interface TrackedOrder {
+  orderHash: string;
+  api: OrderApi;
+  secrets: string[];
+  submitted: Set<number>;
+  status: string;
+  done: boolean;
+  placedAt: number;
+  checkedAt?: number;
+  nextCheckAt: number;
+  intervalMs: number;
+  polls: number;
+  failures: number;
+  // Set when ready fills were left for the next round by the call budget
+  secretsDeferred: boolean;
+  error?: string;
+  events: { at: number; message: string }[];
+}
+
+/**
+ * Follow placed Fusion+ orders until they finish, submitting their secrets
+ *
+ * One timer serves every order: each round polls the orders that are due, up
+ * to ORDER_POLL_MAX_CALLS API calls, concurrently, and rounds are at least
+ * ORDER_POLL_MIN_MS apart. An order's poll interval
+ * backs off while nothing happens and resets when its status changes or a
+ * secret is submitted, so many idle orders cost a bounded number of calls.
+ */
+export class OrderTracker {
+  private orders = new Map<string, TrackedOrder>();
+  private waiters = new Map<string, Set<() => void>>();
+  private timer?: NodeJS.Timeout;
+  private timerAt = Infinity;
+  private roundStartedAt = -Infinity;
+  private polling = false;
+  readonly stats = { rounds: 0, apiCalls: 0, errors: 0 };
+
+  track(orderHash: string, api: OrderApi, secrets: string[]) {
+    const now = Date.now();
+    this.orders.set(orderHash, {
+      orderHash,
+      api,
+      secrets,
+      submitted: new Set(),
+      status: "placed",
+      done: false,
+      placedAt: now,
+      nextCheckAt: now + ORDER_POLL_MIN_MS,
+      intervalMs: ORDER_POLL_MIN_MS,
+      polls: 0,
+      failures: 0,
+      secretsDeferred: false,
+      events: [{ at: now, message: "Order placed" }],
+    });
+    this.prune();
+    this.schedule();
+  }
+
+  /**
+   * Progress of one tracked order, or of all of them newest first
+   */
+  progress(orderHash?: string): OrderProgress[] {
+    const orders = orderHash === undefined
+      ? [...this.orders.values()].reverse()
+      : [this.orders.get(orderHash)].filter((order): order is TrackedOrder => order !== undefined);
+    const now = Date.now();
+    return orders.map((order) => ({
+      orderHash: order.orderHash,
+      status: order.status,
+      done: order.done,
+      secretsSubmitted: order.submitted.size,
+      secretsTotal: order.secrets.length,
+      polls: order.polls,
+      ageMs: now - order.placedAt,
+      lastCheckedMsAgo: order.checkedAt === undefined ? undefined : now - order.checkedAt,
+      nextCheckInMs: order.done ? undefined : Math.max(0, order.nextCheckAt - now),
+      error: order.error,
+      events: order.events.map((event) => ({ atMsAgo: now - event.at, message: event.message })),
+    }));
+  }
+
+  /**
+   * Resolve on the next event of an order, or after timeoutMs
+   */
+  waitForChange(orderHash: string, timeoutMs: number): Promise<void> {
+    const order = this.orders.get(orderHash);
+    if (order === undefined || order.done) {
+      return Promise.resolve();
+    }
+    return new Promise((resolve) => {
+      const waiters = this.waiters.get(orderHash) ?? new Set();
+      this.waiters.set(orderHash, waiters);
+      const done = () => {
+        clearTimeout(timeout);
+        waiters.delete(done);
+        resolve();
+      };
+      const timeout = setTimeout(done, timeoutMs);
+      waiters.add(done);
+    });
+  }
+
+  private record(order: TrackedOrder, message: string) {
+    order.events.push({ at: Date.now(), message });
+    if (order.events.length > ORDER_EVENTS_SIZE) {
+      order.events.splice(0, order.events.length - ORDER_EVENTS_SIZE);
+    }
+    for (const notify of [...(this.waiters.get(order.orderHash) ?? [])]) {
+      notify();
+    }
+  }
+
+  private finish(order: TrackedOrder, message: string, error?: string) {
+    order.done = true;
+    order.error = error;
+    this.record(order, message);
+    this.waiters.delete(order.orderHash);
+  }
+
+  // Drop the oldest finished orders beyond ORDER_HISTORY_SIZE
+  private prune() {
+    let excess = this.orders.size - ORDER_HISTORY_SIZE;
+    for (const [orderHash, order] of this.orders) {
+      if (excess <= 0) {
+        break;
+      }
+      if (order.done) {
+        this.orders.delete(orderHash);
+        excess -= 1;
+      }
+    }
+  }
+
+  private schedule() {
+    if (this.polling) {
+      return;
+    }
+    let nextAt = Infinity;
+    for (const order of this.orders.values()) {
+      if (!order.done) {
+        nextAt = Math.min(nextAt, order.nextCheckAt);
+      }
+    }
+    if (nextAt === Infinity) {
+      return;
+    }
+    // Orders left over by the call budget wait for the next round too
+    nextAt = Math.max(nextAt, this.roundStartedAt + ORDER_POLL_MIN_MS);
+    if (nextAt >= this.timerAt) {
+      return;
+    }
+    clearTimeout(this.timer);
+    this.timerAt = nextAt;
+    this.timer = setTimeout(() => this.round(), Math.max(0, nextAt - Date.now()));
+  }
+
+  private async round() {
+    this.timer = undefined;
+    this.timerAt = Infinity;
+    this.polling = true;
+    this.stats.rounds += 1;
+    try {
+      const now = Date.now();
+      this.roundStartedAt = now;
+      // Orders with secrets held back by the budget go first
+      const due = [...this.orders.values()]
+        .filter((order) => !order.done && order.nextCheckAt <= now)
+        .sort((a, b) => Number(b.secretsDeferred) - Number(a.secretsDeferred) || a.nextCheckAt - b.nextCheckAt);
+
+      // A poll reserves a status call and a fills call, plus a submission if
+      // it has deferred secrets; further submissions take what is left
+      const budget = { calls: ORDER_POLL_MAX_CALLS };
+      const batch: TrackedOrder[] = [];
+      for (const order of due) {
+        const cost = order.secretsDeferred ? 3 : 2;
+        if (batch.length > 0 && cost > budget.calls) {
+          break;
+        }
+        budget.calls -= cost;
+        batch.push(order);
+      }
+      await Promise.all(batch.map((order) => this.poll(order, budget, order.secretsDeferred ? 1 : 0)));
+      this.prune();
+    } finally {
+      this.polling = false;
+      this.schedule();
+    }
+  }
+
+  private async poll(order: TrackedOrder, budget: { calls: number }, reserved: number) {
+    const now = Date.now();
+    if (now - order.placedAt > ORDER_MAX_AGE_MS) {
+      this.finish(order, "Stopped tracking: order is too old", "Order did not finish in time");
+      return;
+    }
+
+    order.polls += 1;
+    order.checkedAt = now;
+    let progressed = false;
+    try {
+      this.stats.apiCalls += 1;
+      const { status } = await order.api.getOrderStatus(order.orderHash);
+      if (status !== order.status) {
+        order.status = status;
+        progressed = true;
+        this.record(order, `Status: ${status}`);
+      }
+      if (TERMINAL_STATUSES.has(status)) {
+        this.finish(order, status === "executed" ? "Order is complete" : `Order finished: ${status}`);
+        return;
+      }
+
+      this.stats.apiCalls += 1;
+      const { fills } = await order.api.getReadyToAcceptSecretFills(order.orderHash);
+      order.secretsDeferred = false;
+      for (const fill of fills) {
+        if (order.submitted.has(fill.idx) || order.secrets[fill.idx] === undefined) {
+          continue;
+        }
+        if (reserved > 0) {
+          reserved -= 1;
+        } else if (budget.calls > 0) {
+          budget.calls -= 1;
+        } else {
+          order.secretsDeferred = true;
+          break;
+        }
+        this.stats.apiCalls += 1;
+        await order.api.submitSecret(order.orderHash, order.secrets[fill.idx]);
+        order.submitted.add(fill.idx);
+        progressed = true;
+        this.record(order, `Fill ${fill.idx} ready, secret submitted`);
+      }
+      order.failures = 0;
+    } catch (error) {
+      this.stats.errors += 1;
+      order.failures += 1;
+      const message = error instanceof Error ? error.message : String(error);
+      if (order.failures >= ORDER_MAX_FAILURES) {
+        this.finish(order, `Stopped tracking after ${order.failures} failed polls`, message);
+        return;
+      }
+      this.record(order, `Poll failed: ${message}`);
+    }
+
+    order.intervalMs = progressed || order.secretsDeferred
+      ? ORDER_POLL_MIN_MS
+      : Math.min(ORDER_POLL_MAX_MS, order.intervalMs * ORDER_POLL_BACKOFF);
+    order.nextCheckAt = Date.now() + order.intervalMs;
+  }
+}